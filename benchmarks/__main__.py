@@ -0,0 +1,52 @@
+import dataclasses
+import json
+import logging
+import time
+
+import click
+
+from .dataset import SCALES, generate
+from .scenarios import SCENARIOS, run_scenario
+
+
+def _megabytes(value: int) -> str:
+    return f'{value / 1024 / 1024:.1f}'
+
+
+@click.command(help='Run exporter benchmarks on a synthetic DSW dataset (no DSW stack needed)')
+@click.option('-s', '--scale', type=click.Choice(list(SCALES)), default='small',
+              help='Size of the synthetic dataset')
+@click.option('-b', '--scenario', 'scenarios', multiple=True,
+              type=click.Choice(list(SCENARIOS)),
+              help='Scenario to run (repeatable), all by default')
+@click.option('-r', '--repeat', type=click.IntRange(min=1), default=3,
+              help='Timed runs per scenario, the best one is reported')
+@click.option('-o', '--output', type=click.File('w', encoding='utf-8'), default=None,
+              help='Also write results as JSON (e.g., to compare with a previous run)')
+def main(scale, scenarios, repeat, output):
+    logging.basicConfig(level=logging.WARNING)
+    start = time.perf_counter()
+    dataset = generate(SCALES[scale])
+    click.echo(f'Dataset "{scale}": ' + ', '.join(
+        f'{table}={len(rows)}' for table, rows in dataset.tables.items()
+    ) + f', s3_objects={len(dataset.s3_objects)} ({time.perf_counter() - start:.1f}s)')
+
+    click.echo(f'{"scenario":<24} {"wall [s]":>9} {"queries":>8} '
+               f'{"written [MB]":>13} {"peak mem [MB]":>14}')
+    results = []
+    for name in scenarios or SCENARIOS:
+        result = run_scenario(name, dataset, repeat=repeat)
+        results.append(result)
+        click.echo(f'{result.scenario:<24} {result.wall_time:>9.3f} {result.queries:>8} '
+                   f'{_megabytes(result.bytes_written):>13} '
+                   f'{_megabytes(result.peak_memory):>14}')
+    if output is not None:
+        json.dump({
+            'scale': scale,
+            'repeat': repeat,
+            'results': [dataclasses.asdict(result) for result in results],
+        }, output, indent=4)
+
+
+if __name__ == '__main__':
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,247 @@
+import dataclasses
+import datetime
+import random
+import uuid
+from typing import Any
+
+TENANT_UUID = uuid.UUID('00000000-0000-0000-0000-000000000000')
+EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+
+
+@dataclasses.dataclass(frozen=True)
+class Scale:
+    users: int = 200
+    km_chains: int = 5
+    km_versions: int = 40
+    templates: int = 10
+    template_files: int = 20
+    template_assets: int = 50
+    asset_size: int = 64 * 1024
+    locales: int = 5
+    projects: int = 5000
+    documents: int = 5000
+    document_size: int = 128 * 1024
+    # replies per project event list, makes rows realistically large
+    project_events: int = 20
+
+
+SCALES = {
+    'small': Scale(users=20, km_chains=2, km_versions=5, templates=2, template_files=5,
+                   template_assets=10, asset_size=4 * 1024, projects=200, documents=200,
+                   document_size=8 * 1024,
+                   project_events=5),
+    'medium': Scale(),
+    'large': Scale(users=1000, km_chains=10, km_versions=100, templates=20, template_files=40,
+                   template_assets=200, projects=30000, documents=30000, project_events=40),
+}
+
+
+@dataclasses.dataclass
+class Dataset:
+    tables: dict[str, list[dict[str, Any]]]
+    # table -> column -> udt_name, as in information_schema.columns
+    column_types: dict[str, dict[str, str]]
+    primary_keys: dict[str, str]
+    # object name -> size in bytes
+    s3_objects: dict[str, int]
+
+
+def _timestamp(rnd: random.Random) -> datetime.datetime:
+    return EPOCH + datetime.timedelta(seconds=rnd.randrange(365 * 24 * 3600),
+                                      microseconds=rnd.randrange(1000000))
+
+
+def _uuid(rnd: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rnd.getrandbits(128), version=4)
+
+
+def _column_types(tables: dict[str, list[dict[str, Any]]]) -> dict[str, dict[str, str]]:
+    types = {
+        bool: 'bool', int: 'int4', uuid.UUID: 'uuid', datetime.datetime: 'timestamptz',
+        dict: 'jsonb', str: 'varchar',
+    }
+    result: dict[str, dict[str, str]] = {}
+    for table, rows in tables.items():
+        result[table] = {}
+        for row in rows[:1]:
+            for column, value in row.items():
+                if isinstance(value, list):
+                    is_json = len(value) > 0 and isinstance(value[0], dict)
+                    result[table][column] = 'jsonb' if is_json else '_varchar'
+                else:
+                    result[table][column] = types.get(type(value), 'varchar')
+    return result
+
+
+def _packages(rnd: random.Random, scale: Scale) -> list[dict[str, Any]]:
+    packages = []
+    for chain in range(scale.km_chains):
+        previous_id = None
+        for version in range(scale.km_versions):
+            package_id = f'benchmark:km-{chain}:{version}.0.0'
+            packages.append({
+                'id': package_id,
+                'name': f'Knowledge Model {chain}',
+                'organization_id': 'benchmark',
+                'km_id': f'km-{chain}',
+                'version': f'{version}.0.0',
+                'metamodel_version': 16,
+                'description': f'Version {version} of "km-{chain}"',
+                'readme': '# Readme\n\n' + 'Lorem ipsum\tdolor sit amet. ' * 50,
+                'license': 'Apache-2.0',
+                'previous_package_id': previous_id,
+                'fork_of_package_id': None,
+                'merge_checkpoint_package_id': None,
+                'events': [{'uuid': str(_uuid(rnd)), 'eventType': 'AddQuestionEvent',
+                            'title': f"Question {i} isn't trivial"} for i in range(30)],
+                'created_at': EPOCH + datetime.timedelta(days=chain * 1000 + version),
+                'tenant_uuid': TENANT_UUID,
+                'phase': 'ReleasedPackagePhase',
+                'non_editable': False,
+            })
+            previous_id = package_id
+    return packages
+
+
+def _templates(rnd: random.Random, scale: Scale, tables: dict[str, list[dict[str, Any]]],
+               s3_objects: dict[str, int]):
+    for index in range(scale.templates):
+        template_id = f'benchmark:template-{index}:1.0.0'
+        tables['document_template'].append({
+            'id': template_id,
+            'name': f'Template {index}',
+            'organization_id': 'benchmark',
+            'template_id': f'template-{index}',
+            'version': '1.0.0',
+            'metamodel_version': 14,
+            'description': 'Benchmark template',
+            'readme': 'Template readme',
+            'license': 'MIT',
+            'allowed_packages': [{'orgId': None, 'kmId': None}],
+            'formats': [{'uuid': str(_uuid(rnd)), 'name': 'PDF', 'icon': 'far fa-file-pdf'}],
+            'created_at': _timestamp(rnd),
+            'tenant_uuid': TENANT_UUID,
+            'phase': 'ReleasedDocumentTemplatePhase',
+            'non_editable': False,
+        })
+        for file_index in range(scale.template_files):
+            tables['document_template_file'].append({
+                'document_template_id': template_id,
+                'uuid': _uuid(rnd),
+                'file_name': f'src/part-{file_index}.j2',
+                'content': '{% for q in questions %}\n  {{ q.title }}\n{% endfor %}\n' * 20,
+                'tenant_uuid': TENANT_UUID,
+                'created_at': _timestamp(rnd),
+                'updated_at': _timestamp(rnd),
+            })
+        for asset_index in range(scale.template_assets):
+            asset_uuid = _uuid(rnd)
+            tables['document_template_asset'].append({
+                'document_template_id': template_id,
+                'uuid': asset_uuid,
+                'file_name': f'assets/image-{asset_index}.png',
+                'content_type': 'image/png',
+                'tenant_uuid': TENANT_UUID,
+                'file_size': scale.asset_size,
+                'created_at': _timestamp(rnd),
+                'updated_at': _timestamp(rnd),
+            })
+            s3_objects[f'templates/{template_id}/{asset_uuid}'] = scale.asset_size
+
+
+def _projects(rnd: random.Random, scale: Scale, tables: dict[str, list[dict[str, Any]]],
+              s3_objects: dict[str, int]):
+    packages = [package['id'] for package in tables['package']]
+    templates = [template['id'] for template in tables['document_template']]
+    users = [user['uuid'] for user in tables['user_entity']]
+    for index in range(scale.projects):
+        tables['questionnaire'].append({
+            'uuid': _uuid(rnd),
+            'name': f'Project {index}',
+            'visibility': 'PrivateQuestionnaire',
+            'package_id': rnd.choice(packages),
+            'document_template_id': rnd.choice(templates),
+            'format_uuid': None,
+            'creator_uuid': rnd.choice(users),
+            'events': [{'uuid': str(_uuid(rnd)), 'type': 'SetReplyEvent',
+                        'path': f'chapter.{i}', 'value': {'value': 'Some "quoted" answer'}}
+                       for i in range(scale.project_events)],
+            'description': None,
+            'is_template': False,
+            'project_tags': ['benchmark', 'seed'],
+            'created_at': _timestamp(rnd),
+            'updated_at': _timestamp(rnd),
+            'tenant_uuid': TENANT_UUID,
+        })
+    projects = [project['uuid'] for project in tables['questionnaire']]
+    for index in range(scale.documents):
+        document_uuid = _uuid(rnd)
+        s3_objects[f'documents/{document_uuid}'] = scale.document_size
+        tables['document'].append({
+            'uuid': document_uuid,
+            'name': f'Document {index}',
+            'state': 'DoneDocumentState',
+            'questionnaire_uuid': rnd.choice(projects),
+            'questionnaire_event_uuid': None,
+            'document_template_id': rnd.choice(templates),
+            'format_uuid': _uuid(rnd),
+            'file_name': f'document-{index}.pdf',
+            'content_type': 'application/pdf',
+            'file_size': scale.document_size,
+            'worker_log': None,
+            'created_at': _timestamp(rnd),
+            'tenant_uuid': TENANT_UUID,
+        })
+
+
+def generate(scale: Scale, seed: int = 42) -> Dataset:
+    rnd = random.Random(seed)
+    tables: dict[str, list[dict[str, Any]]] = {
+        'user_entity': [], 'questionnaire_importer': [], 'locale': [], 'package': [],
+        'document_template': [], 'document_template_file': [], 'document_template_asset': [],
+        'questionnaire': [], 'document': [],
+    }
+    s3_objects: dict[str, int] = {}
+    tables['user_entity'] = [{
+        'uuid': _uuid(rnd),
+        'first_name': f'User {index}',
+        'last_name': f"O'Benchmark {index}",
+        'email': f'user{index}@example.com',
+        'role': 'researcher',
+        'active': True,
+        'created_at': _timestamp(rnd),
+        'tenant_uuid': TENANT_UUID,
+    } for index in range(scale.users)]
+    tables['questionnaire_importer'] = [{
+        'id': f'benchmark:importer-{index}:1.0.0',
+        'name': f'Importer {index}',
+        'description': 'Benchmark importer',
+        'url': None,
+        'created_at': _timestamp(rnd),
+        'tenant_uuid': TENANT_UUID,
+    } for index in range(3)]
+    for index in range(scale.locales):
+        locale_id = f'benchmark:locale-{index}:1.0.0'
+        tables['locale'].append({
+            'id': locale_id,
+            'name': f'Locale {index}',
+            'code': f'l{index}',
+            'description': 'Benchmark locale',
+            'created_at': _timestamp(rnd),
+            'tenant_uuid': TENANT_UUID,
+        })
+        s3_objects[f'locales/{locale_id}'] = 16 * 1024
+    tables['package'] = _packages(rnd, scale)
+    _templates(rnd, scale, tables, s3_objects)
+    _projects(rnd, scale, tables, s3_objects)
+    primary_keys = {
+        'user_entity': 'uuid', 'questionnaire_importer': 'id', 'locale': 'id', 'package': 'id',
+        'document_template': 'id', 'document_template_file': 'uuid',
+        'document_template_asset': 'uuid', 'questionnaire': 'uuid', 'document': 'uuid',
+    }
+    return Dataset(
+        tables=tables,
+        column_types=_column_types(tables),
+        primary_keys=primary_keys,
+        s3_objects=s3_objects,
+    )
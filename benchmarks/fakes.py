@@ -0,0 +1,155 @@
+import collections
+import contextlib
+import hashlib
+import io
+import pathlib
+import re
+from typing import Any, Iterator
+
+from psycopg import sql
+
+from .dataset import Dataset
+
+_SELECT_COLUMNS = re.compile(r'^SELECT (?P<columns>.+?) FROM "(?P<table>\w+)"$')
+_SELECT_ANY = re.compile(r'^SELECT .+? FROM "(?P<table>\w+)" WHERE "(?P<column>\w+)" = ANY')
+# dry-run planner asks for the row size as text
+_ROW_SIZE = re.compile(r'octet_length\(.+?::text\) AS "(?P<column>\w+)"')
+_CHAIN = re.compile(
+    r'^WITH RECURSIVE chain \("(?P<id>\w+)", "(?P<chain>\w+)"\).* FROM "(?P<table>\w+)"'
+)
+
+
+class FakeDatabase:
+    # In-process stand-in for comm.db.Database answering the queries the exporter issues
+
+    def __init__(self, dataset: Dataset):
+        self.dataset = dataset
+        self.query_count = 0
+        self.profiler = None
+        self._indexes: dict[tuple[str, str], dict[str, list[dict[str, Any]]]] = {}
+
+    def _index(self, table: str, column: str) -> dict[str, list[dict[str, Any]]]:
+        index = self._indexes.get((table, column))
+        if index is None:
+            index = collections.defaultdict(list)
+            for row in self.dataset.tables[table]:
+                index[str(row[column])].append(row)
+            self._indexes[(table, column)] = index
+        return index
+
+    def execute_query(self, query: sql.Composable | str, **kwargs) -> list[dict[str, Any]]:
+        self.query_count += 1
+        text = query if isinstance(query, str) else query.as_string(None)
+        if 'information_schema.columns' in text:
+            return [
+                {'table_name': table, 'column_name': column, 'udt_name': udt_name}
+                for table in kwargs['tables']
+                for column, udt_name in self.dataset.column_types.get(table, {}).items()
+            ]
+        if 'information_schema.table_constraints' in text:
+            return [
+                {'table_name': table, 'column_name': self.dataset.primary_keys[table]}
+                for table in kwargs['tables'] if table in self.dataset.primary_keys
+            ]
+        size = _ROW_SIZE.search(text)
+        match = _CHAIN.match(text)
+        if match is not None:
+            rows = self._chains(match['table'], match['id'], match['chain'], kwargs['values'])
+            return self._sized(rows, size['column']) if size else rows
+        match = _SELECT_ANY.match(text)
+        if match is not None:
+            index = self._index(match['table'], match['column'])
+            rows = [dict(row) for value in kwargs['values'] for row in index.get(value, [])]
+            return self._sized(rows, size['column']) if size else rows
+        match = _SELECT_COLUMNS.match(text)
+        if match is not None:
+            columns = [column.strip('"') for column in match['columns'].split(', ')]
+            return [
+                {column: row[column] for column in columns}
+                for row in self.dataset.tables[match['table']]
+            ]
+        raise ValueError(f'Unsupported query: {text}')
+
+    @contextlib.contextmanager
+    def snapshot(self) -> Iterator['FakeDatabase']:
+        yield self
+
+    def iterate_query(self, query: sql.Composable | str, fetch_size: int = 1000,
+                      **kwargs) -> Iterator[dict[str, Any]]:
+        del fetch_size
+        yield from self.execute_query(query, **kwargs)
+
+    @staticmethod
+    def _sized(rows: list[dict[str, Any]], column: str) -> list[dict[str, Any]]:
+        # all columns are returned, the size approximates the text of the row
+        for row in rows:
+            row[column] = len(str(tuple(row.values())))
+        return rows
+
+    def _chains(self, table: str, id_column: str, chain_column: str,
+                values: list[str]) -> list[dict[str, Any]]:
+        index = self._index(table, id_column)
+        rows: dict[str, dict[str, Any]] = {}
+        pending = list(values)
+        while pending:
+            entity_id = pending.pop()
+            if entity_id in rows or entity_id not in index:
+                continue
+            row = index[entity_id][0]
+            rows[entity_id] = dict(row)
+            if row[chain_column] is not None:
+                pending.append(str(row[chain_column]))
+        return list(rows.values())
+
+    def close(self):
+        pass
+
+
+class FakeResponse(io.BytesIO):
+    # minio response, the connection goes back to its pool when released
+
+    def release_conn(self):
+        pass
+
+
+class FakeS3Storage:
+    # Objects are generated from their names, sizes come from the dataset
+
+    def __init__(self, dataset: Dataset, bucket: str = 'benchmark'):
+        self.dataset = dataset
+        self._bucket = bucket
+        self.bytes_downloaded = 0
+
+    @property
+    def bucket(self):
+        return self._bucket
+
+    def _content(self, file_name: str) -> bytes | None:
+        size = self.dataset.s3_objects.get(file_name)
+        if size is None:
+            return None
+        return (file_name.encode('utf-8') * (size // len(file_name) + 1))[:size]
+
+    def ensure_bucket(self):
+        pass
+
+    def stat_object(self, file_name: str) -> tuple[str, int] | None:
+        size = self.dataset.s3_objects.get(file_name)
+        if size is None:
+            return None
+        return hashlib.md5(file_name.encode('utf-8')).hexdigest(), size  # nosec B324
+
+    def download_file(self, file_name: str, target_path: pathlib.Path) -> bool:
+        content = self._content(file_name)
+        if content is None:
+            return False
+        target_path.write_bytes(content)
+        self.bytes_downloaded += len(content)
+        return True
+
+    def open_object(self, file_name: str) -> tuple[FakeResponse, int] | None:
+        content = self._content(file_name)
+        if content is None:
+            return None
+        self.bytes_downloaded += len(content)
+        return FakeResponse(content), len(content)
@@ -0,0 +1,198 @@
+import contextlib
+import dataclasses
+import gc
+import os
+import pathlib
+import shutil
+import subprocess  # nosec B404
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Iterator
+from unittest import mock
+
+from dsw_seed_maker import logic
+from dsw_seed_maker.config import Config
+from dsw_seed_maker.manifest import MANIFEST_FILE
+
+from .dataset import Dataset
+from .fakes import FakeDatabase, FakeS3Storage
+
+
+@dataclasses.dataclass
+class Context:
+    dataset: Dataset
+    db: FakeDatabase
+    s3: FakeS3Storage
+    work_dir: pathlib.Path
+
+
+@dataclasses.dataclass
+class Result:
+    scenario: str
+    wall_time: float
+    queries: int
+    bytes_written: int
+    peak_memory: int
+
+
+Scenario = Callable[[Context], int]
+
+
+class _CountingWriter:
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data: str):
+        self.size += len(data.encode('utf-8'))
+
+
+# modules trivial CLI commands (--help, --version) must not load, they take
+# most of the startup time (~1s together)
+STARTUP_FORBIDDEN = ('dsw_seed_maker.api', 'dsw_seed_maker.logic', 'fastapi', 'minio',
+                     'prometheus_client', 'psycopg', 'psycopg_pool', 'tenacity')
+_STARTUP_CHECK = '''
+import sys
+from dsw_seed_maker.cli import cli
+try:
+    cli(['--version'], standalone_mode=False)
+finally:
+    print(' '.join(sorted(set(sys.argv[1:]) & set(sys.modules))))
+'''
+
+
+def _tree_size(path: pathlib.Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(file.stat().st_size for file in path.rglob('*') if file.is_file())
+
+
+def _seed_input(dataset: Dataset) -> dict[str, list[dict[str, str]]]:
+    return {
+        'projects': [{'uuid': str(row['uuid'])} for row in dataset.tables['questionnaire']],
+        'documents': [{'uuid': str(row['uuid'])} for row in dataset.tables['document']],
+        'users': [{'uuid': str(row['uuid'])} for row in dataset.tables['user_entity']],
+        'locales': [{'id': row['id']} for row in dataset.tables['locale']],
+    }
+
+
+def list_all(ctx: Context) -> int:  # pylint: disable=unused-argument
+    writer = _CountingWriter()
+    logic.dump_list_logic('all', writer)  # type: ignore[arg-type]
+    return writer.size
+
+
+def cli_startup(ctx: Context) -> int:  # pylint: disable=unused-argument
+    # fresh interpreter each run, as in short-lived containers
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    result = subprocess.run(  # nosec B603
+        [sys.executable, '-c', _STARTUP_CHECK, *STARTUP_FORBIDDEN],
+        capture_output=True, check=True, env=env, text=True,
+    )
+    loaded = result.stdout.splitlines()[-1].strip()
+    if loaded:
+        raise RuntimeError(f'CLI startup imports {loaded}')
+    return len(result.stdout)
+
+
+def _make_seed(ctx: Context, sql_format: str, archive: str | None = None,
+               previous_manifest: pathlib.Path | None = None) -> pathlib.Path:
+    output_dir = ctx.work_dir / 'output'
+    shutil.rmtree(output_dir, ignore_errors=True)
+    logic.process_input(
+        _seed_input(ctx.dataset), str(output_dir), sql_format=sql_format,
+        archive=str(ctx.work_dir / archive) if archive else None,
+        previous_manifest=str(previous_manifest) if previous_manifest else None,
+    )
+    return ctx.work_dir / archive if archive else output_dir
+
+
+def make_seed_insert(ctx: Context) -> int:
+    return _tree_size(_make_seed(ctx, 'insert'))
+
+
+def make_seed_multi_insert(ctx: Context) -> int:
+    return _tree_size(_make_seed(ctx, 'multi-insert'))
+
+
+def make_seed_tar_gz(ctx: Context) -> int:
+    return _tree_size(_make_seed(ctx, 'multi-insert', archive='seed.tar.gz'))
+
+
+def make_seed_zip(ctx: Context) -> int:
+    return _tree_size(_make_seed(ctx, 'multi-insert', archive='seed.zip'))
+
+
+def make_seed_dry_run(ctx: Context) -> int:
+    estimate = logic.estimate_seed_logic(_seed_input(ctx.dataset), sql_format='multi-insert')
+    return estimate.sql_bytes
+
+
+def make_seed_delta(ctx: Context) -> int:
+    # nothing changed since the previous run, only the manifest is compared
+    manifest = ctx.work_dir / MANIFEST_FILE
+    if not manifest.exists():
+        shutil.copyfile(_make_seed(ctx, 'multi-insert') / MANIFEST_FILE, manifest)
+    return _tree_size(_make_seed(ctx, 'multi-insert', previous_manifest=manifest))
+
+
+SCENARIOS: dict[str, Scenario] = {
+    'cli-startup': cli_startup,
+    'list-all': list_all,
+    'make-seed-insert': make_seed_insert,
+    'make-seed-multi-insert': make_seed_multi_insert,
+    'make-seed-tar-gz': make_seed_tar_gz,
+    'make-seed-zip': make_seed_zip,
+    'make-seed-delta': make_seed_delta,
+    'make-seed-dry-run': make_seed_dry_run,
+}
+
+
+@contextlib.contextmanager
+def _stand_ins(ctx: Context) -> Iterator[None]:
+    # exporter talks to the fakes, S3 cache is off so every run downloads
+    # pylint: disable-next=protected-access
+    with mock.patch.object(logic._SHARED, 'db', ctx.db), \
+            mock.patch.object(logic, 'connect_to_s3_logic', lambda: ctx.s3), \
+            mock.patch.object(Config, 'SEED_S3_CACHE_SIZE', 0):
+        yield
+
+
+def run_scenario(name: str, dataset: Dataset, repeat: int = 3) -> Result:
+    scenario = SCENARIOS[name]
+    with tempfile.TemporaryDirectory(prefix='dsw-seed-bench-') as work_dir:
+        ctx = Context(
+            dataset=dataset,
+            db=FakeDatabase(dataset),
+            s3=FakeS3Storage(dataset),
+            work_dir=pathlib.Path(work_dir),
+        )
+        with _stand_ins(ctx):
+            # warm-up (fake indexes, previous manifest), then best of N timed runs
+            scenario(ctx)
+            wall_time = float('inf')
+            queries = bytes_written = 0
+            for _ in range(max(1, repeat)):
+                gc.collect()
+                ctx.db.query_count = 0
+                start = time.perf_counter()
+                bytes_written = scenario(ctx)
+                wall_time = min(wall_time, time.perf_counter() - start)
+                queries = ctx.db.query_count
+            # separate run, tracing allocations distorts the timing
+            gc.collect()
+            tracemalloc.start()
+            try:
+                scenario(ctx)
+                _, peak_memory = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+    return Result(
+        scenario=name,
+        wall_time=wall_time,
+        queries=queries,
+        bytes_written=bytes_written,
+        peak_memory=peak_memory,
+    )
@@ -1,4 +1,20 @@
-from .api import app
-from .cli import cli
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .api import app
+    from .cli import cli
 
 __all__ = ['app', 'cli']
+
+# loaded on first access, so that the CLI starts without the web application
+_LAZY = {
+    'app': '.api',
+    'cli': '.cli',
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    return getattr(importlib.import_module(_LAZY[name], __name__), name)
@@ -1,21 +1,34 @@
+import asyncio
 import contextlib
+import email.utils
 import logging
 import pathlib
+from typing import Annotated
 
 import fastapi
+import fastapi.encoders
 import fastapi.responses
 import fastapi.staticfiles
 import fastapi.templating
 
 from .config import Config
 from .consts import NICE_NAME, VERSION
-from .models import ExampleRequestDTO, ExampleResponseDTO
-from .logic import example_logic, list_logic
+from .models import ExampleRequestDTO, ExampleResponseDTO, ListingQueryDTO, SeedJobDTO, \
+    SeedPackageRequestDTO
+from .cache import CacheEntry
+from .jobs import JOB_FINISHED_STATES, JobLimitError, JobQueueFullError
+from .logic import cached_list_logic_async, cancel_seed_job_logic, close_async_db_logic, \
+    close_db_logic, close_seed_jobs_logic, example_logic, get_seed_job_logic, \
+    invalidate_list_cache_logic, list_seed_jobs_logic, seed_job_package_logic, \
+    submit_seed_job_logic
+from .metrics import exposition
 
 LOG = logging.getLogger('uvicorn.error')
 ROOT = pathlib.Path(__file__).parent
 STATIC_DIR = ROOT / 'static'
 TEMPLATES_DIR = ROOT / 'templates'
+USER_HEADER = 'X-Forwarded-User'
+SEED_EVENTS_INTERVAL = 1.0
 
 
 @contextlib.asynccontextmanager
@@ -24,6 +37,9 @@ async def lifespan(fastapi_app: fastapi.FastAPI):
     Config.check()
     LOG.debug('Configured logging when starting app "%s"', repr(fastapi_app))
     yield
+    close_seed_jobs_logic()
+    await close_async_db_logic()
+    close_db_logic()
 
 
 app = fastapi.FastAPI(
@@ -46,6 +62,13 @@ async def get_example(request: fastapi.Request):
     )
 
 
+# Monitoring endpoints
+@app.get('/metrics', include_in_schema=False)
+async def get_metrics():
+    content, content_type = exposition()
+    return fastapi.Response(content=content, media_type=content_type)
+
+
 # API/JSON endpoints / controllers
 @app.post('/api/example', response_model=ExampleResponseDTO)
 async def post_example(req_dto: ExampleRequestDTO, request: fastapi.Request):
@@ -54,95 +77,205 @@ async def post_example(req_dto: ExampleRequestDTO, request: fastapi.Request):
     return example_logic(req_dto)
 
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # weak comparison (RFC 9110), W/"x" matches "x" and * matches any
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def _listing_response(request: fastapi.Request, entry: CacheEntry) -> fastapi.Response:
+    headers = {
+        'ETag': entry.etag,
+        'Last-Modified': email.utils.format_datetime(entry.last_modified, usegmt=True),
+        'Cache-Control': 'no-cache',
+    }
+    if_none_match = request.headers.get('if-none-match')
+    if_modified_since = request.headers.get('if-modified-since')
+    not_modified = False
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, entry.etag)
+    elif if_modified_since is not None:
+        try:
+            modified_since = email.utils.parsedate_to_datetime(if_modified_since)
+            not_modified = modified_since >= entry.last_modified
+        except (TypeError, ValueError):
+            not_modified = False
+    if not_modified:
+        return fastapi.Response(status_code=304, headers=headers)
+    return fastapi.responses.JSONResponse(
+        content=fastapi.encoders.jsonable_encoder(entry.value),
+        headers=headers,
+    )
+
+
 @app.get('/api/all_resources')
-async def get_all_resources():
+async def get_all_resources(request: fastapi.Request):
     LOG.debug('Fetching all resources...')
     try:
-        all_resources = list_logic("all")
-        return all_resources
+        entry = await cached_list_logic_async('all')
+        return _listing_response(request, entry)
     except Exception as e:
         LOG.error('Error fetching all resources: %s', str(e))
         raise fastapi.HTTPException(status_code=500, detail='Could not fetch all resources')
 
 
-@app.get('/api/users')
-async def get_users():
-    LOG.debug('Fetching users...')
+@app.delete('/api/cache', status_code=204)
+async def delete_cache(request: fastapi.Request, resource_type: str | None = None):
+    # flushing sends the following listings to the DB, only proxy-authenticated users may
+    user = _proxy_user(request)
+    if user is None:
+        raise fastapi.HTTPException(status_code=403, detail='Authenticated user required')
+    LOG.info('Invalidating listing cache (%s) for %s', resource_type or 'all', user)
     try:
-        users = list_logic("users")
-        return users
-    except Exception as e:
-        LOG.error('Error fetching users: %s', str(e))
-        raise fastapi.HTTPException(status_code=500, detail='Could not fetch users')
+        invalidate_list_cache_logic(resource_type)
+    except ValueError as e:
+        raise fastapi.HTTPException(status_code=400, detail=str(e))
 
 
-@app.get('/api/project_importers')
-async def get_project_importers():
-    LOG.debug('Fetching pproject importers...')
+async def _list_resources(resource_type: str, query: ListingQueryDTO,
+                          request: fastapi.Request):
+    nice_name = resource_type.replace('_', ' ')
     try:
-        project_importers = list_logic("project_importers")
-        return project_importers
+        entry = await cached_list_logic_async(
+            resource_type=resource_type,
+            query_dto=None if query == ListingQueryDTO() else query,
+        )
+        return _listing_response(request, entry)
+    except ValueError as e:
+        raise fastapi.HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        LOG.error('Error fetching project_importers: %s', str(e))
-        raise fastapi.HTTPException(status_code=500, detail='Could not fetch project_importers')
+        LOG.error('Error fetching %s: %s', nice_name, str(e))
+        raise fastapi.HTTPException(status_code=500, detail=f'Could not fetch {nice_name}')
+
+
+@app.get('/api/users')
+async def get_users(request: fastapi.Request,
+                    query: Annotated[ListingQueryDTO, fastapi.Query()]):
+    LOG.debug('Fetching users...')
+    return await _list_resources('users', query, request)
+
+
+@app.get('/api/project_importers')
+async def get_project_importers(request: fastapi.Request,
+                                query: Annotated[ListingQueryDTO, fastapi.Query()]):
+    LOG.debug('Fetching project importers...')
+    return await _list_resources('project_importers', query, request)
 
 
 @app.get('/api/knowledge_models')
-async def get_knowledge_models():
+async def get_knowledge_models(request: fastapi.Request,
+                               query: Annotated[ListingQueryDTO, fastapi.Query()]):
     LOG.debug('Fetching knowledge models...')
-    try:
-        knowledge_models = list_logic("knowledge_models")
-        return knowledge_models
-    except Exception as e:
-        LOG.error('Error fetching knowledge models: %s', str(e))
-        raise fastapi.HTTPException(status_code=500, detail='Could not fetch knowledge models')
+    return await _list_resources('knowledge_models', query, request)
 
 
 @app.get('/api/locales')
-async def get_locales():
+async def get_locales(request: fastapi.Request,
+                      query: Annotated[ListingQueryDTO, fastapi.Query()]):
     LOG.debug('Fetching locales...')
-    try:
-        locales = list_logic("locales")
-        return locales
-    except Exception as e:
-        LOG.error('Error fetching locales: %s', str(e))
-        raise fastapi.HTTPException(status_code=500, detail='Could not fetch locales')
+    return await _list_resources('locales', query, request)
 
 
 @app.get('/api/document_templates')
-async def get_document_templates():
+async def get_document_templates(request: fastapi.Request,
+                                 query: Annotated[ListingQueryDTO, fastapi.Query()]):
     LOG.debug('Fetching document templates...')
-    try:
-        document_templates = list_logic("document_templates")
-        return document_templates
-    except Exception as e:
-        LOG.error('Error fetching document templates: %s', str(e))
-        raise fastapi.HTTPException(status_code=500, detail='Could not fetch document templates')
+    return await _list_resources('document_templates', query, request)
 
 
 @app.get('/api/projects')
-async def get_projects():
+async def get_projects(request: fastapi.Request,
+                       query: Annotated[ListingQueryDTO, fastapi.Query()]):
     LOG.debug('Fetching projects...')
-    try:
-        projects = list_logic("projects")
-        return projects
-    except Exception as e:
-        LOG.error('Error fetching projects: %s', str(e))
-        raise fastapi.HTTPException(status_code=500, detail='Could not fetch projects')
+    return await _list_resources('projects', query, request)
 
 
 @app.get('/api/documents')
-async def get_documents():
+async def get_documents(request: fastapi.Request,
+                        query: Annotated[ListingQueryDTO, fastapi.Query()]):
     LOG.debug('Fetching documents...')
+    return await _list_resources('documents', query, request)
+
+
+def _proxy_user(request: fastapi.Request) -> str | None:
+    # the header is client-controlled unless a proxy sets it
+    if not Config.SEED_JOBS_TRUST_USER_HEADER:
+        return None
+    return request.headers.get(USER_HEADER) or None
+
+
+def _request_user(request: fastapi.Request) -> str:
+    # the client address is a fallback
+    user = _proxy_user(request)
+    if user is not None:
+        return user
+    return request.client.host if request.client else 'anonymous'
+
+
+def _seed_job_or_404(job_dto: SeedJobDTO | None) -> SeedJobDTO:
+    if job_dto is None:
+        raise fastapi.HTTPException(status_code=404, detail='Seed job not found')
+    return job_dto
+
+
+@app.post('/api/seed-package', response_model=SeedJobDTO, status_code=202)
+async def post_seed(req_dto: SeedPackageRequestDTO, request: fastapi.Request):
+    LOG.debug('Submitting seed job...')
     try:
-        documents = list_logic("documents")
-        return documents
-    except Exception as e:
-        LOG.error('Error fetching documents: %s', str(e))
-        raise fastapi.HTTPException(status_code=500, detail='Could not fetch documents')
+        return submit_seed_job_logic(_request_user(request), req_dto)
+    except ValueError as e:
+        raise fastapi.HTTPException(status_code=400, detail=str(e))
+    except JobLimitError as e:
+        raise fastapi.HTTPException(status_code=429, detail=str(e))
+    except JobQueueFullError as e:
+        raise fastapi.HTTPException(status_code=503, detail=str(e))
+
+
+@app.get('/api/seed-package', response_model=list[SeedJobDTO])
+async def get_seed_jobs(request: fastapi.Request):
+    return list_seed_jobs_logic(_request_user(request))
+
+
+@app.get('/api/seed-package/{job_id}', response_model=SeedJobDTO)
+async def get_seed_job(job_id: str, request: fastapi.Request):
+    return _seed_job_or_404(get_seed_job_logic(_request_user(request), job_id))
+
+
+@app.delete('/api/seed-package/{job_id}', response_model=SeedJobDTO, status_code=202)
+async def delete_seed_job(job_id: str, request: fastapi.Request):
+    LOG.debug('Cancelling seed job %s...', job_id)
+    return _seed_job_or_404(cancel_seed_job_logic(_request_user(request), job_id))
+
+
+@app.get('/api/seed-package/{job_id}/events')
+async def get_seed_job_events(job_id: str, request: fastapi.Request):
+    # Server-sent events with the job progress until the job finishes
+    user = _request_user(request)
+    _seed_job_or_404(get_seed_job_logic(user, job_id))
+
+    async def events():
+        while True:
+            job_dto = get_seed_job_logic(user, job_id)
+            if job_dto is None:
+                return
+            yield f'event: progress\ndata: {job_dto.model_dump_json()}\n\n'
+            if job_dto.state in JOB_FINISHED_STATES or await request.is_disconnected():
+                return
+            await asyncio.sleep(SEED_EVENTS_INTERVAL)
+
+    return fastapi.responses.StreamingResponse(
+        events(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache'},
+    )
 
 
-@app.post('/api/seed-package', response_class=fastapi.responses.JSONResponse)
-async def post_seed():
-    # TODO: implement
-    return fastapi.responses.JSONResponse(content={'status': 'ok'})
+@app.get('/api/seed-package/{job_id}/package')
+async def get_seed_job_package(job_id: str, request: fastapi.Request):
+    package_path = seed_job_package_logic(_request_user(request), job_id)
+    if package_path is None:
+        raise fastapi.HTTPException(status_code=404, detail='Seed package not available')
+    return fastapi.responses.FileResponse(package_path, filename=package_path.name)
@@ -0,0 +1,87 @@
+import collections
+import dataclasses
+import datetime
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Hashable, Iterable
+
+
+def compute_etag(value: Any) -> str:
+    data = json.dumps(value, sort_keys=True, default=str, separators=(',', ':'))
+    return f'"{hashlib.sha256(data.encode("utf-8")).hexdigest()[:32]}"'
+
+
+@dataclasses.dataclass(frozen=True)
+class CacheEntry:
+    value: Any
+    etag: str
+    last_modified: datetime.datetime
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+
+def combine_entries(entries: Iterable[CacheEntry]) -> CacheEntry:
+    entries = list(entries)
+    value: dict[str, Any] = {}
+    for entry in entries:
+        value.update(entry.value)
+    return CacheEntry(
+        value=value,
+        etag=compute_etag([entry.etag for entry in entries]),
+        last_modified=max(entry.last_modified for entry in entries),
+        expires_at=min(entry.expires_at for entry in entries),
+    )
+
+
+class TTLCache:
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: collections.OrderedDict[Hashable, CacheEntry] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry.fresh:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, value: Any, ttl: float) -> CacheEntry:
+        etag = compute_etag(value)
+        now = datetime.datetime.now(tz=datetime.UTC).replace(microsecond=0)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            # unchanged content keeps its original modification time
+            last_modified = now
+            if previous is not None and previous.etag == etag:
+                last_modified = previous.last_modified
+            entry = CacheEntry(
+                value=value,
+                etag=etag,
+                last_modified=last_modified,
+                expires_at=time.monotonic() + ttl,
+            )
+            if ttl > 0 and self.max_size > 0:
+                self._entries[key] = entry
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            return entry
+
+    def invalidate(self, prefix: Hashable | None = None):
+        # keys are tuples, entries with matching first item are dropped
+        with self._lock:
+            if prefix is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if isinstance(k, tuple) and k[0] == prefix]:
+                del self._entries[key]
@@ -1,11 +1,22 @@
 import json
 import pathlib
+import sys
+import uuid
+from typing import TYPE_CHECKING
 
 import click
 
 from .config import Config
-from .consts import DEFAULT_ENCODING, PACKAGE_VERSION
-from .logic import list_logic, process_input  # , parse_input_data  # ,download_file_logic
+from .consts import DEFAULT_ENCODING, DEFAULT_ROWS_PER_STATEMENT, PACKAGE_VERSION, \
+    SQL_FORMAT_INSERT, SQL_FORMATS
+from .package import ARCHIVE_SUFFIXES, archive_format
+
+if TYPE_CHECKING:
+    from .estimate import SeedEstimate
+    from .logic import TenantExportResult
+
+# Commands import logic (DB and S3 clients, metrics) only when they run,
+# so that e.g. --help and --version start quickly
 
 
 class AliasedGroup(click.Group):
@@ -27,6 +38,14 @@ class AliasedGroup(click.Group):
 @click.version_option(version=PACKAGE_VERSION, message=f'%(prog)s v{PACKAGE_VERSION}')
 def cli():
     Config.apply_logging()
+    click.get_current_context().call_on_close(_close_db)
+
+
+def _close_db():
+    # nothing to close if no command needed the database
+    logic = sys.modules.get(f'{__package__}.logic')
+    if logic is not None:
+        logic.close_db_logic()
 
 
 @cli.command(help='Run the web application', name='run-web')
@@ -58,12 +77,10 @@ def example():
                    '(all, users, projects_importers, knowledge_models,'
                    ' locales, document_templates, projects, documents)')
 def list_resources(output, resource_type):
+    from .logic import dump_list_logic  # pylint: disable=import-outside-toplevel
     Config.check()
-    # TODO: Implement list command (do it in logic, import & use here)
-    resources = list_logic(resource_type)
-    json_output = json.dumps(resources, indent=4)
-    output.write(json_output)
-    
+    dump_list_logic(resource_type, output)
+
 
 # just for testing the download
 # @cli.command(help='List all available seed resources', name='download')
@@ -80,11 +97,127 @@ def list_resources(output, resource_type):
 @click.option('-o', '--output-dir',
               type=click.Path(dir_okay=True, file_okay=False), default='output',
               help='Output directory to write to')
-def make_seed(input_fp, output_dir):
+@click.option('-a', '--archive',
+              type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Write the seed package into a single archive instead of the output '
+                   f'directory ({", ".join(ARCHIVE_SUFFIXES)})')
+@click.option('-f', '--sql-format',
+              type=click.Choice(SQL_FORMATS), default=SQL_FORMAT_INSERT,
+              help='Format of generated SQL: one INSERT per row or multi-row INSERTs')
+@click.option('-r', '--rows-per-statement',
+              type=click.IntRange(min=1), default=DEFAULT_ROWS_PER_STATEMENT,
+              help='Number of rows per multi-row INSERT statement')
+@click.option('-m', '--previous-manifest',
+              type=click.Path(exists=True, dir_okay=False), default=None,
+              help='Manifest of a previous seed package, only new and changed entities '
+                   'and S3 objects are exported (as upserts)')
+@click.option('-q', '--query-report',
+              type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Profile database queries and write a report ranking them by total time '
+                   '(slow query threshold and EXPLAIN sampling are set in the environment)')
+@click.option('-t', '--tenant', 'tenants', multiple=True,
+              help='Export the selection for this tenant (UUID) into its own package, '
+                   'may be repeated; the package name gets the tenant UUID appended')
+@click.option('-T', '--tenants-file',
+              type=click.File('r', encoding=DEFAULT_ENCODING), default=None,
+              help='File with tenant UUIDs to export, one per line')
+@click.option('-w', '--workers',
+              type=click.IntRange(min=1), default=None,
+              help='Number of worker processes exporting tenants '
+                   '(default: SEED_TENANT_WORKERS)')
+@click.option('-n', '--dry-run', is_flag=True,
+              help='Only estimate rows, SQL size, S3 objects and time of the export, '
+                   'without fetching the data or writing the package')
+# pylint: disable-next=too-many-arguments,too-many-locals
+def make_seed(input_fp, output_dir, archive, sql_format, rows_per_statement, previous_manifest,
+              query_report, tenants, tenants_file, workers, dry_run):
+    from .logic import process_input  # pylint: disable=import-outside-toplevel
+    from . import metrics  # pylint: disable=import-outside-toplevel
     Config.check()
+    tenants = _tenant_list(tenants, tenants_file)
+    if tenants and (previous_manifest is not None or query_report is not None):
+        raise click.BadParameter('Delta seeds and query reports are not supported '
+                                 'for tenant exports', param_hint='--tenant')
+    if archive is not None:
+        try:
+            archive_format(pathlib.Path(archive))
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--archive') from e
     data = json.load(input_fp)
-    out_dir = pathlib.Path(output_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
     # TODO: Implement list command (do it in logic, import & use here)
     print(data)
-    process_input(data, output_dir)
+    if dry_run:
+        _echo_estimates(data, tenants, sql_format=sql_format,
+                        rows_per_statement=rows_per_statement)
+        return
+    if tenants:
+        _make_tenant_seeds(tenants, workers, data=data, output_dir=output_dir, archive=archive,
+                           sql_format=sql_format, rows_per_statement=rows_per_statement)
+        return
+    metrics_before = metrics.snapshot()
+    process_input(data, output_dir, sql_format=sql_format,
+                  rows_per_statement=rows_per_statement, archive=archive,
+                  previous_manifest=previous_manifest, query_report=query_report)
+    click.echo(metrics.summary(metrics_before))
+
+
+def _echo_estimates(data, tenants: list[str], **options):
+    from .logic import estimate_seed_logic  # pylint: disable=import-outside-toplevel
+    targets: list[str | None] = list(tenants) or [None]
+    for tenant in targets:
+        if tenant is not None:
+            click.echo(f'Tenant {tenant}:')
+        _echo_estimate(estimate_seed_logic(data, tenant_uuid=tenant, **options))
+
+
+def _megabytes(size: int) -> str:
+    return f'{size / 1024 / 1024:.1f}'
+
+
+def _echo_estimate(estimate: 'SeedEstimate'):
+    click.echo(f'{"table":<28} {"rows":>9} {"data [MB]":>10} {"SQL [MB]":>9}')
+    for table in estimate.tables:
+        click.echo(f'{table.table:<28} {table.rows:>9} {_megabytes(table.data_bytes):>10} '
+                   f'{_megabytes(table.sql_bytes):>9}')
+    click.echo(f'{"total":<28} {estimate.rows:>9} '
+               f'{_megabytes(sum(table.data_bytes for table in estimate.tables)):>10} '
+               f'{_megabytes(estimate.sql_bytes):>9}')
+    click.echo(f'S3 objects: {estimate.s3_objects} ({_megabytes(estimate.s3_bytes)} MB), '
+               f'{estimate.missing_objects} missing')
+    click.echo(f'Entities not found: {estimate.missing_entities}')
+    click.echo(f'Expected time: {estimate.expected_seconds:.1f}s '
+               f'(planning {estimate.plan_seconds:.1f}s, SQL {estimate.sql_seconds:.1f}s, '
+               f'S3 {estimate.s3_seconds:.1f}s)')
+
+
+def _make_tenant_seeds(tenants: list[str], workers: int | None, **options):
+    # pylint: disable-next=import-outside-toplevel
+    from .logic import TenantExportOptions, process_tenants
+    results = process_tenants(tenants, TenantExportOptions(**options), workers=workers)
+    _echo_tenant_results(results)
+
+
+def _tenant_list(tenants, tenants_file) -> list[str]:
+    result = list(tenants)
+    if tenants_file is not None:
+        result.extend(line.strip() for line in tenants_file if line.strip())
+    for tenant in result:
+        try:
+            uuid.UUID(tenant)
+        except ValueError as e:
+            raise click.BadParameter(f'Invalid tenant UUID: {tenant}',
+                                     param_hint='--tenant') from e
+    return list(dict.fromkeys(result))
+
+
+def _echo_tenant_results(results: list['TenantExportResult']):
+    for result in results:
+        if result.error is None:
+            click.echo(f'{result.tenant_uuid}: {result.entities} entities, '
+                       f'{result.objects} S3 objects in {result.duration:.1f}s '
+                       f'-> {result.package}')
+        else:
+            click.echo(f'{result.tenant_uuid}: failed ({result.error})', err=True)
+    failed = sum(1 for result in results if result.error is not None)
+    if failed > 0:
+        raise click.ClickException(f'Export failed for {failed} of {len(results)} tenants')
@@ -1,4 +1,7 @@
-from .db import Database, DatabaseConnection
+from .db import AsyncDatabase, Database, DatabaseConnection, DatabasePool, PoolOptions
 from .s3 import S3Storage
 
-__all__ = ['Database', 'DatabaseConnection', 'S3Storage']
+__all__ = [
+    'AsyncDatabase', 'Database', 'DatabaseConnection', 'DatabasePool', 'PoolOptions',
+    'S3Storage',
+]
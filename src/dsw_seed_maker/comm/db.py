@@ -1,11 +1,24 @@
+import contextlib
+import copy
+import dataclasses
+import itertools
 import logging
+import random
+import re
+import threading
+import time
+from typing import Any, Iterator
+
 import psycopg
 import psycopg.connection
 import psycopg.conninfo
 import psycopg.rows
 import psycopg.types.json
+import psycopg_pool
+from psycopg import sql
 import tenacity
 
+from ..metrics import DB_QUERY_SECONDS, DB_ROWS, count_retry
 
 LOG = logging.getLogger(__name__)
 
@@ -15,37 +28,239 @@ RETRY_QUERY_TRIES = 3
 RETRY_CONNECT_MULTIPLIER = 0.2
 RETRY_CONNECT_TRIES = 10
 
+POOL_OPEN_TIMEOUT = 5.0
+
+SNAPSHOT_ISOLATION = 'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY'
+
+ITERATE_FETCH_SIZE = 1000
+
+_CURSOR_IDS = itertools.count()
+
+SLOW_QUERY_PARAMS_LENGTH = 200
+REPORT_QUERY_LENGTH = 120
+# string and numeric literals, queries differing only in them share a shape
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_READ_QUERY = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+
 
 def wrap_json_data(data: dict):
     return psycopg.types.json.Json(data)
 
 
+@dataclasses.dataclass
+class PoolOptions:
+    min_size: int
+    max_size: int
+    max_idle: float
+    max_lifetime: float
+
+
+def query_text(query: psycopg.connection.Query) -> str:
+    if isinstance(query, sql.Composable):
+        return query.as_string(None)
+    if isinstance(query, bytes):
+        return query.decode('utf-8')
+    return str(query)
+
+
+def query_shape(text: str) -> str:
+    return ' '.join(_LITERALS.sub('?', text).split())
+
+
+def explain_query(query: psycopg.connection.Query) -> sql.Composed:
+    return sql.SQL('EXPLAIN (ANALYZE, BUFFERS) {query}').format(
+        query=query if isinstance(query, sql.Composable) else sql.SQL(query_text(query)),
+    )
+
+
+@dataclasses.dataclass
+class QueryStats:
+    calls: int = 0
+    slow_calls: int = 0
+    rows: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+
+class QueryProfiler:
+    # Collects timings per query shape, logs statements slower than the threshold
+    # and asks for EXPLAIN (ANALYZE, BUFFERS) of a sample of them (once per shape)
+
+    def __init__(self, slow_threshold: float, explain_sample_rate: float = 0.0):
+        self.slow_threshold = slow_threshold
+        self.explain_sample_rate = explain_sample_rate
+        self.plans: dict[str, str] = {}
+        self._stats: dict[str, QueryStats] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    def record(self, query: psycopg.connection.Query, params: dict[str, Any],
+               duration: float, rows: int) -> bool:
+        # returns whether the caller should capture the query plan
+        text = query_text(query)
+        shape = query_shape(text)
+        slow = duration >= self.slow_threshold
+        with self._lock:
+            stats = self._stats.setdefault(shape, QueryStats())
+            stats.calls += 1
+            stats.rows += rows
+            stats.total_time += duration
+            stats.max_time = max(stats.max_time, duration)
+            if not slow:
+                return False
+            stats.slow_calls += 1
+            # EXPLAIN ANALYZE executes the statement again, only reads are explained
+            explain = shape not in self.plans \
+                and _READ_QUERY.match(text) is not None \
+                and self._random.random() < self.explain_sample_rate
+        params_repr = repr(params)
+        if len(params_repr) > SLOW_QUERY_PARAMS_LENGTH:
+            params_repr = params_repr[:SLOW_QUERY_PARAMS_LENGTH] + '...'
+        LOG.warning('Slow query (%.3fs, %d rows): %s; params: %s',
+                    duration, rows, text, params_repr)
+        return explain
+
+    def record_plan(self, query: psycopg.connection.Query, plan: str):
+        shape = query_shape(query_text(query))
+        with self._lock:
+            self.plans[shape] = plan
+        LOG.info('Query plan of %s:\n%s', shape, plan)
+
+    def snapshot(self) -> dict[str, QueryStats]:
+        with self._lock:
+            return {shape: dataclasses.replace(stats) for shape, stats in self._stats.items()}
+
+    def report(self, since: dict[str, QueryStats] | None = None) -> str:
+        # query shapes ranked by total time, recorded since the given snapshot
+        since = since or {}
+        ranked = []
+        for shape, stats in self.snapshot().items():
+            before = since.get(shape, QueryStats())
+            delta = QueryStats(
+                calls=stats.calls - before.calls,
+                slow_calls=stats.slow_calls - before.slow_calls,
+                rows=stats.rows - before.rows,
+                total_time=stats.total_time - before.total_time,
+                max_time=stats.max_time,
+            )
+            if delta.calls > 0:
+                ranked.append((shape, delta))
+        ranked.sort(key=lambda item: item[1].total_time, reverse=True)
+        lines = [
+            f'Queries: {sum(stats.calls for _, stats in ranked)}, '
+            f'total time: {sum(stats.total_time for _, stats in ranked):.3f}s, '
+            f'slow threshold: {self.slow_threshold:.3f}s',
+            '',
+            f'{"total [s]":>10} {"calls":>7} {"slow":>5} {"mean [ms]":>10} '
+            f'{"max [ms]":>10} {"rows":>9}  query',
+        ]
+        for shape, stats in ranked:
+            query = shape if len(shape) <= REPORT_QUERY_LENGTH \
+                else shape[:REPORT_QUERY_LENGTH] + '...'
+            lines.append(
+                f'{stats.total_time:>10.3f} {stats.calls:>7} {stats.slow_calls:>5} '
+                f'{stats.total_time / stats.calls * 1000:>10.1f} '
+                f'{stats.max_time * 1000:>10.1f} {stats.rows:>9}  {query}'
+            )
+        for shape, _ in ranked:
+            if shape in self.plans:
+                lines.extend(['', f'EXPLAIN (ANALYZE, BUFFERS) {shape}', self.plans[shape]])
+        return '\n'.join(lines) + '\n'
+
+
 class Database:
 
     def __init__(self, name: str, dsn: str, timeout: int = 30000,
-                 autocommit: bool = False):
-        self._db = DatabaseConnection(
-            name=name,
-            dsn=dsn,
-            timeout=timeout,
-            autocommit=autocommit,
-        )
+                 autocommit: bool = False, pool: PoolOptions | None = None):
+        self._db: DatabaseConnection | DatabasePool
+        if pool is None:
+            self._db = DatabaseConnection(
+                name=name,
+                dsn=dsn,
+                timeout=timeout,
+                autocommit=autocommit,
+            )
+        else:
+            self._db = DatabasePool(
+                name=name,
+                dsn=dsn,
+                timeout=timeout,
+                autocommit=autocommit,
+                options=pool,
+            )
         self._db.connect()
+        self.profiler: QueryProfiler | None = None
+        self._snapshot_id: str | None = None
 
     def __str__(self):
         return f'DB[{self._db.name}]'
 
+    @contextlib.contextmanager
+    def snapshot(self) -> Iterator['Database']:
+        # Yields a view of the database sharing the pool whose queries (from any
+        # thread) import the same exported snapshot, i.e., see one point in time
+        if not isinstance(self._db, DatabasePool):
+            raise RuntimeError('Exporting DB snapshots requires a connection pool')
+        with self._db.export_snapshot() as snapshot_id:
+            view = copy.copy(self)
+            view._snapshot_id = snapshot_id  # pylint: disable=protected-access
+            yield view
+
+    def _cursor(self, name: str = ''):
+        if self._snapshot_id is None:
+            return self._db.cursor(use_dict=True, name=name)
+        assert isinstance(self._db, DatabasePool)
+        return self._db.snapshot_cursor(self._snapshot_id, use_dict=True, name=name)
+
     @tenacity.retry(
         reraise=True,
         wait=tenacity.wait_exponential(multiplier=RETRY_QUERY_MULTIPLIER),
         stop=tenacity.stop_after_attempt(RETRY_QUERY_TRIES),
         before=tenacity.before_log(LOG, logging.DEBUG),
         after=tenacity.after_log(LOG, logging.DEBUG),
+        before_sleep=count_retry('db.query'),
     )
     def execute_query(self, query: psycopg.connection.Query, **kwargs):
-        with self._db.new_cursor(use_dict=True) as cursor:
+        start = time.perf_counter()
+        with self._cursor() as cursor:
+            cursor.execute(query=query, params=kwargs)
+            rows = cursor.fetchall()
+        self._observe('fetch', query, kwargs, time.perf_counter() - start, len(rows))
+        return rows
+
+    def iterate_query(self, query: psycopg.connection.Query,
+                      fetch_size: int = ITERATE_FETCH_SIZE, **kwargs) -> Iterator[dict]:
+        # Server-side (named) cursor, rows are fetched from the DB in chunks
+        # (duration includes the time the caller spends on the rows, the query
+        # is observed only once it has been iterated completely)
+        cursor_name = f'dsw_seed_maker_{next(_CURSOR_IDS)}'
+        start = time.perf_counter()
+        rows = 0
+        with self._cursor(name=cursor_name) as cursor:
+            cursor.itersize = fetch_size
             cursor.execute(query=query, params=kwargs)
-            return cursor.fetchall()
+            for row in cursor:
+                rows += 1
+                yield row
+        self._observe('iterate', query, kwargs, time.perf_counter() - start, rows)
+
+    def _observe(self, mode: str, query: psycopg.connection.Query, params: dict[str, Any],
+                 duration: float, rows: int):
+        DB_QUERY_SECONDS.labels(mode=mode).observe(duration)
+        DB_ROWS.labels(mode=mode).inc(rows)
+        if self.profiler is None or not self.profiler.record(query, params, duration, rows):
+            return
+        try:
+            with self._db.cursor() as cursor:
+                cursor.execute(query=explain_query(query), params=params)
+                plan = '\n'.join(str(row[0]) for row in cursor.fetchall())
+        except psycopg.Error as e:
+            LOG.warning('Failed to explain query: %s', e)
+            return
+        self.profiler.record_plan(query, plan)
+
+    def close(self):
+        self._db.close()
 
 
 class DatabaseConnection:
@@ -65,6 +280,7 @@ class DatabaseConnection:
         stop=tenacity.stop_after_attempt(RETRY_CONNECT_TRIES),
         before=tenacity.before_log(LOG, logging.DEBUG),
         after=tenacity.after_log(LOG, logging.DEBUG),
+        before_sleep=count_retry('db.connect'),
     )
     def _connect_db(self):
         LOG.info('Creating connection to PostgreSQL database "%s"', self.name)
@@ -96,11 +312,17 @@ class DatabaseConnection:
         self.connect()
         return self._connection
 
-    def new_cursor(self, use_dict: bool = False):
+    def new_cursor(self, use_dict: bool = False, name: str = ''):
         return self.connection.cursor(
+            name=name,
             row_factory=psycopg.rows.dict_row if use_dict else psycopg.rows.tuple_row,
         )
 
+    @contextlib.contextmanager
+    def cursor(self, use_dict: bool = False, name: str = ''):
+        with self.new_cursor(use_dict=use_dict, name=name) as cursor:
+            yield cursor
+
     def reset(self):
         self.close()
         self.connect()
@@ -110,3 +332,193 @@ class DatabaseConnection:
             LOG.info('Closing connection to PostgreSQL database "%s"', self.name)
             self._connection.close()
         self._connection = None
+
+
+class DatabasePool:
+
+    def __init__(self, name: str, dsn: str, timeout: int, autocommit: bool,
+                 options: PoolOptions):
+        self.name = name
+        self.dsn = psycopg.conninfo.make_conninfo(
+            conninfo=dsn,
+            connect_timeout=timeout,
+        )
+        self.autocommit = autocommit
+        self.options = options
+        self._pool: psycopg_pool.ConnectionPool | None = None
+
+    @tenacity.retry(
+        reraise=True,
+        wait=tenacity.wait_exponential(multiplier=RETRY_CONNECT_MULTIPLIER),
+        stop=tenacity.stop_after_attempt(RETRY_CONNECT_TRIES),
+        before=tenacity.before_log(LOG, logging.DEBUG),
+        after=tenacity.after_log(LOG, logging.DEBUG),
+        before_sleep=count_retry('db.connect'),
+    )
+    def _open_pool(self):
+        LOG.info('Creating connection pool (%d-%d) to PostgreSQL database "%s"',
+                 self.options.min_size, self.options.max_size, self.name)
+        pool = psycopg_pool.ConnectionPool(
+            conninfo=self.dsn,
+            kwargs={'autocommit': self.autocommit},
+            min_size=self.options.min_size,
+            max_size=max(self.options.min_size, self.options.max_size),
+            max_idle=self.options.max_idle,
+            max_lifetime=self.options.max_lifetime,
+            check=psycopg_pool.ConnectionPool.check_connection,
+            name=self.name,
+            open=False,
+        )
+        try:
+            pool.open(wait=True, timeout=POOL_OPEN_TIMEOUT)
+        except Exception as e:
+            LOG.error('Failed to connect to PostgreSQL database "%s": %s', self.name, e)
+            pool.close()
+            raise e
+        self._pool = pool
+
+    def connect(self):
+        if not self._pool or self._pool.closed:
+            self._open_pool()
+
+    @property
+    def pool(self) -> psycopg_pool.ConnectionPool:
+        self.connect()
+        assert self._pool is not None
+        return self._pool
+
+    @contextlib.contextmanager
+    def cursor(self, use_dict: bool = False, name: str = ''):
+        with self.pool.connection() as connection:
+            with connection.cursor(
+                name=name,
+                row_factory=psycopg.rows.dict_row if use_dict else psycopg.rows.tuple_row,
+            ) as cursor:
+                yield cursor
+
+    @contextlib.contextmanager
+    def export_snapshot(self) -> Iterator[str]:
+        # the exporting transaction stays open (holding a pooled connection) until
+        # the block ends, other transactions can import the snapshot only meanwhile
+        with self.pool.connection() as connection:
+            with connection.transaction():
+                connection.execute(SNAPSHOT_ISOLATION)
+                row = connection.execute('SELECT pg_export_snapshot()').fetchone()
+                if row is None:
+                    raise RuntimeError('Failed to export DB snapshot')
+                LOG.debug('Exported DB snapshot %s', row[0])
+                yield row[0]
+
+    @contextlib.contextmanager
+    def snapshot_cursor(self, snapshot_id: str, use_dict: bool = False, name: str = ''):
+        with self.pool.connection() as connection:
+            with connection.transaction():
+                connection.execute(SNAPSHOT_ISOLATION)
+                connection.execute(sql.SQL('SET TRANSACTION SNAPSHOT {}').format(
+                    sql.Literal(snapshot_id),
+                ))
+                with connection.cursor(
+                    name=name,
+                    row_factory=psycopg.rows.dict_row if use_dict else psycopg.rows.tuple_row,
+                ) as cursor:
+                    yield cursor
+
+    def close(self):
+        if self._pool:
+            LOG.info('Closing connection pool to PostgreSQL database "%s"', self.name)
+            self._pool.close()
+        self._pool = None
+
+
+class AsyncDatabase:
+
+    def __init__(self, name: str, dsn: str, pool: PoolOptions, timeout: int = 30000,
+                 autocommit: bool = False):
+        self.name = name
+        self.dsn = psycopg.conninfo.make_conninfo(
+            conninfo=dsn,
+            connect_timeout=timeout,
+        )
+        self.autocommit = autocommit
+        self.options = pool
+        self.profiler: QueryProfiler | None = None
+        self._pool: psycopg_pool.AsyncConnectionPool | None = None
+
+    def __str__(self):
+        return f'AsyncDB[{self.name}]'
+
+    @tenacity.retry(
+        reraise=True,
+        wait=tenacity.wait_exponential(multiplier=RETRY_CONNECT_MULTIPLIER),
+        stop=tenacity.stop_after_attempt(RETRY_CONNECT_TRIES),
+        before=tenacity.before_log(LOG, logging.DEBUG),
+        after=tenacity.after_log(LOG, logging.DEBUG),
+        before_sleep=count_retry('db.connect'),
+    )
+    async def _open_pool(self):
+        LOG.info('Creating async connection pool (%d-%d) to PostgreSQL database "%s"',
+                 self.options.min_size, self.options.max_size, self.name)
+        pool = psycopg_pool.AsyncConnectionPool(
+            conninfo=self.dsn,
+            kwargs={'autocommit': self.autocommit},
+            min_size=self.options.min_size,
+            max_size=max(self.options.min_size, self.options.max_size),
+            max_idle=self.options.max_idle,
+            max_lifetime=self.options.max_lifetime,
+            check=psycopg_pool.AsyncConnectionPool.check_connection,
+            name=self.name,
+            open=False,
+        )
+        try:
+            await pool.open(wait=True, timeout=POOL_OPEN_TIMEOUT)
+        except Exception as e:
+            LOG.error('Failed to connect to PostgreSQL database "%s": %s', self.name, e)
+            await pool.close()
+            raise e
+        self._pool = pool
+
+    async def connect(self):
+        if not self._pool or self._pool.closed:
+            await self._open_pool()
+
+    @tenacity.retry(
+        reraise=True,
+        wait=tenacity.wait_exponential(multiplier=RETRY_QUERY_MULTIPLIER),
+        stop=tenacity.stop_after_attempt(RETRY_QUERY_TRIES),
+        before=tenacity.before_log(LOG, logging.DEBUG),
+        after=tenacity.after_log(LOG, logging.DEBUG),
+        before_sleep=count_retry('db.query'),
+    )
+    async def execute_query(self, query: psycopg.connection.Query, **kwargs):
+        await self.connect()
+        assert self._pool is not None
+        start = time.perf_counter()
+        async with self._pool.connection() as connection:
+            async with connection.cursor(row_factory=psycopg.rows.dict_row) as cursor:
+                await cursor.execute(query=query, params=kwargs)
+                rows = await cursor.fetchall()
+        await self._observe(query, kwargs, time.perf_counter() - start, len(rows))
+        return rows
+
+    async def _observe(self, query: psycopg.connection.Query, params: dict[str, Any],
+                       duration: float, rows: int):
+        DB_QUERY_SECONDS.labels(mode='async').observe(duration)
+        DB_ROWS.labels(mode='async').inc(rows)
+        if self.profiler is None or not self.profiler.record(query, params, duration, rows):
+            return
+        assert self._pool is not None
+        try:
+            async with self._pool.connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(query=explain_query(query), params=params)
+                    plan = '\n'.join(str(row[0]) for row in await cursor.fetchall())
+        except psycopg.Error as e:
+            LOG.warning('Failed to explain query: %s', e)
+            return
+        self.profiler.record_plan(query, plan)
+
+    async def close(self):
+        if self._pool:
+            LOG.info('Closing async connection pool to PostgreSQL database "%s"', self.name)
+            await self._pool.close()
+        self._pool = None
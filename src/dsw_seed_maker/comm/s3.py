@@ -7,6 +7,9 @@ import tempfile
 import minio
 import minio.error
 import tenacity
+import urllib3
+
+from ..metrics import S3_BYTES, S3_DOWNLOADS, S3_DOWNLOAD_SECONDS, count_retry
 
 LOG = logging.getLogger(__name__)
 
@@ -51,12 +54,18 @@ class S3Storage:
     def __str__(self):
         return f'{self._url}/{self._bucket}'
 
+    def object_key(self, tenant_uuid: str, object_name: str) -> str:
+        if self.multi_tenant:
+            return f'{tenant_uuid}/{object_name}'
+        return object_name
+
     @tenacity.retry(
         reraise=True,
         wait=tenacity.wait_exponential(multiplier=RETRY_S3_MULTIPLIER),
         stop=tenacity.stop_after_attempt(RETRY_S3_TRIES),
         before=tenacity.before_log(LOG, logging.DEBUG),
         after=tenacity.after_log(LOG, logging.DEBUG),
+        before_sleep=count_retry('s3.bucket'),
     )
     def ensure_bucket(self):
         found = self.client.bucket_exists(self._bucket)
@@ -69,19 +78,71 @@ class S3Storage:
         stop=tenacity.stop_after_attempt(RETRY_S3_TRIES),
         before=tenacity.before_log(LOG, logging.DEBUG),
         after=tenacity.after_log(LOG, logging.DEBUG),
+        before_sleep=count_retry('s3.download'),
     )
     def download_file(self, file_name: str, target_path: pathlib.Path) -> bool:
         try:
-            self.client.fget_object(
+            with S3_DOWNLOAD_SECONDS.labels(operation='file').time():
+                self.client.fget_object(
+                    bucket_name=self._bucket,
+                    object_name=file_name,
+                    file_path=str(target_path),
+                )
+        except minio.error.S3Error as e:
+            if e.code != 'NoSuchKey':
+                raise e
+            S3_DOWNLOADS.labels(result='missing').inc()
+            return False
+        S3_DOWNLOADS.labels(result='ok').inc()
+        S3_BYTES.inc(target_path.stat().st_size)
+        return True
+
+    @tenacity.retry(
+        reraise=True,
+        wait=tenacity.wait_exponential(multiplier=RETRY_S3_MULTIPLIER),
+        stop=tenacity.stop_after_attempt(RETRY_S3_TRIES),
+        before=tenacity.before_log(LOG, logging.DEBUG),
+        after=tenacity.after_log(LOG, logging.DEBUG),
+        before_sleep=count_retry('s3.stat'),
+    )
+    def stat_object(self, file_name: str) -> tuple[str, int] | None:
+        # ETag and size of the object, None if it does not exist
+        try:
+            stat = self.client.stat_object(
                 bucket_name=self._bucket,
                 object_name=file_name,
-                file_path=str(target_path),
             )
         except minio.error.S3Error as e:
             if e.code != 'NoSuchKey':
                 raise e
-            return False
-        return True
+            return None
+        return stat.etag or '', stat.size or 0
+
+    @tenacity.retry(
+        reraise=True,
+        wait=tenacity.wait_exponential(multiplier=RETRY_S3_MULTIPLIER),
+        stop=tenacity.stop_after_attempt(RETRY_S3_TRIES),
+        before=tenacity.before_log(LOG, logging.DEBUG),
+        after=tenacity.after_log(LOG, logging.DEBUG),
+        before_sleep=count_retry('s3.download'),
+    )
+    def open_object(self, file_name: str) -> tuple[urllib3.BaseHTTPResponse, int] | None:
+        # caller streams the response and has to close it and release the connection
+        try:
+            with S3_DOWNLOAD_SECONDS.labels(operation='stream').time():
+                response = self.client.get_object(
+                    bucket_name=self._bucket,
+                    object_name=file_name,
+                )
+        except minio.error.S3Error as e:
+            if e.code != 'NoSuchKey':
+                raise e
+            S3_DOWNLOADS.labels(result='missing').inc()
+            return None
+        size = int(response.headers['Content-Length'])
+        S3_DOWNLOADS.labels(result='ok').inc()
+        S3_BYTES.inc(size)
+        return response, size
 
     @tenacity.retry(
         reraise=True,
@@ -89,16 +150,15 @@ class S3Storage:
         stop=tenacity.stop_after_attempt(RETRY_S3_TRIES),
         before=tenacity.before_log(LOG, logging.DEBUG),
         after=tenacity.after_log(LOG, logging.DEBUG),
+        before_sleep=count_retry('s3.store'),
     )
     def store_object(self, tenant_uuid: str, object_name: str,
                      content_type: str, data: bytes,
                      metadata: dict | None = None):
-        if self.multi_tenant:
-            object_name = f'{tenant_uuid}/{object_name}'
         with io.BytesIO(data) as file:
             self.client.put_object(
                 bucket_name=self._bucket,
-                object_name=object_name,
+                object_name=self.object_key(tenant_uuid, object_name),
                 data=file,
                 length=len(data),
                 content_type=content_type,
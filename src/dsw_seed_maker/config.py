@@ -3,7 +3,16 @@ import os
 import pathlib
 import dotenv
 
-from .consts import DEFAULT_LOG_FORMAT, DEFAULT_LOG_LEVEL
+from .consts import DEFAULT_LOG_FORMAT, DEFAULT_LOG_LEVEL, DEFAULT_DB_FETCH_SIZE, \
+    DEFAULT_DB_POOL_MIN_SIZE, DEFAULT_DB_POOL_MAX_SIZE, \
+    DEFAULT_DB_POOL_MAX_IDLE, DEFAULT_DB_POOL_MAX_LIFETIME, \
+    DEFAULT_FETCH_BATCH_SIZE, DEFAULT_FETCH_CONCURRENCY, DEFAULT_DOWNLOAD_CONCURRENCY, \
+    DEFAULT_LISTING_CACHE_SIZE, DEFAULT_LISTING_CACHE_TTLS, DEFAULT_S3_CACHE_SIZE, \
+    DEFAULT_S3_CACHE_DIR, DEFAULT_DB_SLOW_QUERY_MS, DEFAULT_DB_EXPLAIN_SAMPLE_RATE, \
+    DEFAULT_SEED_JOBS_DIR, DEFAULT_SEED_JOBS_WORKERS, DEFAULT_SEED_JOBS_PER_USER, \
+    DEFAULT_SEED_JOBS_MAX, \
+    DEFAULT_SEED_JOBS_TTL, DEFAULT_ESTIMATE_SQL_RATE, DEFAULT_ESTIMATE_S3_RATE, \
+    DEFAULT_DOCUMENT_MAX_SIZE, DEFAULT_DOCUMENTS_MAX_TOTAL, DEFAULT_TENANT_WORKERS
 
 LOG = logging.getLogger(__name__)
 
@@ -12,6 +21,9 @@ DOTENV_PATH = pathlib.Path(__file__).parent / '.env'  # Ensure the correct path
 if DOTENV_PATH.exists():
     dotenv.load_dotenv(DOTENV_PATH)
     LOG.debug('Loaded environment variables from %s', DOTENV_PATH)
+elif dotenv.load_dotenv():
+    # .env found in a parent directory, e.g., the repository root during development
+    LOG.debug('Loaded environment variables from %s', dotenv.find_dotenv())
 else:
     LOG.warning('No .env file found at %s', DOTENV_PATH)
 
@@ -19,12 +31,69 @@ else:
 class Config:
     API_ROOT_PATH = os.getenv('API_ROOT_PATH', '')
     DSW_DB_CONN_STR = os.getenv('DSW_DB_CONN_STR')
+    DSW_DB_CONN_NAME = os.getenv('DSW_DB_CONN_NAME', 'dsw')
+    DSW_DB_FETCH_SIZE = int(os.getenv('DSW_DB_FETCH_SIZE', str(DEFAULT_DB_FETCH_SIZE)))
+    DSW_DB_POOL_MIN_SIZE = int(os.getenv('DSW_DB_POOL_MIN_SIZE', str(DEFAULT_DB_POOL_MIN_SIZE)))
+    DSW_DB_POOL_MAX_SIZE = int(os.getenv('DSW_DB_POOL_MAX_SIZE', str(DEFAULT_DB_POOL_MAX_SIZE)))
+    DSW_DB_POOL_MAX_IDLE = float(os.getenv('DSW_DB_POOL_MAX_IDLE',
+                                           str(DEFAULT_DB_POOL_MAX_IDLE)))
+    DSW_DB_POOL_MAX_LIFETIME = float(os.getenv('DSW_DB_POOL_MAX_LIFETIME',
+                                               str(DEFAULT_DB_POOL_MAX_LIFETIME)))
+    # query profiling: slow statements are logged, a sample of them is explained
+    DSW_DB_PROFILE = os.getenv('DSW_DB_PROFILE', 'false').lower() in ('1', 'true', 'yes')
+    DSW_DB_SLOW_QUERY_MS = float(os.getenv('DSW_DB_SLOW_QUERY_MS',
+                                           str(DEFAULT_DB_SLOW_QUERY_MS)))
+    DSW_DB_EXPLAIN_SAMPLE_RATE = float(os.getenv('DSW_DB_EXPLAIN_SAMPLE_RATE',
+                                                 str(DEFAULT_DB_EXPLAIN_SAMPLE_RATE)))
     DSW_S3_URL = os.getenv('DSW_S3_URL')
     DSW_S3_USERNAME = os.getenv('DSW_S3_USERNAME')
     DSW_S3_PASSWORD = os.getenv('DSW_S3_PASSWORD')
     DSW_S3_BUCKET = os.getenv('DSW_S3_BUCKET')
     DSW_S3_REGION = os.getenv('DSW_S3_REGION', 'eu-central-1')
 
+    SEED_FETCH_BATCH_SIZE = int(os.getenv('SEED_FETCH_BATCH_SIZE', str(DEFAULT_FETCH_BATCH_SIZE)))
+    # each export holds a snapshot connection plus this many, see check()
+    SEED_FETCH_CONCURRENCY = int(os.getenv('SEED_FETCH_CONCURRENCY',
+                                           str(DEFAULT_FETCH_CONCURRENCY)))
+    SEED_DOWNLOAD_CONCURRENCY = int(os.getenv('SEED_DOWNLOAD_CONCURRENCY',
+                                              str(DEFAULT_DOWNLOAD_CONCURRENCY)))
+    # local cache of downloaded S3 objects shared by all runs, size 0 disables it
+    SEED_S3_CACHE_DIR = pathlib.Path(
+        os.getenv('SEED_S3_CACHE_DIR', DEFAULT_S3_CACHE_DIR)
+    ).expanduser()
+    SEED_S3_CACHE_SIZE = int(os.getenv('SEED_S3_CACHE_SIZE', str(DEFAULT_S3_CACHE_SIZE)))
+    # size limits (bytes) of rendered document files in a package, 0 for no limit
+    SEED_DOCUMENT_MAX_SIZE = int(os.getenv('SEED_DOCUMENT_MAX_SIZE',
+                                           str(DEFAULT_DOCUMENT_MAX_SIZE)))
+    SEED_DOCUMENTS_MAX_TOTAL = int(os.getenv('SEED_DOCUMENTS_MAX_TOTAL',
+                                             str(DEFAULT_DOCUMENTS_MAX_TOTAL)))
+    # throughput (bytes per second) assumed when estimating the time of an export
+    SEED_ESTIMATE_SQL_RATE = float(os.getenv('SEED_ESTIMATE_SQL_RATE',
+                                             str(DEFAULT_ESTIMATE_SQL_RATE)))
+    SEED_ESTIMATE_S3_RATE = float(os.getenv('SEED_ESTIMATE_S3_RATE',
+                                            str(DEFAULT_ESTIMATE_S3_RATE)))
+    # default of make-seed --workers; a worker pool holds SEED_FETCH_CONCURRENCY + 1
+    # connections, so all workers together must fit into max_connections of PostgreSQL
+    SEED_TENANT_WORKERS = int(os.getenv('SEED_TENANT_WORKERS', str(DEFAULT_TENANT_WORKERS)))
+    # seed packages built by the API in background jobs
+    SEED_JOBS_DIR = pathlib.Path(os.getenv('SEED_JOBS_DIR', DEFAULT_SEED_JOBS_DIR)).expanduser()
+    SEED_JOBS_WORKERS = int(os.getenv('SEED_JOBS_WORKERS', str(DEFAULT_SEED_JOBS_WORKERS)))
+    SEED_JOBS_PER_USER = int(os.getenv('SEED_JOBS_PER_USER', str(DEFAULT_SEED_JOBS_PER_USER)))
+    SEED_JOBS_MAX = int(os.getenv('SEED_JOBS_MAX', str(DEFAULT_SEED_JOBS_MAX)))
+    # enable only behind an authenticating proxy that sets (and overrides) X-Forwarded-User,
+    # jobs are owned by the client address otherwise
+    SEED_JOBS_TRUST_USER_HEADER = os.getenv(
+        'SEED_JOBS_TRUST_USER_HEADER', 'false',
+    ).lower() in ('1', 'true', 'yes')
+    SEED_JOBS_TTL = float(os.getenv('SEED_JOBS_TTL', str(DEFAULT_SEED_JOBS_TTL)))
+
+    LISTING_CACHE_SIZE = int(os.getenv('LISTING_CACHE_SIZE', str(DEFAULT_LISTING_CACHE_SIZE)))
+    # e.g. LISTING_CACHE_TTL_USERS=600, 0 disables caching of the resource type
+    LISTING_CACHE_TTLS = {
+        resource_type: float(os.getenv(f'LISTING_CACHE_TTL_{resource_type.upper()}', str(ttl)))
+        for resource_type, ttl in DEFAULT_LISTING_CACHE_TTLS.items()
+    }
+
     LOG_LEVEL = os.getenv('LOG_LEVEL', DEFAULT_LOG_LEVEL)
     LOG_FORMAT = os.getenv('LOG_FORMAT', DEFAULT_LOG_FORMAT)
 
@@ -40,6 +109,13 @@ class Config:
             raise ValueError('DSW_S3_PASSWORD env variable is missing or empty!')
         if cls.DSW_S3_BUCKET == '':
             raise ValueError('DSW_S3_BUCKET env variable is missing or empty!')
+        # concurrent jobs would otherwise wait for pooled connections until PoolTimeout
+        required = cls.SEED_JOBS_WORKERS * (cls.SEED_FETCH_CONCURRENCY + 1)
+        if cls.DSW_DB_POOL_MAX_SIZE < required:
+            raise ValueError(
+                f'DSW_DB_POOL_MAX_SIZE ({cls.DSW_DB_POOL_MAX_SIZE}) must be at least '
+                f'SEED_JOBS_WORKERS * (SEED_FETCH_CONCURRENCY + 1) = {required}!'
+            )
 
     @classmethod
     def apply_logging(cls):
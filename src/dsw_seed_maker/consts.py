@@ -10,6 +10,50 @@ VERSION = '2024-11-03 21:36:44Z'
 DEFAULT_ENCODING = 'utf-8'
 DEFAULT_LOG_LEVEL = 'INFO'
 DEFAULT_LOG_FORMAT = '%(asctime)s | %(levelname)s | %(module)s: %(message)s'
+DEFAULT_FETCH_BATCH_SIZE = 1000
+# DB connections used by the planner at once (plus one holding the snapshot)
+DEFAULT_FETCH_CONCURRENCY = 4
+DEFAULT_ROWS_PER_STATEMENT = 100
+SQL_FORMAT_INSERT = 'insert'
+SQL_FORMAT_MULTI_INSERT = 'multi-insert'
+SQL_FORMATS = (SQL_FORMAT_INSERT, SQL_FORMAT_MULTI_INSERT)
+DEFAULT_LISTING_CACHE_SIZE = 256
+# seconds, rarely changing resources are cached longer
+DEFAULT_LISTING_CACHE_TTLS = {
+    'users': 300.0,
+    'project_importers': 300.0,
+    'knowledge_models': 300.0,
+    'locales': 300.0,
+    'document_templates': 300.0,
+    'projects': 30.0,
+    'documents': 30.0,
+}
+# minio keeps at most 10 pooled HTTP connections by default
+DEFAULT_DOWNLOAD_CONCURRENCY = 8
+DEFAULT_S3_CACHE_DIR = '~/.cache/dsw-seed-maker/s3'
+DEFAULT_S3_CACHE_SIZE = 1024 * 1024 * 1024
+# rendered documents larger than this (or over the total) are left out of the package
+DEFAULT_DOCUMENT_MAX_SIZE = 50 * 1024 * 1024
+DEFAULT_DOCUMENTS_MAX_TOTAL = 2 * 1024 * 1024 * 1024
+# bytes per second, expected time of dry runs (SQL fetched and written, S3 downloaded)
+DEFAULT_ESTIMATE_SQL_RATE = 5 * 1024 * 1024
+DEFAULT_ESTIMATE_S3_RATE = 50 * 1024 * 1024
+# worker processes exporting tenants, each with its own DB pool
+DEFAULT_TENANT_WORKERS = 4
+DEFAULT_SEED_JOBS_DIR = '~/.cache/dsw-seed-maker/jobs'
+DEFAULT_SEED_JOBS_WORKERS = 2
+DEFAULT_SEED_JOBS_PER_USER = 1
+# queued and running jobs of all users together
+DEFAULT_SEED_JOBS_MAX = 16
+# seconds finished jobs and their packages are kept
+DEFAULT_SEED_JOBS_TTL = 24 * 3600.0
+DEFAULT_DB_FETCH_SIZE = 1000
+DEFAULT_DB_POOL_MIN_SIZE = 1
+DEFAULT_DB_POOL_MAX_SIZE = 10
+DEFAULT_DB_POOL_MAX_IDLE = 600.0
+DEFAULT_DB_POOL_MAX_LIFETIME = 3600.0
+DEFAULT_DB_SLOW_QUERY_MS = 1000.0
+DEFAULT_DB_EXPLAIN_SAMPLE_RATE = 0.0
 
 
 BUILD_INFO = {
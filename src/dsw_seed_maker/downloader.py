@@ -0,0 +1,216 @@
+import concurrent.futures
+import dataclasses
+import logging
+import pathlib
+import threading
+from typing import IO, Callable, cast
+
+from .comm.s3 import S3Storage
+from .filecache import S3FileCache
+from .metrics import S3_DOWNLOADS
+from .package import SeedOutput
+from .planner import S3Object
+
+LOG = logging.getLogger(__name__)
+
+ProgressCallback = Callable[['DownloadReport', int, S3Object], None]
+
+
+@dataclasses.dataclass
+class DownloadReport:
+    downloaded: list[S3Object] = dataclasses.field(default_factory=list)
+    missing: list[S3Object] = dataclasses.field(default_factory=list)
+    failed: list[tuple[S3Object, Exception]] = dataclasses.field(default_factory=list)
+    # same ETag as in the previous manifest, not downloaded again
+    unchanged: list[S3Object] = dataclasses.field(default_factory=list)
+    # artifacts over the download limits, left out of the package
+    skipped: list[S3Object] = dataclasses.field(default_factory=list)
+    # object name -> ETag of downloaded and unchanged objects
+    etags: dict[str, str] = dataclasses.field(default_factory=dict)
+    bytes_downloaded: int = 0
+
+    @property
+    def processed(self) -> int:
+        return (len(self.downloaded) + len(self.missing) + len(self.failed)
+                + len(self.unchanged) + len(self.skipped))
+
+    @property
+    def ok(self) -> bool:
+        return len(self.missing) == 0 and len(self.failed) == 0
+
+
+@dataclasses.dataclass
+class DownloadLimits:
+    # bytes, None for no limit; apply to artifacts only
+    max_object_size: int | None = None
+    max_total_size: int | None = None
+
+
+class ObjectSkipped(Exception):
+    pass
+
+
+def log_progress(report: DownloadReport, total: int, s3_object: S3Object):
+    done = report.processed
+    LOG.debug('Processed S3 object %s', s3_object.object_name)
+    if done == total or done % max(1, total // 10) == 0:
+        LOG.info('Downloading S3 objects: %d/%d', done, total)
+
+
+class S3Downloader:  # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, s3: S3Storage, output: SeedOutput, concurrency: int,
+                 on_progress: ProgressCallback = log_progress,
+                 previous_etags: dict[str, str] | None = None,
+                 cache: S3FileCache | None = None, tenant_uuid: str | None = None,
+                 limits: DownloadLimits | None = None):
+        self.s3 = s3
+        self.output = output
+        self.concurrency = max(1, concurrency)
+        self.on_progress = on_progress
+        self.previous_etags = previous_etags or {}
+        self.cache = cache
+        self.tenant_uuid = tenant_uuid
+        self.limits = limits or DownloadLimits()
+        self._artifact_bytes = 0
+        self._lock = threading.Lock()
+
+    def download_all(self, s3_objects: list[S3Object]) -> DownloadReport:
+        report = DownloadReport()
+        if len(s3_objects) == 0:
+            return report
+        LOG.info('Downloading %d S3 objects (concurrency: %d)',
+                 len(s3_objects), self.concurrency)
+        self._artifact_bytes = 0
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            futures = {
+                executor.submit(self._download, s3_object): s3_object
+                for s3_object in s3_objects
+            }
+            for future in concurrent.futures.as_completed(futures):
+                s3_object = futures[future]
+                try:
+                    etag, size = future.result()
+                except ObjectSkipped as e:
+                    LOG.warning('Skipped S3 object %s: %s', s3_object.object_name, e)
+                    report.skipped.append(s3_object)
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    LOG.error('Failed to download S3 object %s: %s', s3_object.object_name, e)
+                    report.failed.append((s3_object, e))
+                else:
+                    self._record(report, s3_object, etag)
+                    report.bytes_downloaded += size
+                # progress callback may raise to abort, queued downloads are dropped
+                self.on_progress(report, len(s3_objects), s3_object)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if self.cache is not None:
+            self.cache.evict()
+        LOG.info('Downloaded %d S3 objects (%d unchanged, %d missing, %d failed, %d skipped)',
+                 len(report.downloaded), len(report.unchanged),
+                 len(report.missing), len(report.failed), len(report.skipped))
+        return report
+
+    def _record(self, report: DownloadReport, s3_object: S3Object, etag: str | None):
+        if etag is None:
+            LOG.warning('S3 object %s not found in bucket %s',
+                        s3_object.object_name, self.s3.bucket)
+            report.missing.append(s3_object)
+            return
+        report.etags[s3_object.object_name] = etag
+        if self.previous_etags.get(s3_object.object_name) == etag:
+            report.unchanged.append(s3_object)
+        else:
+            report.downloaded.append(s3_object)
+
+    def _key(self, s3_object: S3Object) -> str:
+        # objects of a tenant are prefixed in multi-tenant storage
+        if self.tenant_uuid is None:
+            return s3_object.object_name
+        return self.s3.object_key(self.tenant_uuid, s3_object.object_name)
+
+    def _reserve(self, size: int):
+        # artifacts are admitted as their downloads start until the total is used up
+        max_object_size = self.limits.max_object_size
+        if max_object_size is not None and size > max_object_size:
+            raise ObjectSkipped(f'{size} bytes is over the limit of {max_object_size} bytes')
+        with self._lock:
+            max_total_size = self.limits.max_total_size
+            if max_total_size is not None and self._artifact_bytes + size > max_total_size:
+                raise ObjectSkipped(f'total limit of {max_total_size} bytes reached')
+            self._artifact_bytes += size
+
+    def _release(self, size: int):
+        with self._lock:
+            self._artifact_bytes -= size
+
+    def _download(self, s3_object: S3Object) -> tuple[str | None, int]:
+        # returns ETag of the object (None if it does not exist) and bytes written
+        stat = self.s3.stat_object(self._key(s3_object))
+        if stat is None:
+            # objects vanishing after the stat are counted by the download itself
+            S3_DOWNLOADS.labels(result='missing').inc()
+            return None, 0
+        etag, size = stat
+        if self.previous_etags.get(s3_object.object_name) == etag:
+            return etag, 0
+        if not s3_object.artifact:
+            return self._fetch(s3_object, etag)
+        self._reserve(size)
+        released = True
+        try:
+            result = self._fetch(s3_object, etag)
+            released = result[0] is None
+            return result
+        finally:
+            # nothing was written, the reserved size is free for other artifacts
+            if released:
+                self._release(size)
+
+    def _fetch(self, s3_object: S3Object, etag: str) -> tuple[str | None, int]:
+        target_path = self.output.local_path(s3_object.target_path)
+        # archives are streamed past the cache, filling it would write every object twice
+        if self.cache is not None and target_path is not None:
+            return self._download_cached(self.cache, s3_object, etag, target_path)
+        return self._download_direct(s3_object, etag)
+
+    def _download_direct(self, s3_object: S3Object, etag: str) -> tuple[str | None, int]:
+        target_path = self.output.local_path(s3_object.target_path)
+        if target_path is not None:
+            if not self.s3.download_file(self._key(s3_object), target_path):
+                return None, 0
+            return etag, target_path.stat().st_size
+        # archives get the object piped in as it arrives
+        opened = self.s3.open_object(self._key(s3_object))
+        if opened is None:
+            return None, 0
+        response, size = opened
+        try:
+            self.output.write_stream(s3_object.target_path, cast(IO[bytes], response), size)
+        finally:
+            response.close()
+            response.release_conn()
+        return etag, size
+
+    def _download_cached(self, cache: S3FileCache, s3_object: S3Object, etag: str,
+                         target_path: pathlib.Path) -> tuple[str | None, int]:
+        def fetch() -> pathlib.Path | None:
+            return cache.fetch(
+                self.s3.bucket, self._key(s3_object), etag,
+                lambda path: self.s3.download_file(self._key(s3_object), path),
+            )
+
+        cached = fetch()
+        if cached is None:
+            return None, 0
+        try:
+            cache.link(cached, target_path)
+        except FileNotFoundError:
+            # evicted by another export before it was linked, fetched again once
+            LOG.debug('S3 object %s evicted from cache, fetching again', s3_object.object_name)
+            cached = fetch()
+            if cached is None:
+                return None, 0
+            cache.link(cached, target_path)
+        return etag, target_path.stat().st_size
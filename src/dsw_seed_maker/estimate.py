@@ -0,0 +1,153 @@
+import concurrent.futures
+import dataclasses
+import logging
+import math
+from typing import Iterable
+
+from psycopg import sql
+
+from .comm.s3 import S3Storage
+from .consts import DEFAULT_ROWS_PER_STATEMENT, SQL_FORMAT_INSERT, SQL_FORMAT_MULTI_INSERT
+from .planner import RESOURCES, S3_OBJECT_COLUMNS, S3Object, SeedPlan, SeedPlanner
+
+LOG = logging.getLogger(__name__)
+
+# size of the row as text (i.e., roughly what its values take in SQL), computed by the DB
+ROW_SIZE_COLUMN = '_seed_row_size'
+
+
+def _plan_columns() -> dict[str, tuple[str, ...]]:
+    # columns needed to resolve the dependency closure and S3 objects
+    columns: dict[str, list[str]] = {}
+    for spec in RESOURCES.values():
+        table_columns = columns.setdefault(spec.table, [spec.id_column])
+        table_columns.extend(column for column, _ in spec.dependencies)
+        if spec.chain_column is not None:
+            table_columns.extend((spec.chain_column, 'created_at'))
+        for child_table, fk_column in spec.children:
+            columns.setdefault(child_table, []).append(fk_column)
+    for table, s3_columns in S3_OBJECT_COLUMNS.items():
+        columns.setdefault(table, []).extend(s3_columns)
+    return {table: tuple(dict.fromkeys(names)) for table, names in columns.items()}
+
+
+PLAN_COLUMNS = _plan_columns()
+
+
+class EstimatingPlanner(SeedPlanner):
+    # Resolves the same closure as SeedPlanner, but fetches only the columns the
+    # resolution needs plus the size of each row (values stay in the database)
+
+    def _select_list(self, table: str, alias: str | None = None) -> sql.Composable:
+        row = sql.Identifier(alias or table)
+        columns: list[sql.Composable] = [
+            sql.Identifier(alias, column) if alias else sql.Identifier(column)
+            for column in PLAN_COLUMNS.get(table, ())
+        ]
+        columns.append(sql.SQL('octet_length({row}::text) AS {size}').format(
+            row=row,
+            size=sql.Identifier(ROW_SIZE_COLUMN),
+        ))
+        return sql.SQL(', ').join(columns)
+
+
+@dataclasses.dataclass
+class TableEstimate:
+    table: str
+    rows: int = 0
+    # text size of the rows in the database
+    data_bytes: int = 0
+    sql_bytes: int = 0
+
+
+@dataclasses.dataclass
+class SeedEstimate:  # pylint: disable=too-many-instance-attributes
+    tables: list[TableEstimate]
+    s3_objects: int
+    s3_bytes: int
+    missing_entities: int
+    missing_objects: int
+    plan_seconds: float = 0.0
+    sql_seconds: float = 0.0
+    s3_seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return sum(table.rows for table in self.tables)
+
+    @property
+    def sql_bytes(self) -> int:
+        return sum(table.sql_bytes for table in self.tables)
+
+    @property
+    def expected_seconds(self) -> float:
+        return self.plan_seconds + self.sql_seconds + self.s3_seconds
+
+
+def estimate_sql_bytes(table: TableEstimate, columns: tuple[str, ...], sql_format: str,
+                       rows_per_statement: int = DEFAULT_ROWS_PER_STATEMENT) -> int:
+    # mirrors the layout of SeedSqlWriter; the row text "(a,b)" becomes "('a', 'b')"
+    # (quotes and a space per value)
+    if table.rows == 0:
+        return 0
+    header = len(f'{table.table} ({", ".join(columns)})')
+    values = table.data_bytes + 3 * len(columns) * table.rows
+    if sql_format == SQL_FORMAT_INSERT:
+        return table.rows * (len('INSERT INTO  VALUES ;\n') + header) + values
+    if sql_format == SQL_FORMAT_MULTI_INSERT:
+        statements = math.ceil(table.rows / max(1, rows_per_statement))
+        return (statements * (len('INSERT INTO  VALUES\n    ;\n') + header)
+                + (table.rows - statements) * len(',\n    ') + values)
+    raise ValueError(f'Invalid SQL format: {sql_format}')
+
+
+def fetch_object_sizes(s3: S3Storage, s3_objects: Iterable[S3Object],
+                       tenant_uuid: str | None = None,
+                       concurrency: int = 1) -> dict[str, int | None]:
+    # object name -> size (None if missing), stat requests run concurrently
+    def object_key(s3_object: S3Object) -> str:
+        if tenant_uuid is None:
+            return s3_object.object_name
+        return s3.object_key(tenant_uuid, s3_object.object_name)
+
+    def object_size(key: str) -> int | None:
+        stat = s3.stat_object(key)
+        return None if stat is None else stat[1]
+
+    keys = {s3_object.object_name: object_key(s3_object) for s3_object in s3_objects}
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, concurrency),
+        thread_name_prefix='seed-stat',
+    ) as executor:
+        return dict(zip(keys, executor.map(object_size, keys.values())))
+
+
+def _table_estimates(plan: SeedPlan) -> dict[str, TableEstimate]:
+    tables: dict[str, TableEstimate] = {}
+    for resource_type, entities in plan.by_resource_type():
+        spec = RESOURCES[resource_type]
+        for table_name in [spec.table] + [child_table for child_table, _ in spec.children]:
+            tables.setdefault(table_name, TableEstimate(table_name))
+        for entity in entities:
+            rows = [(spec.table, entity.row)] + entity.children
+            for table_name, row in rows:
+                tables[table_name].rows += 1
+                tables[table_name].data_bytes += row.get(ROW_SIZE_COLUMN) or 0
+    return tables
+
+
+def estimate_plan(plan: SeedPlan, column_types: dict[str, dict[str, str]],
+                  object_sizes: dict[str, int | None], sql_format: str,
+                  rows_per_statement: int = DEFAULT_ROWS_PER_STATEMENT) -> SeedEstimate:
+    tables = _table_estimates(plan)
+    for table in tables.values():
+        columns = tuple(column_types.get(table.table, {}))
+        table.sql_bytes = estimate_sql_bytes(table, columns, sql_format, rows_per_statement)
+    sizes = [size for size in object_sizes.values() if size is not None]
+    return SeedEstimate(
+        tables=list(tables.values()),
+        s3_objects=len(sizes),
+        s3_bytes=sum(sizes),
+        missing_entities=len(plan.missing),
+        missing_objects=len(object_sizes) - len(sizes),
+    )
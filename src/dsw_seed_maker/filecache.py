@@ -0,0 +1,127 @@
+import errno
+import fcntl
+import hashlib
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+from typing import Callable
+
+LOG = logging.getLogger(__name__)
+
+# evictions of all processes sharing the cache directory take turns
+LOCK_FILE = '.lock'
+
+# ioctl to clone file extents (Btrfs, XFS); falls back to copying elsewhere
+FICLONE = 0x40049409
+
+
+def _reflink(source: pathlib.Path, target: pathlib.Path):
+    with source.open('rb') as source_file, target.open('wb') as target_file:
+        try:
+            fcntl.ioctl(target_file.fileno(), FICLONE, source_file.fileno())
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY):
+                raise
+            shutil.copyfileobj(source_file, target_file)
+
+
+class S3FileCache:
+    # Content-addressed by bucket, object name and ETag; least recently used
+    # files are evicted once the cache grows over max_size bytes
+
+    def __init__(self, cache_dir: pathlib.Path, max_size: int):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # size of the cache as of the last eviction plus files fetched since
+        self._size: int | None = None
+        self._lock = threading.Lock()
+
+    def _path(self, bucket: str, object_name: str, etag: str) -> pathlib.Path:
+        key = hashlib.sha256(f'{bucket}\0{object_name}\0{etag}'.encode('utf-8')).hexdigest()
+        return self.cache_dir / key[:2] / key
+
+    def get(self, bucket: str, object_name: str, etag: str) -> pathlib.Path | None:
+        path = self._path(bucket, object_name, etag)
+        try:
+            # modification time marks the last use
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def fetch(self, bucket: str, object_name: str, etag: str,
+              download: Callable[[pathlib.Path], bool]) -> pathlib.Path | None:
+        cached = self.get(bucket, object_name, etag)
+        if cached is not None:
+            LOG.debug('S3 object %s found in cache', object_name)
+            return cached
+        path = self._path(bucket, object_name, etag)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # parallel exports may fetch the same object, the last rename wins
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix='.', suffix='.part')
+        os.close(fd)
+        temp_path = pathlib.Path(temp_name)
+        try:
+            if not download(temp_path):
+                return None
+            os.replace(temp_path, path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+        self._added(path)
+        return path
+
+    def _added(self, path: pathlib.Path):
+        # keeps the cache within max_size during a run, not only after it
+        # (the new file itself is kept until it is linked)
+        size = path.stat().st_size
+        with self._lock:
+            if self._size is not None and self._size + size <= self.max_size:
+                self._size += size
+                return
+            self.evict(keep=path)
+
+    @staticmethod
+    def link(cached: pathlib.Path, target: pathlib.Path):
+        target.unlink(missing_ok=True)
+        try:
+            os.link(cached, target)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+            _reflink(cached, target)
+
+    def evict(self, keep: pathlib.Path | None = None) -> int:
+        with (self.cache_dir / LOCK_FILE).open('a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            evicted, self._size = self._evict(keep)
+        if evicted > 0:
+            LOG.info('Evicted %d files from S3 cache %s', evicted, self.cache_dir)
+        return evicted
+
+    def _evict(self, keep: pathlib.Path | None) -> tuple[int, int]:
+        # returns the number of evicted files and the size of the rest
+        entries = []
+        total_size = 0
+        for path in self.cache_dir.glob('*/*'):
+            if path.name.startswith('.'):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total_size -= size
+            evicted += 1
+        return evicted, total_size
@@ -0,0 +1,168 @@
+import concurrent.futures
+import dataclasses
+import datetime
+import logging
+import pathlib
+import threading
+import uuid
+from typing import Any, Callable
+
+from .progress import SeedCancelled, SeedProgress
+
+LOG = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_FINISHED_STATES = frozenset({JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED})
+
+
+class JobLimitError(Exception):
+    pass
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(tz=datetime.UTC)
+
+
+@dataclasses.dataclass
+class SeedJob:  # pylint: disable=too-many-instance-attributes
+    job_id: str
+    owner: str
+    data: dict[str, list[dict[str, Any]]]
+    package_path: pathlib.Path
+    sql_format: str
+    rows_per_statement: int
+    state: str = JOB_QUEUED
+    error: str | None = None
+    created_at: datetime.datetime = dataclasses.field(default_factory=_now)
+    started_at: datetime.datetime | None = None
+    finished_at: datetime.datetime | None = None
+    progress: SeedProgress = dataclasses.field(default_factory=SeedProgress)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in JOB_FINISHED_STATES
+
+
+JobRunner = Callable[[SeedJob], None]
+
+
+def _set_finished(job: SeedJob, state: str, error: str | None = None):
+    job.state = state
+    job.error = error
+    job.finished_at = _now()
+    job.progress.stage = state
+
+
+class SeedJobManager:  # pylint: disable=too-many-instance-attributes
+    # Runs seed exports on a bounded pool of worker threads; finished jobs and
+    # their packages are kept for ttl seconds so that they can be downloaded
+
+    def __init__(self, runner: JobRunner, jobs_dir: pathlib.Path, max_workers: int,
+                 max_per_user: int, ttl: float, max_jobs: int):
+        self.runner = runner
+        self.jobs_dir = jobs_dir
+        self.max_per_user = max(1, max_per_user)
+        self.max_jobs = max(1, max_jobs)
+        self.ttl = ttl
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self._jobs: dict[str, SeedJob] = {}
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, max_workers),
+            thread_name_prefix='seed-job',
+        )
+
+    def submit(self, owner: str, data: dict[str, list[dict[str, Any]]], archive_suffix: str,
+               sql_format: str, rows_per_statement: int) -> SeedJob:
+        self.purge()
+        with self._lock:
+            active = [job for job in self._jobs.values() if not job.finished]
+            if len(active) >= self.max_jobs:
+                raise JobQueueFullError(f'{self.max_jobs} seed jobs are already queued or '
+                                        f'running, try again later')
+            if sum(1 for job in active if job.owner == owner) >= self.max_per_user:
+                raise JobLimitError(f'Only {self.max_per_user} seed job(s) per user '
+                                    f'can be queued or running at once')
+            job_id = uuid.uuid4().hex
+            job = SeedJob(
+                job_id=job_id,
+                owner=owner,
+                data=data,
+                package_path=self.jobs_dir / f'seed-{job_id}{archive_suffix}',
+                sql_format=sql_format,
+                rows_per_statement=rows_per_statement,
+            )
+            self._jobs[job_id] = job
+        LOG.info('Submitted seed job %s (user: %s)', job_id, owner)
+        self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: SeedJob):
+        with self._lock:
+            if job.finished:
+                # cancelled while queued
+                return
+            job.state = JOB_RUNNING
+            job.started_at = _now()
+        LOG.info('Running seed job %s', job.job_id)
+        try:
+            self.runner(job)
+        except SeedCancelled:
+            LOG.info('Seed job %s cancelled', job.job_id)
+            self._finish(job, JOB_CANCELLED)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            LOG.exception('Seed job %s failed', job.job_id)
+            self._finish(job, JOB_FAILED, str(e))
+        else:
+            LOG.info('Seed job %s finished: %s', job.job_id, job.package_path)
+            self._finish(job, JOB_SUCCEEDED)
+
+    def _finish(self, job: SeedJob, state: str, error: str | None = None):
+        with self._lock:
+            _set_finished(job, state, error)
+
+    def get(self, job_id: str) -> SeedJob | None:
+        self.purge()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, owner: str) -> list[SeedJob]:
+        self.purge()
+        with self._lock:
+            return [job for job in self._jobs.values() if job.owner == owner]
+
+    def cancel(self, job_id: str) -> SeedJob | None:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.progress.cancel()
+        with self._lock:
+            if job.state == JOB_QUEUED:
+                _set_finished(job, JOB_CANCELLED)
+        return job
+
+    def purge(self):
+        threshold = _now() - datetime.timedelta(seconds=self.ttl)
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job.finished_at is not None and job.finished_at < threshold]
+            for job in expired:
+                del self._jobs[job.job_id]
+        for job in expired:
+            job.package_path.unlink(missing_ok=True)
+
+    def shutdown(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if not job.finished:
+                self.cancel(job.job_id)
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,250 @@
+import base64
+import binascii
+import dataclasses
+import datetime
+import json
+import uuid
+from typing import Any
+
+from psycopg import sql
+
+SORT_KEY = 'key'
+SORT_NAME = 'name'
+SORT_CREATED_AT = 'created_at'
+
+
+@dataclasses.dataclass(frozen=True)
+class ListingSpec:
+    table: str
+    # only these columns are selected, large JSON/event columns stay in the DB
+    columns: tuple[str, ...]
+    # unique column used as keyset pagination tie-breaker
+    key_column: str
+    name_column: str = 'name'
+    # filter name -> column compared for equality
+    filters: tuple[tuple[str, str], ...] = ()
+
+
+LISTINGS: dict[str, ListingSpec] = {
+    'users': ListingSpec(
+        table='user_entity',
+        columns=('uuid', 'first_name', 'last_name', 'role'),
+        key_column='uuid',
+        name_column='last_name',
+    ),
+    'project_importers': ListingSpec(
+        table='questionnaire_importer',
+        columns=('id', 'name', 'description'),
+        key_column='id',
+    ),
+    'knowledge_models': ListingSpec(
+        table='package',
+        columns=('id', 'name', 'km_id', 'description'),
+        key_column='id',
+        filters=(('km_id', 'km_id'),),
+    ),
+    'locales': ListingSpec(
+        table='locale',
+        columns=('id', 'name', 'code', 'description'),
+        key_column='id',
+    ),
+    'document_templates': ListingSpec(
+        table='document_template',
+        columns=('id', 'name', 'template_id'),
+        key_column='id',
+        filters=(('template_id', 'template_id'),),
+    ),
+    'projects': ListingSpec(
+        table='questionnaire',
+        columns=('uuid', 'name'),
+        key_column='uuid',
+        filters=(
+            ('package_id', 'package_id'),
+            ('template_id', 'document_template_id'),
+        ),
+    ),
+    'documents': ListingSpec(
+        table='document',
+        columns=('uuid', 'name'),
+        key_column='uuid',
+        filters=(
+            ('template_id', 'document_template_id'),
+            ('project_uuid', 'questionnaire_uuid'),
+        ),
+    ),
+}
+
+
+@dataclasses.dataclass
+class ListingFilter:
+    limit: int | None = None
+    cursor: str | None = None
+    name_prefix: str | None = None
+    created_after: datetime.datetime | None = None
+    filters: dict[str, str] = dataclasses.field(default_factory=dict)
+    sort: str = SORT_KEY
+    descending: bool = False
+
+
+def listing_types(resource_type: str) -> list[str]:
+    if resource_type == 'all':
+        return list(LISTINGS)
+    if resource_type not in LISTINGS:
+        raise ValueError(f'Invalid resource type: {resource_type}')
+    return [resource_type]
+
+
+def _sort_column(spec: ListingSpec, sort: str) -> str:
+    if sort == SORT_KEY:
+        return spec.key_column
+    if sort == SORT_NAME:
+        return spec.name_column
+    if sort == SORT_CREATED_AT:
+        return 'created_at'
+    raise ValueError(f'Invalid sort field: {sort}')
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def encode_cursor(listing_filter: ListingFilter, row: dict[str, Any], spec: ListingSpec) -> str:
+    sort_value = row[_sort_column(spec, listing_filter.sort)]
+    key_value = row[spec.key_column]
+    if isinstance(sort_value, datetime.datetime):
+        sort_value = sort_value.isoformat()
+    elif sort_value is not None:
+        sort_value = str(sort_value)
+    payload = {
+        's': listing_filter.sort,
+        'd': listing_filter.descending,
+        # NULL sort values are kept as JSON null
+        'v': [sort_value, str(key_value)],
+    }
+    data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def decode_cursor(listing_filter: ListingFilter) -> tuple[str | None, str] | None:
+    if not listing_filter.cursor:
+        return None
+    try:
+        padding = '=' * (-len(listing_filter.cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(listing_filter.cursor + padding))
+        sort_value, key_value = payload['v']
+        sort, descending = payload['s'], payload['d']
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if sort != listing_filter.sort or descending != listing_filter.descending:
+        raise ValueError('Cursor does not match the requested sort order')
+    return sort_value, key_value
+
+
+def _listing_conditions(resource_type: str, spec: ListingSpec, sort_column: str,
+                        listing_filter: ListingFilter,
+                        ) -> tuple[list[sql.Composable], dict[str, Any]]:
+    conditions: list[sql.Composable] = []
+    params: dict[str, Any] = {}
+    if listing_filter.name_prefix:
+        conditions.append(sql.SQL('{column} LIKE %(name_prefix)s').format(
+            column=sql.Identifier(spec.name_column),
+        ))
+        params['name_prefix'] = _escape_like(listing_filter.name_prefix) + '%'
+    if listing_filter.created_after is not None:
+        conditions.append(sql.SQL('created_at > %(created_after)s'))
+        params['created_after'] = listing_filter.created_after
+    supported_filters = dict(spec.filters)
+    for name, value in listing_filter.filters.items():
+        if name not in supported_filters:
+            raise ValueError(f'Filter "{name}" is not supported for {resource_type}')
+        conditions.append(sql.SQL('{column} = {param}').format(
+            column=sql.Identifier(supported_filters[name]),
+            param=sql.Placeholder(f'filter_{name}'),
+        ))
+        params[f'filter_{name}'] = value
+    after = decode_cursor(listing_filter)
+    if after is not None:
+        after_sort, params['after_key'] = after
+        if after_sort is not None:
+            params['after_sort'] = after_sort
+        conditions.append(_keyset_condition(spec, sort_column, listing_filter.descending,
+                                            after_sort is None))
+    return conditions, params
+
+
+def _keyset_condition(spec: ListingSpec, sort_column: str, descending: bool,
+                      after_null: bool) -> sql.Composable:
+    # keyset: continue right after the last row of the previous page; NULL sort
+    # values order as the largest (PostgreSQL default), i.e., last when ascending
+    # and first when descending, while row comparisons with NULL match nothing
+    if after_null:
+        condition = '({sort_column} IS NULL AND {key_column} {op} %(after_key)s)'
+        if descending:
+            condition = f'({condition} OR {{sort_column}} IS NOT NULL)'
+    else:
+        condition = '({sort_column}, {key_column}) {op} (%(after_sort)s, %(after_key)s)'
+        if not descending and sort_column != spec.key_column:
+            condition = f'({condition} OR {{sort_column}} IS NULL)'
+    return sql.SQL(condition).format(
+        sort_column=sql.Identifier(sort_column),
+        key_column=sql.Identifier(spec.key_column),
+        op=sql.SQL('<' if descending else '>'),
+    )
+
+
+def listing_query(resource_type: str, listing_filter: ListingFilter | None = None,
+                  ) -> tuple[sql.Composed, dict[str, Any]]:
+    spec = LISTINGS[resource_type]
+    if listing_filter is None:
+        return sql.SQL('SELECT {columns} FROM {table}').format(
+            columns=sql.SQL(', ').join(sql.Identifier(column) for column in spec.columns),
+            table=sql.Identifier(spec.table),
+        ), {}
+
+    sort_column = _sort_column(spec, listing_filter.sort)
+    select_columns = list(spec.columns)
+    for column in (sort_column, spec.key_column):
+        if column not in select_columns:
+            select_columns.append(column)
+    conditions, params = _listing_conditions(resource_type, spec, sort_column, listing_filter)
+    where: sql.Composable = sql.SQL('')
+    if len(conditions) > 0:
+        where = sql.SQL(' WHERE ') + sql.SQL(' AND ').join(conditions)
+    query = sql.SQL(
+        'SELECT {columns} FROM {table}{where}'
+        ' ORDER BY {sort_column} {direction}, {key_column} {direction}'
+    ).format(
+        columns=sql.SQL(', ').join(sql.Identifier(column) for column in select_columns),
+        table=sql.Identifier(spec.table),
+        where=where,
+        sort_column=sql.Identifier(sort_column),
+        key_column=sql.Identifier(spec.key_column),
+        direction=sql.SQL('DESC' if listing_filter.descending else 'ASC'),
+    )
+    if listing_filter.limit is not None:
+        # one more row tells whether there is a next page
+        query += sql.SQL(' LIMIT %(limit)s')
+        params['limit'] = listing_filter.limit + 1
+    return query, params
+
+
+def listing_item(row: dict[str, Any], spec: ListingSpec | None = None) -> dict[str, Any]:
+    # Convert UUIDs to strings, drop columns selected only for sorting
+    return {
+        key: str(value) if isinstance(value, uuid.UUID) else value
+        for key, value in row.items()
+        if spec is None or key in spec.columns
+    }
+
+
+def listing_page(resource_type: str, listing_filter: ListingFilter,
+                 rows: list[dict[str, Any]]) -> dict[str, Any]:
+    spec = LISTINGS[resource_type]
+    next_cursor = None
+    if listing_filter.limit is not None and len(rows) > listing_filter.limit:
+        rows = rows[:listing_filter.limit]
+        next_cursor = encode_cursor(listing_filter, rows[-1], spec)
+    return {
+        resource_type: [listing_item(row, spec) for row in rows],
+        'next_cursor': next_cursor,
+    }
@@ -1,20 +1,40 @@
+import asyncio
+import atexit
+import concurrent.futures
+import contextlib
+import dataclasses
+import functools
 import json
-import os
-import uuid
-from datetime import datetime
-from operator import index
-from venv import create
-
-from dotenv import load_dotenv
+import logging
+import multiprocessing
+import textwrap
+import threading
 import pathlib
-from typing import Any
-from psycopg import sql
+import time
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Iterator, TextIO
 
+from .cache import CacheEntry, TTLCache, combine_entries
 from .comm import S3Storage
-from .models import ExampleRequestDTO, ExampleResponseDTO
-from .comm.db import Database
-
-load_dotenv()
+from .config import Config
+from .consts import DEFAULT_ENCODING, DEFAULT_ROWS_PER_STATEMENT
+from .models import ExampleRequestDTO, ExampleResponseDTO, ListingQueryDTO, SeedJobDTO, \
+    SeedPackageRequestDTO
+from .comm.db import AsyncDatabase, Database, PoolOptions, QueryProfiler
+from .downloader import DownloadLimits, DownloadReport, S3Downloader, log_progress
+from .estimate import EstimatingPlanner, SeedEstimate, estimate_plan, fetch_object_sizes
+from .filecache import S3FileCache
+from .jobs import JOB_SUCCEEDED, SeedJob, SeedJobManager
+from .listing import ListingFilter, listing_item, listing_page, listing_query, listing_types
+from .manifest import Manifest
+from .metrics import RESOURCE_ENTITIES, RESOURCE_SECONDS, stage
+from .package import ARCHIVE_SUFFIXES, SeedOutput, open_output
+from .progress import SeedProgress
+from .planner import RESOURCES, Entity, SeedPlan, SeedPlanner
+from .recipe import Recipe
+from .sqlwriter import SQL_FORMAT_INSERT, EncoderRegistry, SeedSqlWriter, fetch_primary_keys
+
+LOG = logging.getLogger(__name__)
 
 
 def example_logic(req_dto: ExampleRequestDTO) -> ExampleResponseDTO:
@@ -23,160 +43,209 @@ def example_logic(req_dto: ExampleRequestDTO) -> ExampleResponseDTO:
     )
 
 
+def _pool_options() -> PoolOptions:
+    max_size = _SHARED.pool_max_size or Config.DSW_DB_POOL_MAX_SIZE
+    return PoolOptions(
+        min_size=min(Config.DSW_DB_POOL_MIN_SIZE, max_size),
+        max_size=max_size,
+        max_idle=Config.DSW_DB_POOL_MAX_IDLE,
+        max_lifetime=Config.DSW_DB_POOL_MAX_LIFETIME,
+    )
+
+
+def _query_profiler() -> QueryProfiler:
+    return QueryProfiler(
+        slow_threshold=Config.DSW_DB_SLOW_QUERY_MS / 1000,
+        explain_sample_rate=Config.DSW_DB_EXPLAIN_SAMPLE_RATE,
+    )
+
+
+@dataclasses.dataclass
+class _SharedResources:
+    lock: threading.Lock = dataclasses.field(default_factory=threading.Lock)
+    async_lock: asyncio.Lock = dataclasses.field(default_factory=asyncio.Lock)
+    db: Database | None = None
+    async_db: AsyncDatabase | None = None
+    jobs: SeedJobManager | None = None
+    # overrides DSW_DB_POOL_MAX_SIZE, e.g., in tenant worker processes
+    pool_max_size: int | None = None
+
+
+# Process-wide resources shared by the API and CLI
+_SHARED = _SharedResources()
+
+
 def connect_to_db_logic() -> Database:
-    return Database(name=os.getenv("DSW_DB_CONN_NAME"), dsn=os.getenv("DSW_DB_CONN_STR"))
+    with _SHARED.lock:
+        if _SHARED.db is None:
+            _SHARED.db = Database(
+                name=Config.DSW_DB_CONN_NAME,
+                dsn=Config.DSW_DB_CONN_STR or '',
+                pool=_pool_options(),
+            )
+            if Config.DSW_DB_PROFILE:
+                _SHARED.db.profiler = _query_profiler()
+        return _SHARED.db
+
+
+def close_db_logic():
+    with _SHARED.lock:
+        if _SHARED.db is not None:
+            _SHARED.db.close()
+            _SHARED.db = None
+
+
+async def connect_to_async_db_logic() -> AsyncDatabase:
+    async with _SHARED.async_lock:
+        if _SHARED.async_db is None:
+            db = AsyncDatabase(
+                name=Config.DSW_DB_CONN_NAME,
+                dsn=Config.DSW_DB_CONN_STR or '',
+                pool=_pool_options(),
+            )
+            if Config.DSW_DB_PROFILE:
+                db.profiler = _query_profiler()
+            await db.connect()
+            _SHARED.async_db = db
+        return _SHARED.async_db
+
+
+async def close_async_db_logic():
+    async with _SHARED.async_lock:
+        if _SHARED.async_db is not None:
+            await _SHARED.async_db.close()
+            _SHARED.async_db = None
 
 
 def connect_to_s3_logic() -> S3Storage:
     return S3Storage(
-        url=os.getenv("DSW_S3_URL"),
-        username=os.getenv("DSW_S3_USERNAME"),
-        password=os.getenv("DSW_S3_PASSWORD"),
-        bucket=os.getenv("DSW_S3_BUCKET"),
-        region=os.getenv("DSW_S3_REGION"),
+        url=Config.DSW_S3_URL or '',
+        username=Config.DSW_S3_USERNAME or '',
+        password=Config.DSW_S3_PASSWORD or '',
+        bucket=Config.DSW_S3_BUCKET or '',
+        region=Config.DSW_S3_REGION,
         multi_tenant=True
     )
 
 
-def list_logic(resource_type: str) -> dict[str, list[dict[str, Any]]] | list[dict[str, Any]]:
+def iter_list_logic(resource_type: str) -> Iterator[tuple[str, Iterator[dict[str, Any]]]]:
+    resource_types = listing_types(resource_type)
     db = connect_to_db_logic()
-    if resource_type == 'all':
-        return list_all_logic(db)
-    if resource_type == 'users':
-        return {'users': list_users_logic(db)}
-    if resource_type == 'project_importers':
-        return {'project_importers': list_project_importers_logic(db)}
-    if resource_type == 'knowledge_models':
-        return {'knowledge_models': list_knowledge_models_logic(db)}
-    if resource_type == 'locales':
-        return {'locales': list_locales_logic(db)}
-    if resource_type == 'document_templates':
-        return {'document_templates': list_document_templates_logic(db)}
-    if resource_type == 'projects':
-        return {'projects': list_projects_logic(db)}
-    if resource_type == 'documents':
-        return {'documents': list_documents_logic(db)}
-
-    raise ValueError(f'Invalid resource type: {resource_type}')
-
-
-def list_all_logic(db) -> dict[str, list[dict[str, str | Any]] | list[dict[str, Any]]]:
-    users = list_users_logic(db)
-    project_importers = list_project_importers_logic(db)
-    knowledge_models = list_knowledge_models_logic(db)
-    locales = list_locales_logic(db)
-    document_templates = list_document_templates_logic(db)
-    projects = list_projects_logic(db)
-    documents = list_documents_logic(db)
-    resources = {
-        'users': users,
-        'project_importers': project_importers,
-        'knowledge_models': knowledge_models,
-        'locales': locales,
-        'document_templates': document_templates,
-        'projects': projects,
-        'documents': documents
+    for rt in resource_types:
+        rows = db.iterate_query(listing_query(rt)[0], fetch_size=Config.DSW_DB_FETCH_SIZE)
+        yield rt, (listing_item(row) for row in rows)
+
+
+def dump_list_logic(resource_type: str, output: TextIO):
+    # Streams the listing as indented JSON ({type: [items]}) record by record
+    output.write('{')
+    section_sep = '\n'
+    for rt, items in iter_list_logic(resource_type):
+        output.write(f'{section_sep}    {json.dumps(rt)}: [')
+        item_sep = '\n'
+        for item in items:
+            output.write(item_sep)
+            output.write(textwrap.indent(json.dumps(item, indent=4), ' ' * 8))
+            item_sep = ',\n'
+        output.write(']' if item_sep == '\n' else '\n    ]')
+        section_sep = ',\n'
+    output.write('}' if section_sep == '\n' else '\n}')
+
+
+async def list_logic_async(resource_type: str) -> dict[str, list[dict[str, Any]]]:
+    resource_types = listing_types(resource_type)
+    db = await connect_to_async_db_logic()
+    # Resource types are queried concurrently on the async pool
+    results = await asyncio.gather(*(
+        db.execute_query(listing_query(rt)[0]) for rt in resource_types
+    ))
+    return {
+        rt: [listing_item(row) for row in rows]
+        for rt, rows in zip(resource_types, results)
+    }
+
+
+def _listing_filter(query_dto: ListingQueryDTO) -> ListingFilter:
+    filters = {
+        name: value
+        for name, value in (
+            ('km_id', query_dto.km_id),
+            ('package_id', query_dto.package_id),
+            ('template_id', query_dto.template_id),
+            ('project_uuid', query_dto.project_uuid),
+        )
+        if value is not None
     }
-    return resources
-
-
-def list_users_logic(db) -> list[dict[str, str | Any]]:
-    query = sql.SQL('SELECT * FROM user_entity')
-    resources = db.execute_query(query)
-    parsed_resources = [
-        {
-            'uuid': str(row['uuid']),  # Convert UUID to string
-            'first_name': row['first_name'],
-            'last_name': row['last_name'],
-            'role': row['role']
-        }
-        for row in resources
-    ]
-    return parsed_resources
-
-
-def list_project_importers_logic(db) -> list[dict[str, Any]]:
-    query = sql.SQL('SELECT * FROM questionnaire_importer')
-    resources = db.execute_query(query)
-    parsed_resources: list[dict[str, Any]] = [
-        {
-            'id': row['id'],  # Convert UUID to string
-            'name': row['name'],
-            'description': row['description']
-        }
-        for row in resources
-    ]
-    return parsed_resources
-
-
-def list_knowledge_models_logic(db) -> list[dict[str, Any]]:
-    query = sql.SQL('SELECT * FROM package')
-    resources = db.execute_query(query)
-    parsed_resources = [
-        {
-            'id': row['id'],
-            'name': row['name'],
-            'km_id': row['km_id'],
-            'description': row['description']
-        }
-        for row in resources
-    ]
-    return parsed_resources
-
-
-def list_locales_logic(db) -> list[dict[str, Any]]:
-    query = sql.SQL('SELECT * FROM locale')
-    resources = db.execute_query(query)
-    parsed_resources = [
-        {
-            'id': row['id'],
-            'name': row['name'],
-            'code': row['code'],
-            'description': row['description']
-        }
-        for row in resources
-    ]
-    return parsed_resources
-
-
-def list_document_templates_logic(db) -> list[dict[str, Any]]:
-    query = sql.SQL('SELECT * FROM document_template')
-    resources = db.execute_query(query)
-    parsed_resources = [
-        {
-            'id': row['id'],
-            'name': row['name'],
-            'template_id': row['template_id']
-        }
-        for row in resources
-    ]
-    return parsed_resources
-
-
-def list_projects_logic(db) -> list[dict[str, Any]]:
-    query = sql.SQL('SELECT * FROM questionnaire')
-    resources = db.execute_query(query)
-    parsed_resources = [
-        {
-            'uuid': str(row['uuid']),  # Convert UUID to string
-            'name': row['name']
-        }
-        for row in resources
-    ]
-    return parsed_resources
-
-
-def list_documents_logic(db) -> list[dict[str, Any]]:
-    query = sql.SQL('SELECT * FROM document')
-    resources = db.execute_query(query)
-    parsed_resources = [
-        {
-            'uuid': str(row['uuid']),  # Convert UUID to string
-            'name': row['name']
-        }
-        for row in resources
-    ]
-    return parsed_resources
+    return ListingFilter(
+        limit=query_dto.limit,
+        cursor=query_dto.cursor,
+        name_prefix=query_dto.name_prefix,
+        created_after=query_dto.created_after,
+        filters=filters,
+        sort=query_dto.sort,
+        descending=query_dto.order == 'desc',
+    )
+
+
+async def list_page_logic_async(resource_type: str,
+                                query_dto: ListingQueryDTO) -> dict[str, Any]:
+    listing_types(resource_type)
+    if resource_type == 'all':
+        raise ValueError('Paging and filtering require a single resource type')
+    listing_filter = _listing_filter(query_dto)
+    query, params = listing_query(resource_type, listing_filter)
+    db = await connect_to_async_db_logic()
+    rows = await db.execute_query(query, **params)
+    return listing_page(resource_type, listing_filter, rows)
+
+
+_LISTING_CACHE = TTLCache(max_size=Config.LISTING_CACHE_SIZE)
+# cache key -> fetch in progress, concurrent misses of a key share one DB query
+_LISTING_FETCHES: dict[tuple, asyncio.Future[CacheEntry]] = {}
+
+
+async def _fetch_listing(resource_type: str, key: tuple,
+                         fetch: Callable[[], Awaitable[dict[str, Any]]]) -> CacheEntry:
+    return _LISTING_CACHE.put(
+        key=key,
+        value=await fetch(),
+        ttl=Config.LISTING_CACHE_TTLS.get(resource_type, 0),
+    )
+
+
+async def _cached_listing(resource_type: str, key: tuple,
+                          fetch: Callable[[], Awaitable[dict[str, Any]]]) -> CacheEntry:
+    entry = _LISTING_CACHE.get(key)
+    if entry is not None:
+        return entry
+    future = _LISTING_FETCHES.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_fetch_listing(resource_type, key, fetch))
+        _LISTING_FETCHES[key] = future
+        future.add_done_callback(lambda _: _LISTING_FETCHES.pop(key, None))
+    # a request going away does not cancel the fetch the others wait for
+    return await asyncio.shield(future)
+
+
+async def cached_list_logic_async(resource_type: str,
+                                  query_dto: ListingQueryDTO | None = None) -> CacheEntry:
+    if query_dto is None:
+        entries = await asyncio.gather(*(
+            _cached_listing(rt, (rt, 'all'), functools.partial(list_logic_async, rt))
+            for rt in listing_types(resource_type)
+        ))
+        return combine_entries(entries)
+    return await _cached_listing(
+        resource_type=resource_type,
+        key=(resource_type, query_dto.model_dump_json()),
+        fetch=functools.partial(list_page_logic_async, resource_type, query_dto),
+    )
+
+
+def invalidate_list_cache_logic(resource_type: str | None = None):
+    if resource_type is not None:
+        listing_types(resource_type)
+    _LISTING_CACHE.invalidate(None if resource_type in (None, 'all') else resource_type)
 
 
 def download_file_logic(file_name: str, target_path: str) -> bool:
@@ -192,216 +261,367 @@ def download_file_logic(file_name: str, target_path: str) -> bool:
 
     return downloaded_file
 
-# Create a copy of tmp.js to output_dir
-def create_recipe_file(output_dir):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    with open("recipe_tmp.json", 'r') as template_recipe:
-        data = template_recipe.read()
-    with open(os.path.join(output_dir, 'recipe.json'), 'w') as recipe:
-        recipe.write(data)
 
-def add_db_file_to_recipe(recipe_path, db_file_name):
-    with open(recipe_path, 'r') as recipe_file:
-        recipe_data = json.load(recipe_file)
+def process_input(data, output_dir, sql_format: str = SQL_FORMAT_INSERT,
+                  rows_per_statement: int = DEFAULT_ROWS_PER_STATEMENT,
+                  archive: str | None = None, previous_manifest: str | None = None,
+                  query_report: str | None = None, progress: SeedProgress | None = None,
+                  tenant_uuid: str | None = None):
+    progress = progress or SeedProgress()
+    db = connect_to_db_logic()
+    with _query_report(db, query_report):
+        # all reads (also the concurrent ones) see the same point in time,
+        # the snapshot is released before the slow part (writing, downloads)
+        with db.snapshot() as snapshot_db:
+            with _stage(progress, 'plan'):
+                plan = _plan_input(snapshot_db, data, tenant_uuid, progress=progress)
+            progress.entities_total = len(plan)
+            progress.objects_total = sum(len(entity.s3_objects)
+                                         for entity in plan.entities.values())
+
+            writer_options = _writer_options(snapshot_db, sql_format, rows_per_statement,
+                                             delta=previous_manifest is not None)
+        previous = None
+        if previous_manifest is not None:
+            previous = Manifest.load(pathlib.Path(previous_manifest))
+
+        with open_output(output_dir, archive) as output:
+            _write_package(plan, output, previous, writer_options, progress)
+
+
+@contextlib.contextmanager
+def _stage(progress: SeedProgress, name: str) -> Iterator[None]:
+    progress.start_stage(name)
+    with stage(name):
+        yield
+
+
+def _plan_input(db: Database, data, tenant_uuid: str | None = None,
+                planner_class: type[SeedPlanner] = SeedPlanner,
+                progress: SeedProgress | None = None) -> SeedPlan:
+    planner = planner_class(db, batch_size=Config.SEED_FETCH_BATCH_SIZE, tenant_uuid=tenant_uuid,
+                            workers=Config.SEED_FETCH_CONCURRENCY)
+    for resource_type, items in data.items():
+        if resource_type not in RESOURCES:
+            LOG.warning('Unrecognized resource type: %s', resource_type)
+            continue
+        planner.add_all(resource_type, (next(iter(item.values()), None) for item in items))
+    return planner.resolve(progress.check_cancelled if progress is not None else None)
+
+
+@contextlib.contextmanager
+def _query_report(db: Database, query_report: str | None) -> Iterator[None]:
+    if query_report is None:
+        yield
+        return
+    if db.profiler is None:
+        db.profiler = _query_profiler()
+    profiler = db.profiler
+    since = profiler.snapshot()
+    yield
+    # ranking of query shapes by total time spent in this run
+    pathlib.Path(query_report).write_text(profiler.report(since), encoding=DEFAULT_ENCODING)
+
+
+def _spec_tables(spec) -> list[str]:
+    return [spec.table] + [child_table for child_table, _ in spec.children]
+
+
+def _seed_tables() -> set[str]:
+    return {table for spec in RESOURCES.values() for table in _spec_tables(spec)}
+
+
+@dataclasses.dataclass
+class SqlWriterOptions:
+    sql_format: str = SQL_FORMAT_INSERT
+    rows_per_statement: int = DEFAULT_ROWS_PER_STATEMENT
+    # one registry per run, row encoders are compiled once per table
+    encoders: EncoderRegistry = dataclasses.field(default_factory=EncoderRegistry)
+    conflict_keys: dict[str, tuple[str, ...]] | None = None
+
+
+def _writer_options(db: Database, sql_format: str, rows_per_statement: int,
+                    delta: bool = False) -> SqlWriterOptions:
+    tables = _seed_tables()
+    options = SqlWriterOptions(
+        sql_format=sql_format,
+        rows_per_statement=rows_per_statement,
+        encoders=EncoderRegistry.from_database(db, tables),
+    )
+    if delta:
+        # delta seed, changed rows replace what the previous seed inserted
+        options.conflict_keys = fetch_primary_keys(db, tables)
+    return options
+
+
+def _write_package(plan: SeedPlan, output: SeedOutput, previous: Manifest | None,
+                   writer_options: SqlWriterOptions, progress: SeedProgress):
+    recipe = Recipe.from_template()
+    manifest = Manifest()
+    with _stage(progress, 'sql'):
+        write_plan_sql(plan, output, recipe, manifest, previous, writer_options, progress)
+    with _stage(progress, 'download'):
+        report = download_plan_files(plan, output, previous, progress)
+    manifest.objects.update(report.etags)
+    recipe.write(output)
+    manifest.write(output)
+
+
+def write_plan_sql(plan: SeedPlan, output: SeedOutput, recipe: Recipe, manifest: Manifest,
+                   previous: Manifest | None = None, options: SqlWriterOptions | None = None,
+                   progress: SeedProgress | None = None):
+    options = options or SqlWriterOptions()
+    progress = progress or SeedProgress()
+    for resource_type, entities in plan.by_resource_type():
+        # all entities go to the manifest, only the changed ones to the seed
+        changed = [entity for entity in entities if manifest.track_entity(entity, previous)]
+        if len(changed) > 0:
+            recipe.add_script(_write_resource_sql(output, resource_type, changed, options))
+        progress.add_entities(len(entities))
+
+
+def _write_resource_sql(output: SeedOutput, resource_type: str, entities: list[Entity],
+                        options: SqlWriterOptions) -> str:
+    spec = RESOURCES[resource_type]
+    script = f"add_{resource_type}.sql"
+    RESOURCE_ENTITIES.labels(resource_type=resource_type).inc(len(entities))
+    with RESOURCE_SECONDS.labels(resource_type=resource_type).time(), \
+            output.open_text(script) as seed_file:
+        writer = SeedSqlWriter(seed_file, options.sql_format, options.rows_per_statement,
+                               options.encoders, options.conflict_keys)
+        writer.write_rows(spec.table, (entity.row for entity in entities))
+        # owned rows go after all their owners, table by table
+        for child_table, _ in spec.children:
+            writer.write_rows(child_table, (
+                child_row
+                for entity in entities
+                for table, child_row in entity.children
+                if table == child_table
+            ))
+    return script
+
+
+def _s3_file_cache() -> S3FileCache | None:
+    if Config.SEED_S3_CACHE_SIZE <= 0:
+        return None
+    return S3FileCache(Config.SEED_S3_CACHE_DIR, Config.SEED_S3_CACHE_SIZE)
+
+
+def download_plan_files(plan: SeedPlan, output: SeedOutput, previous: Manifest | None = None,
+                        progress: SeedProgress | None = None) -> DownloadReport:
+    s3 = connect_to_s3_logic()
+    s3.ensure_bucket()
+    downloader = S3Downloader(
+        s3=s3,
+        output=output,
+        concurrency=Config.SEED_DOWNLOAD_CONCURRENCY,
+        on_progress=progress.on_download if progress is not None else log_progress,
+        previous_etags=previous.objects if previous is not None else None,
+        cache=_s3_file_cache(),
+        tenant_uuid=plan.tenant_uuid,
+        limits=DownloadLimits(
+            max_object_size=Config.SEED_DOCUMENT_MAX_SIZE or None,
+            max_total_size=Config.SEED_DOCUMENTS_MAX_TOTAL or None,
+        ),
+    )
+    # failed and skipped objects are logged by the downloader
+    return downloader.download_all(plan.s3_objects)
 
-        recipe_data["db"]["scripts"].append({"filename" : db_file_name})
 
-    with open(recipe_path, 'w') as recipe_file:
-        #recipe_file.write(str(recipe_data))
-        json.dump(recipe_data, recipe_file, ensure_ascii=False, indent=4)
+def estimate_seed_logic(data, sql_format: str = SQL_FORMAT_INSERT,
+                        rows_per_statement: int = DEFAULT_ROWS_PER_STATEMENT,
+                        tenant_uuid: str | None = None) -> SeedEstimate:
+    # Dry run: resolves the selection without fetching the rows and stats S3 objects
+    db = connect_to_db_logic()
+    start = time.perf_counter()
+    with db.snapshot() as snapshot_db:
+        plan = _plan_input(snapshot_db, data, tenant_uuid, planner_class=EstimatingPlanner)
+        column_types = EncoderRegistry.from_database(snapshot_db, _seed_tables()).column_types
+    plan_seconds = time.perf_counter() - start
+    object_sizes = fetch_object_sizes(connect_to_s3_logic(), plan.s3_objects, tenant_uuid,
+                                      concurrency=Config.SEED_DOWNLOAD_CONCURRENCY)
+    estimate = estimate_plan(plan, column_types, object_sizes, sql_format, rows_per_statement)
+    estimate.plan_seconds = plan_seconds
+    estimate.sql_seconds = estimate.sql_bytes / max(1.0, Config.SEED_ESTIMATE_SQL_RATE)
+    estimate.s3_seconds = estimate.s3_bytes / max(1.0, Config.SEED_ESTIMATE_S3_RATE)
+    return estimate
+
+
+@dataclasses.dataclass
+class TenantExportOptions:
+    data: dict[str, list[dict[str, Any]]]
+    output_dir: str
+    archive: str | None = None
+    sql_format: str = SQL_FORMAT_INSERT
+    rows_per_statement: int = DEFAULT_ROWS_PER_STATEMENT
+
+
+@dataclasses.dataclass
+class TenantExportResult:
+    tenant_uuid: str
+    package: str
+    entities: int = 0
+    objects: int = 0
+    duration: float = 0.0
+    error: str | None = None
+
+
+def tenant_package(output_dir: str, archive: str | None,
+                   tenant_uuid: str) -> tuple[str, str | None]:
+    # (output dir, archive) of the tenant, e.g., output/<tenant> or seed-<tenant>.zip
+    if archive is None:
+        return str(pathlib.Path(output_dir) / tenant_uuid), None
+    path = pathlib.Path(archive)
+    suffix = next(suffix for suffix in ARCHIVE_SUFFIXES if path.name.lower().endswith(suffix))
+    stem = path.name[:-len(suffix)]
+    return output_dir, str(path.with_name(f'{stem}-{tenant_uuid}{path.name[-len(suffix):]}'))
+
+
+def _init_tenant_worker():
+    # each worker process keeps its own DB pool for all tenants it exports, sized
+    # for one export at a time (the snapshot plus the concurrent fetches)
+    _SHARED.pool_max_size = Config.SEED_FETCH_CONCURRENCY + 1
+    atexit.register(close_db_logic)
+
+
+def _export_tenant(tenant_uuid: str, options: TenantExportOptions) -> TenantExportResult:
+    output_dir, archive = tenant_package(options.output_dir, options.archive, tenant_uuid)
+    result = TenantExportResult(tenant_uuid=tenant_uuid, package=archive or output_dir)
+    progress = SeedProgress()
+    start = time.perf_counter()
+    try:
+        process_input(
+            options.data, output_dir,
+            sql_format=options.sql_format,
+            rows_per_statement=options.rows_per_statement,
+            archive=archive,
+            progress=progress,
+            tenant_uuid=tenant_uuid,
+        )
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        LOG.exception('Failed to export tenant %s', tenant_uuid)
+        result.error = str(e)
+    result.entities = progress.entities_done
+    result.objects = progress.objects_done
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def process_tenants(tenants: list[str], options: TenantExportOptions,
+                    workers: int | None = None) -> list[TenantExportResult]:
+    # Tenants are exported in parallel worker processes (spawned, so no DB
+    # connection or S3 client is shared with the parent), one package each
+    results: dict[str, TenantExportResult] = {}
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(workers or Config.SEED_TENANT_WORKERS, max(1, len(tenants))),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_tenant_worker,
+    ) as executor:
+        futures = {executor.submit(_export_tenant, tenant, options): tenant for tenant in tenants}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                # a worker died (e.g., killed when out of memory), tenants still
+                # queued or running fail, those finished before keep their packages
+                tenant = futures[future]
+                output_dir, archive = tenant_package(options.output_dir, options.archive, tenant)
+                result = TenantExportResult(tenant_uuid=tenant, package=archive or output_dir,
+                                            error=f'worker process failed: {e}')
+            results[result.tenant_uuid] = result
+            LOG.info('Exported tenant %s (%d/%d) in %.1fs%s', result.tenant_uuid,
+                     len(results), len(tenants), result.duration,
+                     f', failed: {result.error}' if result.error else '')
+    return [results[tenant] for tenant in tenants]
+
+
+def _run_seed_job(job: SeedJob):
+    process_input(
+        job.data, str(job.package_path.parent),
+        sql_format=job.sql_format,
+        rows_per_statement=job.rows_per_statement,
+        archive=str(job.package_path),
+        progress=job.progress,
+    )
 
 
-def process_input(data, output_dir):
-    db = connect_to_db_logic()
-    create_recipe_file(output_dir)
-    for resource_type, items in data.items():
-        handler = resource_handlers.get(resource_type)
-        recipe_file = create_seed_files_db(resource_type, output_dir)
-        add_db_file_to_recipe(output_dir + "/recipe.json", "add_" + resource_type + ".sql")
-        if handler:
-            # Call the handler for each item in the list associated with this resource type
-            for item in items:
-                handler(next(iter(item.values()), None), db, recipe_file, resource_type, output_dir)
-        else:
-            print(f"Unrecognized resource type: {resource_type}")
-
-
-def format_for_sql(data_dict):
-    sql_values = []
-    for key, value in data_dict.items():
-        if isinstance(value, uuid.UUID):
-            # UUID should be wrapped in single quotes in the SQL query
-            sql_values.append(f"'{str(value)}'")
-
-        elif isinstance(value, datetime):
-            # Format datetime as 'YYYY-MM-DD HH:MM:SS' (no timezone)
-            sql_values.append(f"'{value.strftime('%Y-%m-%d %H:%M:%S')}'")
-
-        elif isinstance(value, list):
-            # Handle lists, convert to PostgreSQL-style array format (e.g., {'value1', 'value2'})
-            formatted_list = '\'{' + ', '.join(
-                [f"{item}" if isinstance(item, str) else str(item) for item in value]) + '}\''
-            sql_values.append(formatted_list)
-
-        elif value is None:
-            sql_values.append('NULL')  # Convert None to SQL NULL
-
-        elif isinstance(value, bool):
-            # Convert boolean to SQL TRUE/FALSE (no quotes)
-            sql_values.append('TRUE' if value else 'FALSE')
-
-        else:
-            # For any other data type (strings, numbers), ensure they are wrapped in single quotes
-            sql_values.append(f"'{str(value)}'")
-    return sql_values
-
-
-def create_seed_files_db(resource_type, output_dir):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
-    file_path = os.path.join(output_dir, f"add_{resource_type}.sql")
-    file = open(file_path, 'w', encoding='utf-8')
-    return file
-
-def write_seed_files_db(file, query):
-    file.write(query + "\n")
-    
-    
-def generate_insert_query(data, table):
-    columns = ', '.join(data.keys())
-    values = ", ".join(format_for_sql(data))
-    return f"INSERT INTO {table} ({columns}) VALUES ({values});"
-
-def generate_select_query(resource_type, attr, value):
-    return "SELECT * FROM {table} WHERE {attr} = '{value}'".format(value=value, table=resource_tables[resource_type], attr=attr)
-
-
-def handle_users(resource_id, db, recipe_file, resource_type, output_dir):
-    query = generate_select_query(resource_type, "uuid", resource_id)
-    resource = db.execute_query(query)
-    if len(resource) == 1:
-        insert_query = generate_insert_query(resource[0], resource_tables[resource_type])
-        write_seed_files_db(recipe_file, insert_query)
-    else:
-        print("User not found in database")
-
-def handle_projects(resource_id, db, recipe_file, resource_type, output_dir):
-    query = generate_select_query(resource_type, "uuid", resource_id )
-    resource = db.execute_query(query)
-    if len(resource) == 1:
-        insert_query = generate_insert_query(resource[0], resource_tables[resource_type])
-        write_seed_files_db(recipe_file, insert_query)
-        handle_knowledge_models(resource[0]['package_id'], db, recipe_file, "knowledge_models", output_dir)
-        handle_document_templates(resource[0]['document_template_id'], db, recipe_file, "document_templates", output_dir)
-    else:
-        print("Project not found in database")
-
-def handle_documents(resource_id, db, recipe_file, resource_type, output_dir):
-    query = generate_select_query(resource_type, "uuid", resource_id)
-    resource = db.execute_query(query)
-    if len(resource) == 1:
-        insert_query = generate_insert_query(resource[0], resource_tables[resource_type])
-        write_seed_files_db(recipe_file, insert_query)
-        handle_document_templates(resource[0]['document_template_id'], db, recipe_file, "document_templates", output_dir)
-        handle_projects(resource[0]['questionnaire_uuid'], db, recipe_file, "projects", output_dir)
-    else:
-        print("Document not found in database")
-
-def handle_project_importers(resource_id, db, recipe_file, resource_type, output_dir):
-    query = generate_select_query(resource_type, "id", resource_id)
-    resource = db.execute_query(query)
-    if len(resource) == 1:
-        insert_query = generate_insert_query(resource[0], resource_tables[resource_type])
-        write_seed_files_db(recipe_file, insert_query)
-    else:
-        print("Project Importer not found in database")
-
-
-def handle_knowledge_models(resource_id, db, recipe_file, resource_type, output_dir):
-    query = generate_select_query(resource_type, "id", resource_id)
-    resource = db.execute_query(query)
-    if len(resource) == 1:
-        if resource[0]['previous_package_id'] is None:
-            insert_query = generate_insert_query(resource[0], resource_tables[resource_type])
-            write_seed_files_db(recipe_file, insert_query)
-        else:
-            # print("\n PRINT THE previous package id \n")
-            # print(resource[0]['previous_package_id'])
-            handle_knowledge_models(resource[0]['previous_package_id'], db, recipe_file, resource_type, output_dir)
-            insert_query = generate_insert_query(resource[0], resource_tables[resource_type])
-            write_seed_files_db(recipe_file, insert_query)
-    else:
-        print("User not found in database")
-
-def handle_locales(resource_id, db, recipe_file, resource_type,  output_dir):
-    if resource_id != 'wizard:default:1.0.0':
-        query = generate_select_query(resource_type, "id", resource_id )
-        resource = db.execute_query(query)
-        if len(resource) == 1:
-            insert_query = generate_insert_query(resource[0], resource_tables[resource_type])
-            write_seed_files_db(recipe_file, insert_query)
-            s3_locales = download_file_logic("locales/" + resource_id, output_dir + "/app" + "/locales/" + resource[0]['name'])
-            if s3_locales:
-                print("File downloaded")
-            else:
-                print("File not found")
-        else:
-            print("User not found in database")
-
-def handle_document_templates(resource_id, db, recipe_file, resource_type, output_dir):
-    query = generate_select_query(resource_type, "id" , resource_id )
-    resource = db.execute_query(query)
-    if len(resource) == 1:
-        insert_query = generate_insert_query(resource[0], resource_tables[resource_type])
-        write_seed_files_db(recipe_file, insert_query)
-        handle_document_templates_files(resource_id, db, recipe_file)
-        handle_document_templates_assets(resource_id, db, recipe_file, output_dir)
-    else:
-        print("User not found in database")
-
-def handle_document_templates_assets(doc_temp_id, db, recipe_file, output_dir):
-    query = generate_select_query("document_template_asset", "document_template_id", doc_temp_id)
-    resource = db.execute_query(query)
-    for asset in resource:
-        insert_query = generate_insert_query(asset, "document_template_asset")
-        write_seed_files_db(recipe_file, insert_query)
-        s3_assets = download_file_logic("templates/" + str(doc_temp_id) + "/" + str(asset['uuid']), output_dir + "/app" + "/document_templates/" + str(doc_temp_id).replace(":", "_") + "/asset_" + str(asset['uuid']) )
-        if s3_assets:
-            print("File downloaded")
-        else:
-            print("File not found")
-
-
-def handle_document_templates_files(doc_temp_id, db, recipe_file):
-    query = generate_select_query("document_template_file", "document_template_id", doc_temp_id)
-    resource = db.execute_query(query)
-    for file in resource:
-        insert_query = generate_insert_query(file, "document_template_file")
-        write_seed_files_db(recipe_file, insert_query)
-
-
-# Map resource types to handler functions
-resource_handlers = {
-    "users": handle_users,
-    "projects": handle_projects,
-    "documents": handle_documents,
-    "project_importers": handle_project_importers,
-    "knowledge_models": handle_knowledge_models,
-    "locales":handle_locales,
-    "document_templates": handle_document_templates,
-}
-
-# Map resources to their table names
-resource_tables = {
-    "users": "user_entity",
-    "projects": "questionnaire",
-    "documents": "document",
-    "project_importers": "questionnaire_importer",
-    "knowledge_models": "package",
-    "locales": "locale",
-    "document_templates": "document_template",
-    "document_template_asset": "document_template_asset",
-    "document_template_file": "document_template_file"
-}
\ No newline at end of file
+def seed_jobs_logic() -> SeedJobManager:
+    with _SHARED.lock:
+        if _SHARED.jobs is None:
+            _SHARED.jobs = SeedJobManager(
+                runner=_run_seed_job,
+                jobs_dir=Config.SEED_JOBS_DIR,
+                max_workers=Config.SEED_JOBS_WORKERS,
+                max_per_user=Config.SEED_JOBS_PER_USER,
+                ttl=Config.SEED_JOBS_TTL,
+                max_jobs=Config.SEED_JOBS_MAX,
+            )
+        return _SHARED.jobs
+
+
+def close_seed_jobs_logic():
+    with _SHARED.lock:
+        jobs, _SHARED.jobs = _SHARED.jobs, None
+    if jobs is not None:
+        jobs.shutdown()
+
+
+def _seed_job_dto(job: SeedJob) -> SeedJobDTO:
+    progress = job.progress
+    return SeedJobDTO(
+        id=job.job_id,
+        state=job.state,
+        stage=progress.stage,
+        entities_done=progress.entities_done,
+        entities_total=progress.entities_total,
+        objects_done=progress.objects_done,
+        objects_total=progress.objects_total,
+        bytes_downloaded=progress.bytes_downloaded,
+        eta=None if job.finished else progress.eta,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+def _owned_seed_job(owner: str, job_id: str) -> SeedJob | None:
+    job = seed_jobs_logic().get(job_id)
+    return job if job is not None and job.owner == owner else None
+
+
+def submit_seed_job_logic(owner: str, req_dto: SeedPackageRequestDTO) -> SeedJobDTO:
+    unknown = sorted(set(req_dto.resources) - set(RESOURCES))
+    if len(unknown) > 0:
+        raise ValueError(f'Invalid resource type(s): {", ".join(unknown)}')
+    job = seed_jobs_logic().submit(
+        owner=owner,
+        data=req_dto.resources,
+        archive_suffix=f'.{req_dto.archive_format}',
+        sql_format=req_dto.sql_format,
+        rows_per_statement=req_dto.rows_per_statement,
+    )
+    return _seed_job_dto(job)
+
+
+def list_seed_jobs_logic(owner: str) -> list[SeedJobDTO]:
+    return [_seed_job_dto(job) for job in seed_jobs_logic().list(owner)]
+
+
+def get_seed_job_logic(owner: str, job_id: str) -> SeedJobDTO | None:
+    job = _owned_seed_job(owner, job_id)
+    return _seed_job_dto(job) if job is not None else None
+
+
+def cancel_seed_job_logic(owner: str, job_id: str) -> SeedJobDTO | None:
+    job = _owned_seed_job(owner, job_id)
+    if job is None:
+        return None
+    return _seed_job_dto(seed_jobs_logic().cancel(job_id) or job)
+
+
+def seed_job_package_logic(owner: str, job_id: str) -> pathlib.Path | None:
+    job = _owned_seed_job(owner, job_id)
+    if job is None or job.state != JOB_SUCCEEDED or not job.package_path.exists():
+        return None
+    return job.package_path
@@ -0,0 +1,56 @@
+import dataclasses
+import hashlib
+import json
+import pathlib
+
+from .consts import DEFAULT_ENCODING
+from .package import SeedOutput
+from .planner import Entity
+
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+def entity_hash(entity: Entity) -> str:
+    # row together with owned rows, the entity is rewritten if any of them changes
+    payload = {
+        'row': entity.row,
+        'children': [[table, row] for table, row in entity.children],
+    }
+    data = json.dumps(payload, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+@dataclasses.dataclass
+class Manifest:
+    # entity key (e.g., "projects[<uuid>]") -> content hash
+    entities: dict[str, str] = dataclasses.field(default_factory=dict)
+    # S3 object name -> ETag
+    objects: dict[str, str] = dataclasses.field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> 'Manifest':
+        with path.open('r', encoding=DEFAULT_ENCODING) as manifest_file:
+            data = json.load(manifest_file)
+        if data.get('version') != MANIFEST_VERSION:
+            raise ValueError(f'Unsupported manifest version: {data.get("version")}')
+        return cls(entities=data['entities'], objects=data['objects'])
+
+    def track_entity(self, entity: Entity, previous: 'Manifest | None' = None) -> bool:
+        # records the entity, returns whether it changed since the previous manifest
+        key = str(entity.key)
+        content_hash = entity_hash(entity)
+        self.entities[key] = content_hash
+        return previous is None or previous.entities.get(key) != content_hash
+
+    def to_dict(self) -> dict:
+        return {
+            'version': MANIFEST_VERSION,
+            'entities': self.entities,
+            'objects': self.objects,
+        }
+
+    def write(self, output: SeedOutput):
+        content = json.dumps(self.to_dict(), indent=4, sort_keys=True)
+        with output.open_text(MANIFEST_FILE) as manifest_file:
+            manifest_file.write(content)
@@ -0,0 +1,146 @@
+import contextlib
+from typing import Callable, Iterator
+
+import prometheus_client
+import tenacity
+
+DB_QUERY_SECONDS = prometheus_client.Histogram(
+    'dsw_seed_db_query_duration_seconds',
+    'Duration of database queries (attempts, including retried ones)',
+    ['mode'],
+)
+DB_ROWS = prometheus_client.Counter(
+    'dsw_seed_db_rows',
+    'Rows fetched from the database',
+    ['mode'],
+)
+S3_DOWNLOAD_SECONDS = prometheus_client.Histogram(
+    'dsw_seed_s3_download_duration_seconds',
+    'Duration of S3 object downloads (time to first byte for streamed objects)',
+    ['operation'],
+)
+S3_DOWNLOADS = prometheus_client.Counter(
+    'dsw_seed_s3_downloads',
+    'S3 objects requested for download',
+    ['result'],
+)
+S3_BYTES = prometheus_client.Counter(
+    'dsw_seed_s3_downloaded_bytes',
+    'Bytes downloaded from S3',
+)
+RETRIES = prometheus_client.Counter(
+    'dsw_seed_retries',
+    'Failed attempts of database and S3 operations that are retried',
+    ['operation'],
+)
+STAGE_SECONDS = prometheus_client.Histogram(
+    'dsw_seed_stage_duration_seconds',
+    'Duration of seed export stages',
+    ['stage'],
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+RESOURCE_SECONDS = prometheus_client.Histogram(
+    'dsw_seed_resource_duration_seconds',
+    'Duration of writing SQL for a resource type',
+    ['resource_type'],
+)
+RESOURCE_ENTITIES = prometheus_client.Counter(
+    'dsw_seed_resource_entities',
+    'Entities written to seed packages per resource type',
+    ['resource_type'],
+)
+
+_METRICS = (
+    DB_QUERY_SECONDS, DB_ROWS, S3_DOWNLOAD_SECONDS, S3_DOWNLOADS, S3_BYTES, RETRIES,
+    STAGE_SECONDS, RESOURCE_SECONDS, RESOURCE_ENTITIES,
+)
+
+Snapshot = dict[tuple[str, tuple[tuple[str, str], ...]], float]
+
+
+def count_retry(operation: str) -> Callable[[tenacity.RetryCallState], None]:
+    # tenacity before_sleep hook, called only when another attempt follows
+    def before_sleep(retry_state: tenacity.RetryCallState):
+        del retry_state
+        RETRIES.labels(operation=operation).inc()
+    return before_sleep
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[None]:
+    with STAGE_SECONDS.labels(stage=name).time():
+        yield
+
+
+def exposition() -> tuple[bytes, str]:
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
+
+
+def snapshot() -> Snapshot:
+    values: Snapshot = {}
+    for metric in _METRICS:
+        for family in metric.collect():
+            for sample in family.samples:
+                if sample.name.endswith('_created'):
+                    continue
+                values[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return values
+
+
+class _Delta:
+
+    def __init__(self, before: Snapshot, after: Snapshot):
+        self.values = {
+            key: value - before.get(key, 0.0)
+            for key, value in after.items()
+            if value != before.get(key, 0.0)
+        }
+
+    def total(self, name: str) -> float:
+        return sum(value for (sample, _), value in self.values.items() if sample == name)
+
+    def by_label(self, name: str, label: str) -> dict[str, float]:
+        result: dict[str, float] = {}
+        for (sample, labels), value in self.values.items():
+            if sample == name:
+                key = dict(labels)[label]
+                result[key] = result.get(key, 0.0) + value
+        return result
+
+
+def _size(size: float) -> str:
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GiB'
+
+
+def summary(before: Snapshot | None = None) -> str:
+    # human-readable metrics recorded since the given snapshot
+    delta = _Delta(before or {}, snapshot())
+    stages = delta.by_label('dsw_seed_stage_duration_seconds_sum', 'stage')
+    entities = delta.by_label('dsw_seed_resource_entities_total', 'resource_type')
+    resource_times = delta.by_label('dsw_seed_resource_duration_seconds_sum', 'resource_type')
+    downloads = delta.by_label('dsw_seed_s3_downloads_total', 'result')
+    retries = delta.by_label('dsw_seed_retries_total', 'operation')
+    lines = [
+        'Stages: ' + (', '.join(
+            f'{name} {seconds:.2f}s' for name, seconds in stages.items()
+        ) or 'none'),
+        'Resources: ' + (', '.join(
+            f'{name} {count:.0f} ({resource_times.get(name, 0.0):.2f}s)'
+            for name, count in entities.items()
+        ) or 'none'),
+        f'Database: {delta.total("dsw_seed_db_query_duration_seconds_count"):.0f} queries, '
+        f'{delta.total("dsw_seed_db_rows_total"):.0f} rows, '
+        f'{delta.total("dsw_seed_db_query_duration_seconds_sum"):.2f}s',
+        f'S3: {downloads.get("ok", 0.0):.0f} objects '
+        f'({_size(delta.total("dsw_seed_s3_downloaded_bytes_total"))}), '
+        f'{downloads.get("missing", 0.0):.0f} missing, '
+        f'{delta.total("dsw_seed_s3_download_duration_seconds_sum"):.2f}s',
+        'Retries: ' + (', '.join(
+            f'{operation} {count:.0f}' for operation, count in retries.items()
+        ) or 'none'),
+    ]
+    return '\n'.join(lines)
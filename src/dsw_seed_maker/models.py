@@ -1,5 +1,13 @@
+import datetime
+import importlib.util
+from typing import Any, Literal
+
 import pydantic
 
+from .consts import DEFAULT_ROWS_PER_STATEMENT
+
+MAX_PAGE_SIZE = 1000
+
 
 class ExampleRequestDTO(pydantic.BaseModel):
     magic_code: str = pydantic.Field(alias='magicCode')
@@ -8,3 +16,49 @@ class ExampleRequestDTO(pydantic.BaseModel):
 
 class ExampleResponseDTO(pydantic.BaseModel):
     message: str = pydantic.Field(alias='message')
+
+
+class ListingQueryDTO(pydantic.BaseModel):
+    limit: int | None = pydantic.Field(default=None, ge=1, le=MAX_PAGE_SIZE)
+    cursor: str | None = None
+    name_prefix: str | None = None
+    created_after: datetime.datetime | None = None
+    km_id: str | None = None
+    package_id: str | None = None
+    template_id: str | None = None
+    project_uuid: str | None = None
+    sort: Literal['key', 'name', 'created_at'] = 'key'
+    order: Literal['asc', 'desc'] = 'asc'
+
+
+class SeedPackageRequestDTO(pydantic.BaseModel):
+    # same selection as the make-seed input file, e.g. {"projects": [{"uuid": "..."}]}
+    resources: dict[str, list[dict[str, Any]]]
+    sql_format: Literal['insert', 'multi-insert'] = 'insert'
+    rows_per_statement: int = pydantic.Field(default=DEFAULT_ROWS_PER_STATEMENT, ge=1)
+    archive_format: Literal['zip', 'tar.gz', 'tar.zst'] = 'zip'
+
+    @pydantic.field_validator('archive_format')
+    @classmethod
+    def check_archive_format(cls, value: str) -> str:
+        # rejected upfront rather than failing in the job, as TarOutput would
+        if value == 'tar.zst' and importlib.util.find_spec('zstandard') is None:
+            raise ValueError('Package "zstandard" is required for .tar.zst archives')
+        return value
+
+
+class SeedJobDTO(pydantic.BaseModel):
+    id: str
+    state: str
+    stage: str
+    entities_done: int
+    entities_total: int
+    objects_done: int
+    objects_total: int
+    bytes_downloaded: int
+    # seconds until the current stage finishes
+    eta: float | None
+    error: str | None
+    created_at: datetime.datetime
+    started_at: datetime.datetime | None
+    finished_at: datetime.datetime | None
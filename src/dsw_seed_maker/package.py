@@ -0,0 +1,243 @@
+import contextlib
+import io
+import logging
+import os
+import pathlib
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from typing import IO, Iterator, TextIO
+
+from .consts import DEFAULT_ENCODING
+
+LOG = logging.getLogger(__name__)
+
+ARCHIVE_TAR_GZ = 'tar.gz'
+ARCHIVE_TAR_ZST = 'tar.zst'
+ARCHIVE_ZIP = 'zip'
+ARCHIVE_SUFFIXES = {
+    '.tar.gz': ARCHIVE_TAR_GZ,
+    '.tgz': ARCHIVE_TAR_GZ,
+    '.tar.zst': ARCHIVE_TAR_ZST,
+    '.tzst': ARCHIVE_TAR_ZST,
+    '.zip': ARCHIVE_ZIP,
+}
+# tar needs the member size upfront, generated files are kept in memory up to this size
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def archive_format(path: pathlib.Path) -> str:
+    name = path.name.lower()
+    for suffix, fmt in ARCHIVE_SUFFIXES.items():
+        if name.endswith(suffix):
+            return fmt
+    raise ValueError(f'Unsupported archive type: {path.name} '
+                     f'(use one of {", ".join(ARCHIVE_SUFFIXES)})')
+
+
+class SeedOutput:
+    # Destination of seed package files; paths are relative to the package root
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def local_path(self, name: str) -> pathlib.Path | None:  # pylint: disable=unused-argument
+        # path to write the file directly, None if it must be streamed
+        return None
+
+    @contextlib.contextmanager
+    def open_text(self, name: str) -> Iterator[TextIO]:
+        raise NotImplementedError
+
+    def write_stream(self, name: str, stream: IO[bytes], size: int):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def abort(self):
+        self.close()
+
+
+class DirectoryOutput(SeedOutput):
+
+    def __init__(self, output_dir: pathlib.Path):
+        self.output_dir = output_dir
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def __str__(self):
+        return str(self.output_dir)
+
+    def local_path(self, name: str) -> pathlib.Path:
+        path = self.output_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    @contextlib.contextmanager
+    def open_text(self, name: str) -> Iterator[TextIO]:
+        # written next to the target and renamed, readers never see partial files
+        path = self.local_path(name)
+        part_path = path.with_name(f'.{path.name}.part')
+        try:
+            with part_path.open('w', encoding=DEFAULT_ENCODING) as file:
+                yield file
+            os.replace(part_path, path)
+        finally:
+            part_path.unlink(missing_ok=True)
+
+    def write_stream(self, name: str, stream: IO[bytes], size: int):
+        with self.local_path(name).open('wb') as file:
+            shutil.copyfileobj(stream, file, COPY_BUFFER_SIZE)
+
+
+class _ArchiveOutput(SeedOutput):
+    # Archive is written to a temporary file next to the target and renamed when complete
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._part_path = path.with_name(f'.{path.name}.part')
+        self._file = self._part_path.open('wb')
+        # members are written one by one, concurrent writers wait for their turn
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return str(self.path)
+
+    def _add(self, name: str, stream: IO[bytes], size: int):
+        raise NotImplementedError
+
+    def _finish(self):
+        raise NotImplementedError
+
+    def _discard(self):
+        self._file.close()
+        self._part_path.unlink(missing_ok=True)
+
+    def write_stream(self, name: str, stream: IO[bytes], size: int):
+        # the stream (e.g., an S3 response) is read without the lock, so parallel
+        # downloads wait only for the members to be appended
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as buffer:
+            shutil.copyfileobj(stream, buffer, COPY_BUFFER_SIZE)
+            size = buffer.tell()
+            buffer.seek(0)
+            with self._lock:
+                self._add(name, buffer, size)
+
+    def close(self):
+        with self._lock:
+            try:
+                self._finish()
+            finally:
+                self._file.close()
+            os.replace(self._part_path, self.path)
+        LOG.info('Seed package written to %s', self.path)
+
+    def abort(self):
+        with self._lock:
+            try:
+                self._finish()
+            except Exception:  # pylint: disable=broad-exception-caught
+                pass
+            finally:
+                self._file.close()
+                self._part_path.unlink(missing_ok=True)
+        LOG.warning('Seed package %s was not completed', self.path)
+
+
+class TarOutput(_ArchiveOutput):
+
+    def __init__(self, path: pathlib.Path, compression: str):
+        super().__init__(path)
+        # pylint: disable=consider-using-with
+        self._zstd_writer = None
+        try:
+            if compression == 'zst':
+                try:
+                    import zstandard  # pylint: disable=import-outside-toplevel
+                except ImportError as e:
+                    raise ValueError(
+                        'Package "zstandard" is required for .tar.zst archives'
+                    ) from e
+                self._zstd_writer = zstandard.ZstdCompressor().stream_writer(
+                    self._file, closefd=False,
+                )
+                self._tar = tarfile.open(fileobj=self._zstd_writer, mode='w|')
+            else:
+                self._tar = tarfile.open(fileobj=self._file,  # type: ignore
+                                         mode=f'w|{compression}')
+        except BaseException:
+            if self._zstd_writer is not None:
+                self._zstd_writer.close()
+            self._discard()
+            raise
+
+    def _add(self, name: str, stream: IO[bytes], size: int):
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        self._tar.addfile(info, stream)
+
+    @contextlib.contextmanager
+    def open_text(self, name: str) -> Iterator[TextIO]:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as buffer:
+            text = io.TextIOWrapper(buffer, encoding=DEFAULT_ENCODING)
+            try:
+                yield text
+                text.flush()
+                size = buffer.tell()
+                buffer.seek(0)
+                with self._lock:
+                    self._add(name, buffer, size)
+            finally:
+                text.detach()
+
+    def _finish(self):
+        self._tar.close()
+        if self._zstd_writer is not None:
+            self._zstd_writer.close()
+
+
+class ZipOutput(_ArchiveOutput):
+
+    def __init__(self, path: pathlib.Path):
+        super().__init__(path)
+        # pylint: disable-next=consider-using-with
+        self._zip = zipfile.ZipFile(self._file, mode='w', compression=zipfile.ZIP_DEFLATED)
+
+    @contextlib.contextmanager
+    def open_text(self, name: str) -> Iterator[TextIO]:
+        # zip members can be streamed without knowing their size
+        with self._lock:
+            with self._zip.open(name, mode='w', force_zip64=True) as member:
+                with io.TextIOWrapper(member, encoding=DEFAULT_ENCODING) as text:
+                    yield text
+
+    def _add(self, name: str, stream: IO[bytes], size: int):
+        with self._zip.open(name, mode='w', force_zip64=size >= zipfile.ZIP64_LIMIT) as member:
+            shutil.copyfileobj(stream, member, COPY_BUFFER_SIZE)
+
+    def _finish(self):
+        self._zip.close()
+
+
+def open_output(output_dir: str | pathlib.Path, archive: str | pathlib.Path | None = None,
+                ) -> SeedOutput:
+    if archive is None:
+        return DirectoryOutput(pathlib.Path(output_dir))
+    archive = pathlib.Path(archive)
+    fmt = archive_format(archive)
+    if fmt == ARCHIVE_ZIP:
+        return ZipOutput(archive)
+    return TarOutput(archive, compression='gz' if fmt == ARCHIVE_TAR_GZ else 'zst')
@@ -0,0 +1,380 @@
+import collections
+import concurrent.futures
+import dataclasses
+import logging
+from typing import Any, Callable, Iterable
+
+from psycopg import sql
+
+from .comm.db import Database
+from .comm.s3 import DOCUMENTS_DIR
+from .consts import DEFAULT_FETCH_BATCH_SIZE
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_LOCALE_ID = 'wizard:default:1.0.0'
+# only rendered documents have a file in S3
+DOCUMENT_DONE_STATE = 'DoneDocumentState'
+# all exported tables are partitioned by tenant
+TENANT_COLUMN = 'tenant_uuid'
+
+
+@dataclasses.dataclass(frozen=True)
+class EntityKey:
+    resource_type: str
+    entity_id: str
+
+    def __str__(self):
+        return f'{self.resource_type}[{self.entity_id}]'
+
+
+@dataclasses.dataclass(frozen=True)
+class S3Object:
+    object_name: str
+    target_path: str
+    # generated file (e.g., rendered document) the app can recreate, subject to
+    # download limits and left out of the package when over them
+    artifact: bool = False
+
+
+@dataclasses.dataclass
+class Entity:
+    key: EntityKey
+    row: dict[str, Any]
+    dependencies: list[EntityKey] = dataclasses.field(default_factory=list)
+    children: list[tuple[str, dict[str, Any]]] = dataclasses.field(default_factory=list)
+    s3_objects: list[S3Object] = dataclasses.field(default_factory=list)
+
+    @property
+    def resource_type(self) -> str:
+        return self.key.resource_type
+
+
+@dataclasses.dataclass(frozen=True)
+class ResourceSpec:
+    table: str
+    id_column: str
+    id_type: str = 'text'
+    # (column, resource type) pairs pointing to entities that must be inserted first
+    dependencies: tuple[tuple[str, str], ...] = ()
+    # (table, foreign key column) pairs of rows owned by the entity
+    children: tuple[tuple[str, str], ...] = ()
+    # self-referencing column (e.g., previous version), whole chains are fetched at once
+    chain_column: str | None = None
+    skip_ids: frozenset[str] = frozenset()
+
+
+# Order of resource types in the seed; each type depends only on types before it
+# (or on itself, e.g., knowledge model versions)
+RESOURCES: dict[str, ResourceSpec] = {
+    'users': ResourceSpec(
+        table='user_entity',
+        id_column='uuid',
+        id_type='uuid',
+    ),
+    'project_importers': ResourceSpec(
+        table='questionnaire_importer',
+        id_column='id',
+    ),
+    'locales': ResourceSpec(
+        table='locale',
+        id_column='id',
+        skip_ids=frozenset({DEFAULT_LOCALE_ID}),
+    ),
+    'knowledge_models': ResourceSpec(
+        table='package',
+        id_column='id',
+        dependencies=(('previous_package_id', 'knowledge_models'),),
+        chain_column='previous_package_id',
+    ),
+    'document_templates': ResourceSpec(
+        table='document_template',
+        id_column='id',
+        children=(
+            ('document_template_file', 'document_template_id'),
+            ('document_template_asset', 'document_template_id'),
+        ),
+    ),
+    'projects': ResourceSpec(
+        table='questionnaire',
+        id_column='uuid',
+        id_type='uuid',
+        dependencies=(
+            ('package_id', 'knowledge_models'),
+            ('document_template_id', 'document_templates'),
+        ),
+    ),
+    'documents': ResourceSpec(
+        table='document',
+        id_column='uuid',
+        id_type='uuid',
+        dependencies=(
+            ('document_template_id', 'document_templates'),
+            ('questionnaire_uuid', 'projects'),
+        ),
+    ),
+}
+
+
+def _locale_s3_objects(entity: Entity) -> list[S3Object]:
+    return [S3Object(
+        object_name=f'locales/{entity.key.entity_id}',
+        target_path=f'app/locales/{entity.row["name"]}',
+    )]
+
+
+def _document_template_s3_objects(entity: Entity) -> list[S3Object]:
+    template_id = entity.key.entity_id
+    template_dir = template_id.replace(':', '_')
+    return [
+        S3Object(
+            object_name=f'templates/{template_id}/{row["uuid"]}',
+            target_path=f'app/document_templates/{template_dir}/asset_{row["uuid"]}',
+        )
+        for table, row in entity.children
+        if table == 'document_template_asset'
+    ]
+
+
+def _document_s3_objects(entity: Entity) -> list[S3Object]:
+    if entity.row.get('state') != DOCUMENT_DONE_STATE:
+        return []
+    return [S3Object(
+        object_name=f'{DOCUMENTS_DIR}/{entity.key.entity_id}',
+        target_path=f'app/{DOCUMENTS_DIR}/{entity.key.entity_id}',
+        artifact=True,
+    )]
+
+
+S3_OBJECTS = {
+    'locales': _locale_s3_objects,
+    'document_templates': _document_template_s3_objects,
+    'documents': _document_s3_objects,
+}
+# table -> columns read by the getters above (besides ids and foreign keys)
+S3_OBJECT_COLUMNS = {
+    'locale': ('name',),
+    'document_template_asset': ('uuid',),
+    'document': ('state',),
+}
+
+
+class SeedPlan:
+
+    def __init__(self, tenant_uuid: str | None = None):
+        self.tenant_uuid = tenant_uuid
+        self.entities: dict[EntityKey, Entity] = {}
+        self.missing: list[EntityKey] = []
+
+    def __len__(self):
+        return len(self.entities)
+
+    def add(self, entity: Entity):
+        self.entities[entity.key] = entity
+
+    def ordered(self) -> list[Entity]:
+        # Topological order (dependencies first) using iterative DFS post-order,
+        # deterministic with respect to the order in which entities were resolved
+        result: list[Entity] = []
+        done: set[EntityKey] = set()
+        for root, root_entity in self.entities.items():
+            if root in done:
+                continue
+            done.add(root)
+            stack = [(root, iter(root_entity.dependencies))]
+            while stack:
+                key, deps = stack[-1]
+                dep = next((d for d in deps if d not in done), None)
+                if dep is None:
+                    stack.pop()
+                    result.append(self.entities[key])
+                elif dep in self.entities:
+                    done.add(dep)
+                    stack.append((dep, iter(self.entities[dep].dependencies)))
+        return result
+
+    def by_resource_type(self) -> list[tuple[str, list[Entity]]]:
+        groups: dict[str, list[Entity]] = {resource_type: [] for resource_type in RESOURCES}
+        for entity in self.ordered():
+            groups[entity.resource_type].append(entity)
+        return [(resource_type, entities) for resource_type, entities in groups.items() if entities]
+
+    @property
+    def s3_objects(self) -> list[S3Object]:
+        return [s3_object for entity in self.ordered() for s3_object in entity.s3_objects]
+
+
+# child rows per entity id
+_Children = dict[str, list[tuple[str, dict[str, Any]]]]
+# requested entity ids, fetched rows by id, and their children
+_Batch = tuple[list[str], dict[str, dict[str, Any]], _Children]
+
+
+class SeedPlanner:
+
+    def __init__(self, db: Database, batch_size: int = DEFAULT_FETCH_BATCH_SIZE,
+                 tenant_uuid: str | None = None, workers: int = 1):
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        # tables of a wave are fetched concurrently, the DB must be safe to share
+        # between threads then (i.e., pooled)
+        self.workers = max(1, workers)
+        # rows of other tenants are not fetched, None exports regardless of tenant
+        self.tenant_uuid = tenant_uuid
+        self._pending: dict[str, list[str]] = collections.defaultdict(list)
+        self._visited: set[EntityKey] = set()
+
+    def add(self, resource_type: str, entity_id: Any):
+        if resource_type not in RESOURCES:
+            raise ValueError(f'Invalid resource type: {resource_type}')
+        if entity_id is None:
+            return
+        key = EntityKey(resource_type, str(entity_id))
+        if self._visit(key):
+            self._pending[resource_type].append(key.entity_id)
+
+    def _visit(self, key: EntityKey) -> bool:
+        if key in self._visited:
+            return False
+        self._visited.add(key)
+        return True
+
+    def add_all(self, resource_type: str, entity_ids: Iterable[Any]):
+        for entity_id in entity_ids:
+            self.add(resource_type, entity_id)
+
+    def resolve(self, check_cancelled: Callable[[], None] | None = None) -> SeedPlan:
+        plan = SeedPlan(tenant_uuid=self.tenant_uuid)
+        # Breadth-first in waves, each wave fetches all pending ids per table at once;
+        # check_cancelled may raise to abort between waves
+        while self._pending:
+            if check_cancelled is not None:
+                check_cancelled()
+            pending, self._pending = self._pending, collections.defaultdict(list)
+            # fetched results are applied in the order of resource types regardless
+            # of which fetch finished first, so the plan stays deterministic
+            for resource_type, batch in zip(pending, self._fetch_wave(pending)):
+                self._resolve_batch(plan, resource_type, *batch)
+        LOG.info('Resolved seed plan with %d entities', len(plan))
+        return plan
+
+    def _fetch_wave(self, pending: dict[str, list[str]]) -> list[_Batch]:
+        if self.workers == 1 or len(pending) == 1:
+            return [self._fetch_batch(rt, entity_ids) for rt, entity_ids in pending.items()]
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(self.workers, len(pending)),
+            thread_name_prefix='seed-plan',
+        ) as executor:
+            futures = [executor.submit(self._fetch_batch, rt, entity_ids)
+                       for rt, entity_ids in pending.items()]
+            return [future.result() for future in futures]
+
+    def _fetch_batch(self, resource_type: str, entity_ids: list[str]) -> _Batch:
+        spec = RESOURCES[resource_type]
+        entity_ids = [entity_id for entity_id in entity_ids if entity_id not in spec.skip_ids]
+        if len(entity_ids) == 0:
+            return entity_ids, {}, {}
+        if spec.chain_column is None:
+            fetched = self._fetch_rows(spec.table, spec.id_column, spec.id_type, entity_ids)
+        else:
+            fetched = self._fetch_chains(spec, entity_ids)
+        rows = {str(row[spec.id_column]): row for row in fetched}
+        return entity_ids, rows, self._fetch_children(spec, list(rows))
+
+    def _resolve_batch(self, plan: SeedPlan, resource_type: str, entity_ids: list[str],
+                       rows: dict[str, dict[str, Any]], children: _Children):
+        spec = RESOURCES[resource_type]
+        if spec.chain_column is not None:
+            # ancestors come along with the chain, take them over in oldest-first order
+            requested = set(entity_ids)
+            chain_ids = []
+            for entity_id in rows:
+                if entity_id in requested or self._visit(EntityKey(resource_type, entity_id)):
+                    chain_ids.append(entity_id)
+            entity_ids = chain_ids + [eid for eid in entity_ids if eid not in rows]
+        for entity_id in entity_ids:
+            key = EntityKey(resource_type, entity_id)
+            if entity_id not in rows:
+                LOG.warning('Entity %s not found in database', key)
+                plan.missing.append(key)
+                continue
+            plan.add(self._create_entity(key, spec, rows[entity_id], children[entity_id]))
+
+    def _fetch_children(self, spec: ResourceSpec, entity_ids: list[str]) -> _Children:
+        children: _Children = collections.defaultdict(list)
+        if len(entity_ids) == 0:
+            return children
+        for child_table, fk_column in spec.children:
+            for child_row in self._fetch_rows(child_table, fk_column, spec.id_type, entity_ids):
+                children[str(child_row[fk_column])].append((child_table, child_row))
+        return children
+
+    def _create_entity(self, key: EntityKey, spec: ResourceSpec, row: dict[str, Any],
+                       children: list[tuple[str, dict[str, Any]]]) -> Entity:
+        entity = Entity(key=key, row=row, children=children)
+        for column, dep_type in spec.dependencies:
+            dep_id = row.get(column)
+            if dep_id is None:
+                continue
+            entity.dependencies.append(EntityKey(dep_type, str(dep_id)))
+            self.add(dep_type, dep_id)
+        s3_objects_getter = S3_OBJECTS.get(key.resource_type)
+        if s3_objects_getter is not None:
+            entity.s3_objects.extend(s3_objects_getter(entity))
+        return entity
+
+    def _fetch_chains(self, spec: ResourceSpec, values: list[str]) -> list[dict[str, Any]]:
+        query = sql.SQL(
+            'WITH RECURSIVE chain ({id_column}, {chain_column}) AS ('
+            ' SELECT t.{id_column}, t.{chain_column} FROM {table} t'
+            ' WHERE t.{id_column} = ANY(%(values)s::{column_type}[]){tenant_filter}'
+            ' UNION'
+            ' SELECT t.{id_column}, t.{chain_column} FROM {table} t'
+            ' JOIN chain c ON t.{id_column} = c.{chain_column}{tenant_filter}'
+            ') SELECT {select_list} FROM {table} t'
+            ' JOIN chain c ON t.{id_column} = c.{id_column}{tenant_filter}'
+        ).format(
+            select_list=self._select_list(spec.table, 't'),
+            table=sql.Identifier(spec.table),
+            id_column=sql.Identifier(spec.id_column),
+            chain_column=sql.Identifier(spec.chain_column or spec.id_column),
+            column_type=sql.SQL(spec.id_type),
+            tenant_filter=self._tenant_filter('t'),
+        )
+        rows: dict[str, dict[str, Any]] = {}
+        for start in range(0, len(values), self.batch_size):
+            for row in self.db.execute_query(query, values=values[start:start + self.batch_size],
+                                             **self._tenant_params()):
+                rows.setdefault(str(row[spec.id_column]), row)
+        return sorted(rows.values(), key=lambda row: row['created_at'])
+
+    def _fetch_rows(self, table: str, column: str, column_type: str,
+                    values: list[str]) -> list[dict[str, Any]]:
+        query = sql.SQL(
+            'SELECT {select_list} FROM {table} WHERE {column} = ANY(%(values)s::{column_type}[])'
+        ).format(
+            select_list=self._select_list(table),
+            table=sql.Identifier(table),
+            column=sql.Identifier(column),
+            column_type=sql.SQL(column_type),
+        ) + self._tenant_filter()
+        rows: list[dict[str, Any]] = []
+        for start in range(0, len(values), self.batch_size):
+            rows.extend(self.db.execute_query(query, values=values[start:start + self.batch_size],
+                                              **self._tenant_params()))
+        return rows
+
+    def _select_list(self, table: str, alias: str | None = None) -> sql.Composable:
+        del table
+        if alias is None:
+            return sql.SQL('*')
+        return sql.SQL('{alias}.*').format(alias=sql.Identifier(alias))
+
+    def _tenant_filter(self, alias: str | None = None) -> sql.Composable:
+        if self.tenant_uuid is None:
+            return sql.SQL('')
+        column = sql.Identifier(alias, TENANT_COLUMN) if alias else sql.Identifier(TENANT_COLUMN)
+        return sql.SQL(' AND {column} = %(tenant_uuid)s::uuid').format(column=column)
+
+    def _tenant_params(self) -> dict[str, str]:
+        return {} if self.tenant_uuid is None else {'tenant_uuid': self.tenant_uuid}
@@ -0,0 +1,65 @@
+import dataclasses
+import threading
+import time
+
+from .downloader import DownloadReport, log_progress
+from .planner import S3Object
+
+
+class SeedCancelled(Exception):
+    pass
+
+
+@dataclasses.dataclass
+class SeedProgress:  # pylint: disable=too-many-instance-attributes
+    # Updated by the thread running the export, read by anyone watching it;
+    # cancellation is cooperative, checked between resource types and S3 objects
+    stage: str = 'queued'
+    entities_total: int = 0
+    entities_done: int = 0
+    objects_total: int = 0
+    objects_done: int = 0
+    bytes_downloaded: int = 0
+    stage_started_at: float | None = None
+    cancel_event: threading.Event = dataclasses.field(default_factory=threading.Event)
+
+    def start_stage(self, stage: str):
+        self.check_cancelled()
+        self.stage = stage
+        self.stage_started_at = time.monotonic()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise SeedCancelled('Seed export cancelled')
+
+    def add_entities(self, count: int):
+        self.entities_done += count
+        self.check_cancelled()
+
+    def on_download(self, report: DownloadReport, total: int, s3_object: S3Object):
+        log_progress(report, total, s3_object)
+        self.objects_done = report.processed
+        self.bytes_downloaded = report.bytes_downloaded
+        self.check_cancelled()
+
+    @property
+    def eta(self) -> float | None:
+        # seconds until the current stage finishes, extrapolated from its rate so far
+        # (writing SQL and downloading objects proceed at very different rates)
+        if self.stage == 'sql':
+            done, total = self.entities_done, self.entities_total
+        elif self.stage == 'download':
+            done, total = self.objects_done, self.objects_total
+        else:
+            return None
+        if self.stage_started_at is None or done == 0:
+            return None
+        elapsed = time.monotonic() - self.stage_started_at
+        return elapsed * (total - done) / done
@@ -0,0 +1,35 @@
+import copy
+import dataclasses
+import json
+import pathlib
+from typing import Any
+
+from .consts import DEFAULT_ENCODING
+from .package import SeedOutput
+
+RECIPE_FILE = 'recipe.json'
+RECIPE_TEMPLATE = pathlib.Path(__file__).parent / 'recipe_tmp.json'
+
+
+@dataclasses.dataclass
+class Recipe:
+    template: dict[str, Any]
+    scripts: list[str] = dataclasses.field(default_factory=list)
+
+    @classmethod
+    def from_template(cls, template_path: pathlib.Path = RECIPE_TEMPLATE) -> 'Recipe':
+        with template_path.open('r', encoding=DEFAULT_ENCODING) as template_file:
+            return cls(template=json.load(template_file))
+
+    def add_script(self, filename: str):
+        self.scripts.append(filename)
+
+    def to_dict(self) -> dict[str, Any]:
+        data = copy.deepcopy(self.template)
+        data['db']['scripts'].extend({'filename': script} for script in self.scripts)
+        return data
+
+    def write(self, output: SeedOutput):
+        content = json.dumps(self.to_dict(), ensure_ascii=False, indent=4)
+        with output.open_text(RECIPE_FILE) as recipe_file:
+            recipe_file.write(content)
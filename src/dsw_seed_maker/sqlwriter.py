@@ -0,0 +1,231 @@
+import itertools
+import json
+import math
+import uuid
+from datetime import date, datetime, time
+from typing import Any, Callable, Iterable, TextIO
+
+from psycopg import sql
+
+from .comm.db import Database
+from .consts import DEFAULT_ROWS_PER_STATEMENT, SQL_FORMAT_INSERT, SQL_FORMAT_MULTI_INSERT, \
+    SQL_FORMATS
+
+SQL_NULL = 'NULL'
+
+ValueEncoder = Callable[[Any], str]
+RowEncoder = Callable[[Iterable[Any]], str]
+
+# PostgreSQL type (udt_name) -> kind of encoder, anything else is encoded as text
+_TYPE_KINDS = {
+    'bool': 'bool',
+    'int2': 'integer',
+    'int4': 'integer',
+    'int8': 'integer',
+    'numeric': 'float',
+    'float4': 'float',
+    'float8': 'float',
+    'uuid': 'plain',
+    'date': 'plain',
+    'time': 'plain',
+    'timetz': 'plain',
+    'timestamp': 'plain',
+    'timestamptz': 'plain',
+    'json': 'json',
+    'jsonb': 'json',
+    'bytea': 'bytea',
+}
+
+# Python type -> kind of encoder, used for columns with unknown type
+_PYTHON_KINDS = {
+    bool: 'bool',
+    int: 'integer',
+    float: 'float',
+    uuid.UUID: 'plain',
+    date: 'plain',
+    time: 'plain',
+    datetime: 'plain',
+    dict: 'json',
+    bytes: 'bytea',
+    bytearray: 'bytea',
+    memoryview: 'bytea',
+    list: 'array',
+}
+
+
+def _sql_quote(text: str) -> str:
+    # standard_conforming_strings: only single quotes need escaping
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _bytea_text(value) -> str:
+    return '\\x' + bytes(value).hex()
+
+
+def _float_text(value) -> str:
+    if isinstance(value, float) and not math.isfinite(value):
+        return 'NaN' if math.isnan(value) else ('Infinity' if value > 0 else '-Infinity')
+    return str(value)
+
+
+def _element_text(value) -> str:
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, dict):
+        return json.dumps(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return _bytea_text(value)
+    return str(value)
+
+
+def _array_text(value) -> str:
+    # PostgreSQL array literal, elements always double-quoted so commas,
+    # braces, quotes and backslashes inside values survive
+    items = []
+    for item in value:
+        if item is None:
+            items.append('NULL')
+        elif isinstance(item, (list, tuple)):
+            items.append(_array_text(item))
+        else:
+            items.append('"' + _element_text(item).replace('\\', '\\\\').replace('"', '\\"') + '"')
+    return '{' + ','.join(items) + '}'
+
+
+_SQL_ENCODERS: dict[str, ValueEncoder] = {
+    'bool': lambda value: 'TRUE' if value else 'FALSE',
+    'integer': str,
+    # quoted, so NaN and infinities are valid literals too
+    'float': lambda value: "'" + _float_text(value) + "'",
+    'plain': lambda value: "'" + str(value) + "'",
+    'json': lambda value: _sql_quote(json.dumps(value)),
+    'bytea': lambda value: "'" + _bytea_text(value) + "'",
+    'array': lambda value: _sql_quote(_array_text(value)),
+    'text': lambda value: _sql_quote(str(value)),
+}
+
+
+def _dynamic_encoder(value) -> str:
+    return _SQL_ENCODERS[_PYTHON_KINDS.get(type(value), 'text')](value)
+
+
+class EncoderRegistry:
+
+    def __init__(self, column_types: dict[str, dict[str, str]] | None = None):
+        # table -> column -> PostgreSQL type (udt_name, arrays start with "_")
+        self.column_types = column_types or {}
+        self._row_encoders: dict[tuple[str, tuple[str, ...]], RowEncoder] = {}
+
+    @classmethod
+    def from_database(cls, db: Database, tables: Iterable[str]) -> 'EncoderRegistry':
+        query = sql.SQL(
+            'SELECT table_name, column_name, udt_name FROM information_schema.columns'
+            ' WHERE table_schema = current_schema() AND table_name = ANY(%(tables)s::text[])'
+        )
+        column_types: dict[str, dict[str, str]] = {}
+        for row in db.execute_query(query, tables=sorted(set(tables))):
+            column_types.setdefault(row['table_name'], {})[row['column_name']] = row['udt_name']
+        return cls(column_types)
+
+    def row_encoder(self, table: str, columns: tuple[str, ...]) -> RowEncoder:
+        key = (table, columns)
+        row_encoder = self._row_encoders.get(key)
+        if row_encoder is None:
+            row_encoder = self._compile(table, columns)
+            self._row_encoders[key] = row_encoder
+        return row_encoder
+
+    def _compile(self, table: str, columns: tuple[str, ...]) -> RowEncoder:
+        types = self.column_types.get(table, {})
+        column_encoders = [self._column_encoder(types.get(column)) for column in columns]
+
+        def encode(values: Iterable[Any]) -> str:
+            return ', '.join([
+                SQL_NULL if value is None else encoder(value)
+                for encoder, value in zip(column_encoders, values)
+            ])
+        return encode
+
+    @staticmethod
+    def _column_encoder(column_type: str | None) -> ValueEncoder:
+        if column_type is None:
+            return _dynamic_encoder
+        if column_type.startswith('_'):
+            return _SQL_ENCODERS['array']
+        return _SQL_ENCODERS[_TYPE_KINDS.get(column_type, 'text')]
+
+
+def fetch_primary_keys(db: Database, tables: Iterable[str]) -> dict[str, tuple[str, ...]]:
+    query = sql.SQL(
+        'SELECT tc.table_name, kcu.column_name FROM information_schema.table_constraints tc'
+        ' JOIN information_schema.key_column_usage kcu'
+        ' ON kcu.constraint_name = tc.constraint_name AND kcu.table_schema = tc.table_schema'
+        ' AND kcu.table_name = tc.table_name'
+        " WHERE tc.constraint_type = 'PRIMARY KEY' AND tc.table_schema = current_schema()"
+        ' AND tc.table_name = ANY(%(tables)s::text[])'
+        ' ORDER BY tc.table_name, kcu.ordinal_position'
+    )
+    primary_keys: dict[str, tuple[str, ...]] = {}
+    for row in db.execute_query(query, tables=sorted(set(tables))):
+        primary_keys[row['table_name']] = primary_keys.get(row['table_name'], ()) + (
+            row['column_name'],
+        )
+    return primary_keys
+
+
+class SeedSqlWriter:
+
+    def __init__(self, output: TextIO, sql_format: str = SQL_FORMAT_INSERT,
+                 rows_per_statement: int = DEFAULT_ROWS_PER_STATEMENT,
+                 encoders: EncoderRegistry | None = None,
+                 conflict_keys: dict[str, tuple[str, ...]] | None = None):
+        if sql_format not in SQL_FORMATS:
+            raise ValueError(f'Invalid SQL format: {sql_format}')
+        self.output = output
+        self.sql_format = sql_format
+        self.rows_per_statement = max(1, rows_per_statement)
+        self.encoders = encoders or EncoderRegistry()
+        # table -> key columns, rows of these tables are upserted
+        self.conflict_keys = conflict_keys
+
+    def write_rows(self, table: str, rows: Iterable[dict[str, Any]]):
+        # consecutive rows with the same columns are written together
+        for columns, group in itertools.groupby(rows, key=lambda row: tuple(row.keys())):
+            encode = self.encoders.row_encoder(table, columns)
+            header = f'{table} ({", ".join(columns)})'
+            if self.sql_format == SQL_FORMAT_INSERT:
+                self._write_inserts(header, self._statement_end(table, columns), encode, group)
+            elif self.sql_format == SQL_FORMAT_MULTI_INSERT:
+                self._write_multi_inserts(header, self._statement_end(table, columns),
+                                          encode, group)
+
+    def _statement_end(self, table: str, columns: tuple[str, ...]) -> str:
+        if self.conflict_keys is None or table not in self.conflict_keys:
+            return ';\n'
+        keys = self.conflict_keys[table]
+        updates = [f'{column} = EXCLUDED.{column}' for column in columns if column not in keys]
+        action = f'DO UPDATE SET {", ".join(updates)}' if updates else 'DO NOTHING'
+        return f'\nON CONFLICT ({", ".join(keys)}) {action};\n'
+
+    def _write_inserts(self, header: str, end: str, encode: RowEncoder,
+                       rows: Iterable[dict[str, Any]]):
+        write = self.output.write
+        for row in rows:
+            write(f'INSERT INTO {header} VALUES (')
+            write(encode(row.values()))
+            write(')')
+            write(end)
+
+    def _write_multi_inserts(self, header: str, end: str, encode: RowEncoder,
+                             rows: Iterable[dict[str, Any]]):
+        write = self.output.write
+        for index, row in enumerate(rows):
+            if index % self.rows_per_statement == 0:
+                if index > 0:
+                    write(end)
+                write(f'INSERT INTO {header} VALUES\n    (')
+            else:
+                write(',\n    (')
+            write(encode(row.values()))
+            write(')')
+        write(end)
@@ -0,0 +1,74 @@
+import collections
+import hashlib
+import pathlib
+from typing import Any
+
+import pytest
+
+from dsw_seed_maker.comm.db import query_text
+from dsw_seed_maker.package import open_output
+
+from benchmarks.dataset import Dataset
+from benchmarks.fakes import FakeDatabase, FakeResponse
+
+
+class FakeS3:
+    # object name -> content, failing names raise on download
+
+    def __init__(self, objects: dict[str, bytes], failing: frozenset[str] = frozenset()):
+        self.objects = objects
+        self.failing = failing
+        self.bucket = 'test'
+
+    def ensure_bucket(self):
+        pass
+
+    def object_key(self, tenant_uuid: str, object_name: str) -> str:
+        return f'{tenant_uuid}/{object_name}'
+
+    def stat_object(self, file_name: str) -> tuple[str, int] | None:
+        content = self.objects.get(file_name)
+        if content is None:
+            return None
+        return hashlib.md5(content).hexdigest(), len(content)  # nosec B324
+
+    def _content(self, file_name: str) -> bytes | None:
+        if file_name in self.failing:
+            raise ConnectionError(f'Download of {file_name} failed')
+        return self.objects.get(file_name)
+
+    def download_file(self, file_name: str, target_path: pathlib.Path) -> bool:
+        content = self._content(file_name)
+        if content is None:
+            return False
+        target_path.write_bytes(content)
+        return True
+
+    def open_object(self, file_name: str) -> tuple[FakeResponse, int] | None:
+        content = self._content(file_name)
+        if content is None:
+            return None
+        return FakeResponse(content), len(content)
+
+
+class RecordingDatabase(FakeDatabase):
+    # answers from the given tables (others are empty) and records the queries
+
+    def __init__(self, **tables: list[dict[str, Any]]):
+        super().__init__(Dataset(
+            tables=collections.defaultdict(list, tables),
+            column_types={},
+            primary_keys={},
+            s3_objects={},
+        ))
+        self.queries: list[tuple[str, dict[str, Any]]] = []
+
+    def execute_query(self, query, **kwargs):
+        self.queries.append((query_text(query), kwargs))
+        return super().execute_query(query, **kwargs)
+
+
+@pytest.fixture
+def output(tmp_path):
+    with open_output(tmp_path / 'output') as seed_output:
+        yield seed_output
@@ -0,0 +1,61 @@
+import importlib.util
+
+import fastapi.testclient
+import pytest
+
+from dsw_seed_maker import api
+from dsw_seed_maker.api import app
+from dsw_seed_maker.cache import TTLCache
+from dsw_seed_maker.config import Config
+
+
+@pytest.fixture
+def client():
+    # without the lifespan, no DB pool or job manager is started
+    return fastapi.testclient.TestClient(app)
+
+
+def test_tar_zst_requires_zstandard(client, monkeypatch):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, 'find_spec',
+                        lambda name: None if name == 'zstandard' else find_spec(name))
+    response = client.post('/api/seed-package', json={
+        'resources': {'projects': []},
+        'archive_format': 'tar.zst',
+    })
+    assert response.status_code == 422
+    assert 'zstandard' in response.text
+
+
+@pytest.fixture
+def listing(monkeypatch):
+    entry = TTLCache(max_size=1).put(('users', 'all'), {'users': []}, ttl=0)
+
+    async def cached_list_logic_async(*args, **kwargs):  # pylint: disable=unused-argument
+        return entry
+
+    monkeypatch.setattr(api, 'cached_list_logic_async', cached_list_logic_async)
+    return entry
+
+
+@pytest.mark.parametrize('if_none_match, status_code', [
+    ('{etag}', 304),
+    ('W/{etag}', 304),
+    ('"other", W/{etag}', 304),
+    ('*', 304),
+    ('"other"', 200),
+])
+def test_listing_if_none_match(client, listing, if_none_match, status_code):
+    response = client.get('/api/users', headers={
+        'If-None-Match': if_none_match.format(etag=listing.etag),
+    })
+    assert response.status_code == status_code
+    assert response.headers['ETag'] == listing.etag
+
+
+def test_cache_flush_requires_proxy_user(client, monkeypatch):
+    monkeypatch.setattr(Config, 'SEED_JOBS_TRUST_USER_HEADER', False)
+    assert client.delete('/api/cache', headers={'X-Forwarded-User': 'admin'}).status_code == 403
+    monkeypatch.setattr(Config, 'SEED_JOBS_TRUST_USER_HEADER', True)
+    assert client.delete('/api/cache').status_code == 403
+    assert client.delete('/api/cache', headers={'X-Forwarded-User': 'admin'}).status_code == 204
@@ -0,0 +1,96 @@
+import asyncio
+import functools
+
+import pytest
+
+from dsw_seed_maker import cache, logic
+from dsw_seed_maker.cache import TTLCache, combine_entries, compute_etag
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_etag_depends_on_content_only():
+    assert compute_etag({'a': 1, 'b': [2]}) == compute_etag({'b': [2], 'a': 1})
+    assert compute_etag({'a': 1}) != compute_etag({'a': 2})
+    assert compute_etag({'a': 1}).startswith('"')
+
+
+def test_entries_expire(clock):
+    ttl_cache = TTLCache(max_size=4)
+    ttl_cache.put(('users', 'all'), {'users': []}, ttl=30)
+    clock[0] += 29
+    assert ttl_cache.get(('users', 'all')) is not None
+    clock[0] += 1
+    assert ttl_cache.get(('users', 'all')) is None
+
+
+def test_zero_ttl_is_not_stored(clock):  # pylint: disable=unused-argument
+    ttl_cache = TTLCache(max_size=4)
+    entry = ttl_cache.put(('projects', 'all'), {'projects': []}, ttl=0)
+    assert entry.value == {'projects': []}
+    assert len(ttl_cache) == 0
+
+
+def test_least_recently_used_is_evicted(clock):  # pylint: disable=unused-argument
+    ttl_cache = TTLCache(max_size=2)
+    ttl_cache.put(('a', 1), 'a', ttl=60)
+    ttl_cache.put(('b', 1), 'b', ttl=60)
+    assert ttl_cache.get(('a', 1)) is not None
+    ttl_cache.put(('c', 1), 'c', ttl=60)
+    assert ttl_cache.get(('b', 1)) is None
+    assert ttl_cache.get(('a', 1)) is not None
+    assert ttl_cache.get(('c', 1)) is not None
+
+
+def test_unchanged_value_keeps_last_modified(clock):
+    ttl_cache = TTLCache(max_size=2)
+    first = ttl_cache.put(('a', 1), {'v': 1}, ttl=1)
+    clock[0] += 2
+    again = ttl_cache.put(('a', 1), {'v': 1}, ttl=1)
+    assert (again.etag, again.last_modified) == (first.etag, first.last_modified)
+    assert again.expires_at > first.expires_at
+
+
+def test_invalidate_by_resource_type(clock):  # pylint: disable=unused-argument
+    ttl_cache = TTLCache(max_size=4)
+    ttl_cache.put(('users', 'all'), 1, ttl=60)
+    ttl_cache.put(('users', 'page'), 2, ttl=60)
+    ttl_cache.put(('locales', 'all'), 3, ttl=60)
+    ttl_cache.invalidate('users')
+    assert len(ttl_cache) == 1
+    ttl_cache.invalidate()
+    assert len(ttl_cache) == 0
+
+
+def test_combined_entry(clock):  # pylint: disable=unused-argument
+    ttl_cache = TTLCache(max_size=4)
+    users = ttl_cache.put(('users', 'all'), {'users': []}, ttl=60)
+    projects = ttl_cache.put(('projects', 'all'), {'projects': []}, ttl=10)
+    combined = combine_entries([users, projects])
+    assert combined.value == {'users': [], 'projects': []}
+    assert combined.expires_at == projects.expires_at
+
+
+def test_concurrent_misses_share_one_fetch(monkeypatch):
+    monkeypatch.setattr(logic, '_LISTING_CACHE', TTLCache(max_size=4))
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {'users': [{'uuid': 'u-1'}]}
+
+    async def requests():
+        # pylint: disable-next=protected-access
+        listing = functools.partial(logic._cached_listing, 'users', ('users', 'all'), fetch)
+        return await asyncio.gather(*(listing() for _ in range(5)))
+
+    entries = asyncio.run(requests())
+    assert len(calls) == 1
+    assert len({entry.etag for entry in entries}) == 1
+    assert logic._LISTING_FETCHES == {}  # pylint: disable=protected-access
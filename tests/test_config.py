@@ -0,0 +1,24 @@
+import pytest
+
+from dsw_seed_maker.config import Config
+
+
+@pytest.fixture
+def config(monkeypatch):
+    for name, value in (('DSW_DB_CONN_STR', 'dbname=test'), ('DSW_S3_URL', 'localhost:9000'),
+                        ('DSW_S3_USERNAME', 'minio'), ('DSW_S3_PASSWORD', 'minio'),
+                        ('DSW_S3_BUCKET', 'wizard'), ('SEED_JOBS_WORKERS', 2),
+                        ('SEED_FETCH_CONCURRENCY', 4)):
+        monkeypatch.setattr(Config, name, value)
+    return monkeypatch
+
+
+def test_pool_fits_concurrent_exports(config):
+    config.setattr(Config, 'DSW_DB_POOL_MAX_SIZE', 10)
+    Config.check()
+
+
+def test_pool_too_small_is_rejected(config):
+    config.setattr(Config, 'DSW_DB_POOL_MAX_SIZE', 9)
+    with pytest.raises(ValueError, match='DSW_DB_POOL_MAX_SIZE'):
+        Config.check()
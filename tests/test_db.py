@@ -0,0 +1,107 @@
+import contextlib
+
+import pytest
+
+from dsw_seed_maker.comm.db import Database, DatabasePool, PoolOptions, query_text
+
+
+class _FakeCursor:
+
+    def __init__(self, connection: '_FakeConnection'):
+        self.connection = connection
+        self.itersize = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, query, params=None):
+        self.connection.statements.append(query_text(query))
+
+    def fetchall(self):
+        return [{'value': 1}]
+
+
+class _FakeConnection:
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @contextlib.contextmanager
+    def transaction(self):
+        self.statements.append('BEGIN')
+        yield
+        self.statements.append('COMMIT')
+
+    def execute(self, query):
+        self.statements.append(query_text(query))
+        return self
+
+    def fetchone(self):
+        return ('00000003-0000001B-1',)
+
+    def cursor(self, name='', row_factory=None):  # pylint: disable=unused-argument
+        return _FakeCursor(self)
+
+
+class _FakePool:
+    # hands out a new connection each time, counts those checked out
+
+    def __init__(self):
+        self.closed = False
+        self.connections: list[_FakeConnection] = []
+        self.checked_out = 0
+
+    @contextlib.contextmanager
+    def connection(self):
+        connection = _FakeConnection()
+        self.connections.append(connection)
+        self.checked_out += 1
+        try:
+            yield connection
+        finally:
+            self.checked_out -= 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    fake_pool = _FakePool()
+
+    def connect(self):
+        self._pool = fake_pool  # pylint: disable=protected-access
+
+    monkeypatch.setattr(DatabasePool, 'connect', connect)
+    return fake_pool
+
+
+def test_snapshot_is_imported_by_queries(pool):
+    db = Database('test', 'dbname=test', pool=PoolOptions(1, 4, 60.0, 60.0))
+    with db.snapshot() as snapshot_db:
+        assert pool.checked_out == 1
+        assert snapshot_db.execute_query('SELECT 1') == [{'value': 1}]
+        assert pool.checked_out == 1
+    assert pool.checked_out == 0
+    exporting, importing = pool.connections
+    assert 'SELECT pg_export_snapshot()' in exporting.statements
+    assert importing.statements[:3] == [
+        'BEGIN',
+        'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY',
+        "SET TRANSACTION SNAPSHOT '00000003-0000001B-1'",
+    ]
+    assert importing.statements[-2:] == ['SELECT 1', 'COMMIT']
+
+
+def test_snapshot_connection_is_returned_on_error(pool):
+    db = Database('test', 'dbname=test', pool=PoolOptions(1, 4, 60.0, 60.0))
+    with pytest.raises(RuntimeError):
+        with db.snapshot():
+            raise RuntimeError('planning failed')
+    assert pool.checked_out == 0
+    # queries outside the block do not import the snapshot
+    db.execute_query('SELECT 1')
+    assert pool.connections[-1].statements == ['SELECT 1']
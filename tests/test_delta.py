@@ -0,0 +1,56 @@
+import pytest
+
+from dsw_seed_maker import logic
+from dsw_seed_maker.config import Config
+from dsw_seed_maker.manifest import MANIFEST_FILE, Manifest
+
+from .conftest import FakeS3, RecordingDatabase
+
+SELECTION = {
+    'projects': [{'uuid': 'p-1'}, {'uuid': 'p-2'}],
+    'locales': [{'id': 'en'}],
+}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    database = RecordingDatabase(
+        questionnaire=[
+            {'uuid': 'p-1', 'name': 'First', 'package_id': None, 'document_template_id': None},
+            {'uuid': 'p-2', 'name': 'Second', 'package_id': None, 'document_template_id': None},
+        ],
+        locale=[{'id': 'en', 'name': 'English'}],
+    )
+    database.dataset.primary_keys.update(questionnaire='uuid', locale='id')
+    s3 = FakeS3({'locales/en': b'locale'})
+    # pylint: disable-next=protected-access
+    monkeypatch.setattr(logic._SHARED, 'db', database)
+    monkeypatch.setattr(logic, 'connect_to_s3_logic', lambda: s3)
+    monkeypatch.setattr(Config, 'SEED_S3_CACHE_SIZE', 0)
+    return database
+
+
+def test_delta_writes_only_changed_rows_as_upserts(db, tmp_path):
+    first = tmp_path / 'first'
+    logic.process_input(SELECTION, str(first))
+    manifest = Manifest.load(first / MANIFEST_FILE)
+    assert set(manifest.entities) == {'projects[p-1]', 'projects[p-2]', 'locales[en]'}
+    assert set(manifest.objects) == {'locales/en'}
+    assert (first / 'app' / 'locales' / 'English').exists()
+
+    db.dataset.tables['questionnaire'][1]['name'] = 'Second, renamed'
+    second = tmp_path / 'second'
+    logic.process_input(SELECTION, str(second), previous_manifest=str(first / MANIFEST_FILE))
+    assert (second / 'add_projects.sql').read_text(encoding='utf-8') == (
+        "INSERT INTO questionnaire (uuid, name, package_id, document_template_id)"
+        " VALUES ('p-2', 'Second, renamed', NULL, NULL)\n"
+        'ON CONFLICT (uuid) DO UPDATE SET name = EXCLUDED.name,'
+        ' package_id = EXCLUDED.package_id, document_template_id = EXCLUDED.document_template_id;\n'
+    )
+    # unchanged locale: neither its row nor its S3 object is exported again
+    assert not (second / 'add_locales.sql').exists()
+    assert not (second / 'app' / 'locales' / 'English').exists()
+    delta = Manifest.load(second / MANIFEST_FILE)
+    assert delta.objects == manifest.objects
+    assert delta.entities['projects[p-1]'] == manifest.entities['projects[p-1]']
+    assert delta.entities['projects[p-2]'] != manifest.entities['projects[p-2]']
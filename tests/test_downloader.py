@@ -0,0 +1,83 @@
+import prometheus_client
+
+from dsw_seed_maker.downloader import DownloadLimits, S3Downloader
+from dsw_seed_maker.filecache import S3FileCache
+from dsw_seed_maker.package import open_output
+from dsw_seed_maker.planner import S3Object
+
+from .conftest import FakeS3
+
+
+def _missing_downloads() -> float:
+    value = prometheus_client.REGISTRY.get_sample_value(
+        'dsw_seed_s3_downloads_total', {'result': 'missing'},
+    )
+    return value or 0.0
+
+
+def test_missing_object_is_counted(output):
+    s3 = FakeS3({'locales/a': b'locale'})
+    downloader = S3Downloader(s3, output, concurrency=2)  # type: ignore[arg-type]
+    before = _missing_downloads()
+    report = downloader.download_all([
+        S3Object('locales/a', 'app/locales/a'),
+        S3Object('locales/b', 'app/locales/b'),
+    ])
+    assert [s3_object.object_name for s3_object in report.missing] == ['locales/b']
+    assert _missing_downloads() - before == 1
+
+
+def test_failed_artifact_releases_reserved_size(output):
+    s3 = FakeS3(
+        {'documents/big': b'x' * 8, 'documents/small': b'y' * 4},
+        failing=frozenset({'documents/big'}),
+    )
+    downloader = S3Downloader(
+        s3, output, concurrency=1,  # type: ignore[arg-type]
+        limits=DownloadLimits(max_total_size=10),
+    )
+    report = downloader.download_all([
+        S3Object('documents/big', 'app/documents/big', artifact=True),
+        S3Object('documents/gone', 'app/documents/gone', artifact=True),
+        S3Object('documents/small', 'app/documents/small', artifact=True),
+    ])
+    assert [s3_object.object_name for s3_object, _ in report.failed] == ['documents/big']
+    assert [s3_object.object_name for s3_object in report.downloaded] == ['documents/small']
+    assert report.skipped == []
+
+
+def test_archive_output_bypasses_cache(tmp_path):
+    s3 = FakeS3({'locales/a': b'locale'})
+    cache = S3FileCache(tmp_path / 'cache', 1024)
+    with open_output(tmp_path / 'output', tmp_path / 'seed.zip') as output:
+        downloader = S3Downloader(s3, output, concurrency=1,  # type: ignore[arg-type]
+                                  cache=cache)
+        report = downloader.download_all([S3Object('locales/a', 'app/locales/a')])
+    assert report.bytes_downloaded == len(b'locale')
+    assert list((tmp_path / 'cache').glob('*/*')) == []
+
+
+class _RacingCache(S3FileCache):
+    # another export evicts the first fetched file before it is linked
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.fetches = 0
+
+    def fetch(self, bucket, object_name, etag, download):
+        cached = super().fetch(bucket, object_name, etag, download)
+        self.fetches += 1
+        if cached is not None and self.fetches == 1:
+            cached.unlink()
+        return cached
+
+
+def test_object_evicted_before_link_is_fetched_again(tmp_path, output):
+    s3 = FakeS3({'locales/a': b'locale'})
+    cache = _RacingCache(tmp_path / 'cache', 1024)
+    downloader = S3Downloader(s3, output, concurrency=1,  # type: ignore[arg-type]
+                              cache=cache)
+    report = downloader.download_all([S3Object('locales/a', 'app/locales/a')])
+    assert report.ok
+    assert cache.fetches == 2
+    assert (tmp_path / 'output' / 'app' / 'locales' / 'a').read_bytes() == b'locale'
@@ -0,0 +1,53 @@
+import fcntl
+import threading
+
+from dsw_seed_maker.filecache import LOCK_FILE, S3FileCache
+
+
+def _store(content: bytes):
+    def download(path):
+        path.write_bytes(content)
+        return True
+    return download
+
+
+def _cached_size(cache: S3FileCache) -> int:
+    return sum(path.stat().st_size for path in cache.cache_dir.glob('*/*'))
+
+
+def test_fetch_keeps_cache_within_limit(tmp_path):
+    cache = S3FileCache(tmp_path, 10)
+    for name in ('a', 'b', 'c', 'd'):
+        assert cache.fetch('bucket', name, 'etag', _store(b'x' * 4)) is not None
+        assert _cached_size(cache) <= 10
+    # the most recently fetched object is kept
+    assert cache.get('bucket', 'd', 'etag') is not None
+
+
+def test_object_over_limit_is_kept_until_evicted(tmp_path):
+    cache = S3FileCache(tmp_path, 2)
+    cached = cache.fetch('bucket', 'a', 'etag', _store(b'data'))
+    assert cached is not None and cached.exists()
+    assert cache.evict() == 1
+    assert not cached.exists()
+
+
+def test_cached_object_is_not_downloaded_again(tmp_path):
+    cache = S3FileCache(tmp_path, 10)
+    cached = cache.fetch('bucket', 'a', 'etag', _store(b'data'))
+    assert cache.fetch('bucket', 'a', 'etag', lambda path: False) == cached
+    assert cache.fetch('bucket', 'a', 'other', lambda path: False) is None
+
+
+def test_evict_waits_for_other_processes(tmp_path):
+    cache = S3FileCache(tmp_path, 0)
+    cache.fetch('bucket', 'a', 'etag', _store(b'data'))
+    evicted = []
+    with (tmp_path / LOCK_FILE).open('a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        thread = threading.Thread(target=lambda: evicted.append(cache.evict()))
+        thread.start()
+        thread.join(0.2)
+        assert thread.is_alive()
+    thread.join(5)
+    assert evicted == [1]
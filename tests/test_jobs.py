@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from dsw_seed_maker.jobs import JOB_SUCCEEDED, JobLimitError, JobQueueFullError, \
+    SeedJobManager
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def _manager(tmp_path, release, **kwargs) -> SeedJobManager:
+    options = {'max_workers': 1, 'max_per_user': 1, 'ttl': 3600.0, 'max_jobs': 2}
+    options.update(kwargs)
+    return SeedJobManager(
+        runner=lambda job: release.wait(5),
+        jobs_dir=tmp_path,
+        **options,
+    )
+
+
+def _submit(manager: SeedJobManager, owner: str):
+    return manager.submit(owner, {}, '.zip', 'insert', 100)
+
+
+def test_limits_per_user_and_in_total(tmp_path, release):
+    manager = _manager(tmp_path, release)
+    try:
+        _submit(manager, 'alice')
+        with pytest.raises(JobLimitError):
+            _submit(manager, 'alice')
+        _submit(manager, 'bob')
+        with pytest.raises(JobQueueFullError):
+            _submit(manager, 'carol')
+    finally:
+        release.set()
+        manager.shutdown()
+
+
+def test_expired_jobs_are_purged_on_read(tmp_path, release):
+    release.set()
+    manager = _manager(tmp_path, release, ttl=0.0)
+    try:
+        job = _submit(manager, 'alice')
+        job.package_path.touch()
+        manager.shutdown()
+        assert job.state == JOB_SUCCEEDED
+        assert manager.list('alice') == []
+        assert manager.get(job.job_id) is None
+        assert not job.package_path.exists()
+    finally:
+        manager.shutdown()
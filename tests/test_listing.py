@@ -0,0 +1,103 @@
+import datetime
+
+import pytest
+
+from dsw_seed_maker.comm.db import query_text
+from dsw_seed_maker.listing import LISTINGS, ListingFilter, decode_cursor, encode_cursor, \
+    listing_page, listing_query
+
+
+def _cursor(listing_filter: ListingFilter, row: dict) -> ListingFilter:
+    spec = LISTINGS['projects']
+    return ListingFilter(
+        limit=listing_filter.limit,
+        sort=listing_filter.sort,
+        descending=listing_filter.descending,
+        cursor=encode_cursor(listing_filter, row, spec),
+    )
+
+
+@pytest.mark.parametrize('sort, value, expected', [
+    ('name', 'Alpha', 'Alpha'),
+    ('name', None, None),
+    ('created_at', datetime.datetime(2024, 1, 2, 3, 4, tzinfo=datetime.timezone.utc),
+     '2024-01-02T03:04:00+00:00'),
+])
+def test_cursor_round_trip(sort, value, expected):
+    listing_filter = ListingFilter(limit=2, sort=sort)
+    column = 'created_at' if sort == 'created_at' else 'name'
+    after = _cursor(listing_filter, {'uuid': 'p-1', column: value})
+    assert decode_cursor(after) == (expected, 'p-1')
+
+
+def test_cursor_of_other_sort_is_rejected():
+    after = _cursor(ListingFilter(limit=2, sort='name'), {'uuid': 'p-1', 'name': 'A'})
+    after.descending = True
+    with pytest.raises(ValueError, match='sort order'):
+        decode_cursor(after)
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(ListingFilter(cursor='not-a-cursor'))
+
+
+def test_filters_and_limit():
+    query, params = listing_query('projects', ListingFilter(
+        limit=10,
+        name_prefix='50%_off',
+        filters={'template_id': 'dsw:default:1.0.0'},
+    ))
+    assert query_text(query) == (
+        'SELECT "uuid", "name" FROM "questionnaire"'
+        ' WHERE "name" LIKE %(name_prefix)s'
+        ' AND "document_template_id" = %(filter_template_id)s'
+        ' ORDER BY "uuid" ASC, "uuid" ASC LIMIT %(limit)s'
+    )
+    assert params == {
+        'name_prefix': '50\\%\\_off%',
+        'filter_template_id': 'dsw:default:1.0.0',
+        'limit': 11,
+    }
+
+
+def test_unsupported_filter_is_rejected():
+    with pytest.raises(ValueError, match='not supported'):
+        listing_query('locales', ListingFilter(filters={'km_id': 'x'}))
+
+
+@pytest.mark.parametrize('descending, value, condition, params', [
+    (False, 'B', '(("name", "uuid") > (%(after_sort)s, %(after_key)s) OR "name" IS NULL)',
+     {'after_sort': 'B', 'after_key': 'p-1'}),
+    (True, 'B', '("name", "uuid") < (%(after_sort)s, %(after_key)s)',
+     {'after_sort': 'B', 'after_key': 'p-1'}),
+    (False, None, '("name" IS NULL AND "uuid" > %(after_key)s)',
+     {'after_key': 'p-1'}),
+    (True, None, '(("name" IS NULL AND "uuid" < %(after_key)s) OR "name" IS NOT NULL)',
+     {'after_key': 'p-1'}),
+])
+def test_keyset_handles_null_sort_values(descending, value, condition, params):
+    after = _cursor(ListingFilter(limit=2, sort='name', descending=descending),
+                    {'uuid': 'p-1', 'name': value})
+    query, query_params = listing_query('projects', after)
+    direction = 'DESC' if descending else 'ASC'
+    assert query_text(query) == (
+        f'SELECT "uuid", "name" FROM "questionnaire" WHERE {condition}'
+        f' ORDER BY "name" {direction}, "uuid" {direction} LIMIT %(limit)s'
+    )
+    assert query_params == {**params, 'limit': 3}
+
+
+def test_keyset_on_key_column():
+    after = _cursor(ListingFilter(limit=2), {'uuid': 'p-1'})
+    query, params = listing_query('projects', after)
+    assert '("uuid", "uuid") > (%(after_sort)s, %(after_key)s)' in query_text(query)
+    assert 'IS NULL' not in query_text(query)
+    assert params == {'after_sort': 'p-1', 'after_key': 'p-1', 'limit': 3}
+
+
+def test_page_has_more_only_with_extra_row():
+    listing_filter = ListingFilter(limit=2, sort='name')
+    rows = [{'uuid': f'p-{i}', 'name': f'P{i}', 'created_at': None} for i in range(3)]
+    page = listing_page('projects', listing_filter, rows)
+    assert page['projects'] == [{'uuid': 'p-0', 'name': 'P0'}, {'uuid': 'p-1', 'name': 'P1'}]
+    after = ListingFilter(limit=2, sort='name', cursor=page['next_cursor'])
+    assert decode_cursor(after) == ('P1', 'p-1')
+    assert listing_page('projects', listing_filter, rows[:2])['next_cursor'] is None
@@ -0,0 +1,53 @@
+import io
+import tarfile
+import threading
+import zipfile
+
+import pytest
+
+from dsw_seed_maker import package
+from dsw_seed_maker.package import open_output
+
+
+class _BlockingStream(io.BytesIO):
+    # an S3 response stalling until released
+
+    def __init__(self, content: bytes):
+        super().__init__(content)
+        self.release = threading.Event()
+
+    def read(self, size=-1):
+        assert self.release.wait(5)
+        return super().read(size)
+
+
+def _members(path) -> dict[str, bytes]:
+    if path.suffix == '.zip':
+        with zipfile.ZipFile(path) as archive:
+            return {name: archive.read(name) for name in archive.namelist()}
+    with tarfile.open(path) as archive:
+        return {member.name: archive.extractfile(member).read()  # type: ignore[union-attr]
+                for member in archive.getmembers()}
+
+
+@pytest.mark.parametrize('archive_name', ['seed.zip', 'seed.tar.gz'])
+def test_slow_stream_does_not_block_other_members(tmp_path, archive_name):
+    archive = tmp_path / archive_name
+    with open_output(tmp_path, archive) as output:
+        slow = _BlockingStream(b'slow')
+        thread = threading.Thread(target=output.write_stream, args=('slow', slow, 4))
+        thread.start()
+        output.write_stream('fast', io.BytesIO(b'fast'), 4)
+        slow.release.set()
+        thread.join(5)
+    assert _members(archive) == {'fast': b'fast', 'slow': b'slow'}
+
+
+def test_tar_output_cleans_up_when_open_fails(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise tarfile.CompressionError('unsupported')
+
+    monkeypatch.setattr(package.tarfile, 'open', fail)
+    with pytest.raises(tarfile.CompressionError):
+        open_output(tmp_path, tmp_path / 'seed.tar.gz')
+    assert list(tmp_path.iterdir()) == []
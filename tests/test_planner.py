@@ -0,0 +1,95 @@
+import datetime
+
+from dsw_seed_maker.planner import EntityKey, SeedPlanner
+
+from .conftest import RecordingDatabase
+
+EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+TENANT_UUID = '00000000-0000-0000-0000-000000000001'
+
+
+def _km(km_id: str, previous: str | None, day: int) -> dict:
+    return {'id': km_id, 'previous_package_id': previous,
+            'created_at': EPOCH + datetime.timedelta(days=day)}
+
+
+def _project(uuid: str, km_id: str = 'km:3', template_id: str = 'tpl:1') -> dict:
+    return {'uuid': uuid, 'package_id': km_id, 'document_template_id': template_id}
+
+
+def _database() -> RecordingDatabase:
+    return RecordingDatabase(
+        # stored newest first, the plan must not depend on it
+        package=[_km('km:3', 'km:2', 3), _km('km:2', 'km:1', 2), _km('km:1', None, 1),
+                 _km('other:1', None, 0)],
+        document_template=[{'id': 'tpl:1'}],
+        questionnaire=[_project('p-1'), _project('p-2'), _project('p-3', 'other:1')],
+        document=[{'uuid': 'd-1', 'document_template_id': 'tpl:1',
+                   'questionnaire_uuid': 'p-1', 'state': 'DoneDocumentState'}],
+    )
+
+
+def _keys(entities) -> list[str]:
+    return [str(entity.key) for entity in entities]
+
+
+def test_dependencies_come_first():
+    planner = SeedPlanner(_database())
+    planner.add('documents', 'd-1')
+    ordered = _keys(planner.resolve().ordered())
+    assert ordered.index('knowledge_models[km:3]') < ordered.index('projects[p-1]')
+    assert ordered.index('document_templates[tpl:1]') < ordered.index('projects[p-1]')
+    assert ordered.index('projects[p-1]') < ordered.index('documents[d-1]')
+
+
+def test_entities_are_planned_once():
+    db = _database()
+    planner = SeedPlanner(db, workers=4)
+    planner.add_all('projects', ['p-1', 'p-2', 'p-1'])
+    planner.add_all('knowledge_models', ['km:3', 'km:2'])
+    planner.add('document_templates', 'tpl:1')
+    plan = planner.resolve()
+    keys = _keys(plan.ordered())
+    assert len(keys) == len(set(keys)) == 6
+    fetched = [kwargs['values'] for text, kwargs in db.queries if '"package"' in text]
+    assert fetched == [['km:3', 'km:2']]
+
+
+def test_knowledge_model_chain_is_oldest_first():
+    planner = SeedPlanner(_database())
+    planner.add_all('projects', ['p-3', 'p-1'])
+    plan = planner.resolve()
+    kms = [entity.key.entity_id for entity in plan.ordered()
+           if entity.resource_type == 'knowledge_models']
+    assert kms == ['other:1', 'km:1', 'km:2', 'km:3']
+    assert plan.entities[EntityKey('knowledge_models', 'km:2')].dependencies == [
+        EntityKey('knowledge_models', 'km:1'),
+    ]
+
+
+def test_ids_are_fetched_in_batches():
+    db = _database()
+    planner = SeedPlanner(db, batch_size=2)
+    planner.add_all('projects', ['p-1', 'p-2', 'p-3', 'p-4'])
+    plan = planner.resolve()
+    batches = [(text, kwargs['values']) for text, kwargs in db.queries
+               if '"questionnaire"' in text]
+    assert batches == [
+        ('SELECT * FROM "questionnaire" WHERE "uuid" = ANY(%(values)s::uuid[])', ['p-1', 'p-2']),
+        ('SELECT * FROM "questionnaire" WHERE "uuid" = ANY(%(values)s::uuid[])', ['p-3', 'p-4']),
+    ]
+    assert plan.missing == [EntityKey('projects', 'p-4')]
+
+
+def test_tenant_filter_is_added_to_every_query():
+    db = _database()
+    planner = SeedPlanner(db, tenant_uuid=TENANT_UUID)
+    planner.add('documents', 'd-1')
+    planner.add('locales', 'en')
+    planner.resolve()
+    assert len(db.queries) > 5
+    for text, kwargs in db.queries:
+        assert kwargs['tenant_uuid'] == TENANT_UUID
+        # the recursive chain query filters its anchor, recursion and final join
+        expected = 3 if text.startswith('WITH RECURSIVE') else 1
+        assert text.count('"tenant_uuid" = %(tenant_uuid)s::uuid') == expected, text
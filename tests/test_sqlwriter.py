@@ -0,0 +1,125 @@
+import datetime
+import io
+import math
+import uuid
+
+import pytest
+
+from dsw_seed_maker.consts import SQL_FORMAT_INSERT, SQL_FORMAT_MULTI_INSERT
+from dsw_seed_maker.sqlwriter import EncoderRegistry, SeedSqlWriter
+
+UUID = uuid.UUID('6c6b0d4b-2c62-4f5a-8e1c-0c6a3f2c1d7e')
+TIMESTAMP = datetime.datetime(2024, 5, 6, 7, 8, 9, 123000, tzinfo=datetime.timezone.utc)
+
+
+def _encode(column_type: str | None, value) -> str:
+    types = {} if column_type is None else {'t': {'c': column_type}}
+    return EncoderRegistry(types).row_encoder('t', ('c',))([value])
+
+
+@pytest.mark.parametrize('column_type, value, expected', [
+    ('text', "it's", "'it''s'"),
+    ('varchar', 'back\\slash', "'back\\slash'"),
+    ('text', None, 'NULL'),
+    ('bool', True, 'TRUE'),
+    ('bool', False, 'FALSE'),
+    ('int4', 42, '42'),
+    ('int8', -7, '-7'),
+    ('float8', 1.5, "'1.5'"),
+    ('float8', math.nan, "'NaN'"),
+    ('float8', math.inf, "'Infinity'"),
+    ('float8', -math.inf, "'-Infinity'"),
+    ('numeric', 3, "'3'"),
+    ('uuid', UUID, f"'{UUID}'"),
+    ('timestamptz', TIMESTAMP, "'2024-05-06 07:08:09.123000+00:00'"),
+    ('date', datetime.date(2024, 5, 6), "'2024-05-06'"),
+    ('jsonb', {'a': "it's", 'b': [1, None]}, '\'{"a": "it\'\'s", "b": [1, null]}\''),
+    ('json', ['x'], '\'["x"]\''),
+    ('bytea', b'\x00\xffA', "'\\x00ff41'"),
+    ('_text', ['a', 'b,c', 'say "hi"', None], '\'{"a","b,c","say \\"hi\\"",NULL}\''),
+    ('_text', ["it's", 'back\\slash'], '\'{"it\'\'s","back\\\\slash"}\''),
+    ('_int4', [[1, 2], [3, 4]], '\'{{"1","2"},{"3","4"}}\''),
+    ('_bool', [True, False], '\'{"t","f"}\''),
+    ('_uuid', [], "'{}'"),
+])
+def test_typed_encoders(column_type, value, expected):
+    assert _encode(column_type, value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('text', "'text'"),
+    (True, 'TRUE'),
+    (10, '10'),
+    (math.nan, "'NaN'"),
+    (UUID, f"'{UUID}'"),
+    (TIMESTAMP, "'2024-05-06 07:08:09.123000+00:00'"),
+    ({'k': 'v'}, '\'{"k": "v"}\''),
+    (b'\x01', "'\\x01'"),
+    (['a'], '\'{"a"}\''),
+    (None, 'NULL'),
+])
+def test_untyped_columns_use_python_type(value, expected):
+    assert _encode(None, value) == expected
+
+
+ROWS = [
+    {'uuid': 'a', 'name': 'First', 'size': 1},
+    {'uuid': 'b', 'name': "O'Brien", 'size': None},
+    {'uuid': 'c', 'name': 'Third', 'size': 3},
+]
+
+
+def _write(sql_format: str, rows=None, **kwargs) -> str:
+    output = io.StringIO()
+    writer = SeedSqlWriter(output, sql_format=sql_format, **kwargs)
+    writer.write_rows('item', ROWS if rows is None else rows)
+    return output.getvalue()
+
+
+def test_insert_statements():
+    assert _write(SQL_FORMAT_INSERT) == (
+        "INSERT INTO item (uuid, name, size) VALUES ('a', 'First', 1);\n"
+        "INSERT INTO item (uuid, name, size) VALUES ('b', 'O''Brien', NULL);\n"
+        "INSERT INTO item (uuid, name, size) VALUES ('c', 'Third', 3);\n"
+    )
+
+
+def test_multi_row_statements():
+    assert _write(SQL_FORMAT_MULTI_INSERT, rows_per_statement=2) == (
+        'INSERT INTO item (uuid, name, size) VALUES\n'
+        "    ('a', 'First', 1),\n"
+        "    ('b', 'O''Brien', NULL);\n"
+        'INSERT INTO item (uuid, name, size) VALUES\n'
+        "    ('c', 'Third', 3);\n"
+    )
+
+
+def test_rows_with_other_columns_start_a_statement():
+    rows = [{'uuid': 'a', 'name': 'A'}, {'uuid': 'b'}]
+    assert _write(SQL_FORMAT_MULTI_INSERT, rows=rows) == (
+        "INSERT INTO item (uuid, name) VALUES\n    ('a', 'A');\n"
+        "INSERT INTO item (uuid) VALUES\n    ('b');\n"
+    )
+
+
+@pytest.mark.parametrize('sql_format, expected', [
+    (SQL_FORMAT_INSERT,
+     "INSERT INTO item (uuid, name, size) VALUES ('a', 'First', 1)\n"
+     'ON CONFLICT (uuid) DO UPDATE SET name = EXCLUDED.name, size = EXCLUDED.size;\n'),
+    (SQL_FORMAT_MULTI_INSERT,
+     'INSERT INTO item (uuid, name, size) VALUES\n'
+     "    ('a', 'First', 1)\n"
+     'ON CONFLICT (uuid) DO UPDATE SET name = EXCLUDED.name, size = EXCLUDED.size;\n'),
+])
+def test_upserts(sql_format, expected):
+    assert _write(sql_format, rows=ROWS[:1], conflict_keys={'item': ('uuid',)}) == expected
+
+
+def test_upsert_of_key_columns_only_does_nothing():
+    output = _write(SQL_FORMAT_INSERT, rows=[{'uuid': 'a'}], conflict_keys={'item': ('uuid',)})
+    assert output == "INSERT INTO item (uuid) VALUES ('a')\nON CONFLICT (uuid) DO NOTHING;\n"
+
+
+def test_invalid_format_is_rejected():
+    with pytest.raises(ValueError, match='Invalid SQL format'):
+        SeedSqlWriter(io.StringIO(), sql_format='copy')
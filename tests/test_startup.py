@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+from benchmarks.scenarios import STARTUP_FORBIDDEN
+
+# seconds the import of the CLI may take (best of STARTUP_RUNS), about 0.06s now
+STARTUP_BUDGET = 0.5
+STARTUP_RUNS = 3
+
+
+def _import_times(code: str) -> dict[str, float]:
+    # module -> cumulative import time in seconds, as reported by -X importtime
+    # ("import time: self [us] | cumulative | imported package" on stderr)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, check=True, text=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, module = line.split('|')
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative) / 1_000_000
+    return times
+
+
+def test_cli_import_is_lazy():
+    modules = _import_times('import dsw_seed_maker.cli')
+    assert 'dsw_seed_maker.cli' in modules
+    assert sorted(set(modules) & set(STARTUP_FORBIDDEN)) == []
+
+
+def test_cli_version_is_lazy():
+    modules = _import_times(
+        'from dsw_seed_maker.cli import cli; cli(["--version"], standalone_mode=False)'
+    )
+    assert sorted(set(modules) & set(STARTUP_FORBIDDEN)) == []
+
+
+def test_cli_import_is_within_budget():
+    best = min(
+        _import_times('import dsw_seed_maker.cli')['dsw_seed_maker.cli']
+        for _ in range(STARTUP_RUNS)
+    )
+    assert best < STARTUP_BUDGET
@@ -0,0 +1,60 @@
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from dsw_seed_maker import logic
+from dsw_seed_maker.config import Config
+from dsw_seed_maker.logic import TenantExportOptions, TenantExportResult, process_tenants
+
+
+class _FakeExecutor:
+    # runs nothing, the worker of tenant "broken" dies
+
+    instances: list['_FakeExecutor'] = []
+
+    def __init__(self, max_workers, **kwargs):  # pylint: disable=unused-argument
+        self.max_workers = max_workers
+        self.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def submit(self, fn, tenant, options):  # pylint: disable=unused-argument
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        if tenant == 'broken':
+            future.set_exception(BrokenProcessPool('worker died'))
+        else:
+            future.set_result(TenantExportResult(tenant_uuid=tenant, package=tenant))
+        return future
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    _FakeExecutor.instances.clear()
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', _FakeExecutor)
+    monkeypatch.setattr(Config, 'SEED_TENANT_WORKERS', 2)
+    return _FakeExecutor
+
+
+def test_broken_worker_fails_only_its_tenants(executor):
+    options = TenantExportOptions(data={}, output_dir='output', archive='seed.zip')
+    results = process_tenants(['a', 'broken', 'b'], options)
+    assert [result.tenant_uuid for result in results] == ['a', 'broken', 'b']
+    assert [result.error is None for result in results] == [True, False, True]
+    assert results[1].package == 'seed-broken.zip'
+    assert 'worker died' in (results[1].error or '')
+    assert executor.instances[0].max_workers == 2
+
+
+def test_worker_pool_is_sized_for_one_export(monkeypatch):
+    monkeypatch.setattr(Config, 'SEED_FETCH_CONCURRENCY', 3)
+    monkeypatch.setattr(Config, 'DSW_DB_POOL_MAX_SIZE', 20)
+    # pylint: disable=protected-access
+    monkeypatch.setattr(logic, '_SHARED', logic._SharedResources())
+    monkeypatch.setattr(logic.atexit, 'register', lambda fn: None)
+    logic._init_tenant_worker()
+    assert logic._pool_options().max_size == 4